@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+
 def compute_yoy_change(df, column):
     """
     Compute year-over-year percentage change for a given column,
@@ -10,11 +14,74 @@ def compute_yoy_change(df, column):
 def add_all_yoy(df):
     """
     Compute YoY percentage changes for all numeric columns except 'Date'.
+
+    All `<column>_YoY_%` columns are computed in one vectorized pass over the
+    numeric block and added with a single concat; existing YoY columns are
+    recomputed in place rather than used as inputs, so calling this twice
+    gives the same frame. Returns a new DataFrame.
     """
-    for col in df.columns:
-        if col != "Date" and df[col].dtype != "object":
-            df = compute_yoy_change(df, col)
-    return df
+    sources = _yoy_sources(df)
+    if not sources:
+        return df
+    yoy = df[sources].pct_change(periods=4, fill_method=None) * 100
+    yoy.columns = [f"{col}_YoY_%" for col in sources]
+
+    existing = [col for col in yoy.columns if col in df.columns]
+    added = [col for col in yoy.columns if col not in df.columns]
+    out = pd.concat([df, yoy[added]], axis=1)
+    if existing:
+        out[existing] = yoy[existing]
+    return out
+
+def append_quarter_yoy(df, quarter, num_quarters=None):
+    """
+    Appends one quarter to a frame produced by add_all_yoy() and computes
+    only that row's YoY values, against the row four quarters back.
+
+    Args:
+        df: DataFrame sorted by 'Date' ascending, with YoY columns
+        quarter: dict or Series of the new quarter's values, including 'Date'
+        num_quarters: if given, keep only the most recent num_quarters rows
+
+    Returns:
+        New DataFrame with the quarter appended.
+    """
+    quarter = dict(quarter)
+    if "Date" in df.columns and len(df) and "Date" in quarter:
+        if pd.Timestamp(quarter["Date"]) <= df["Date"].iloc[-1]:
+            raise ValueError(f"Quarter {quarter['Date']} is not newer than the last row ({df['Date'].iloc[-1]})")
+        quarter["Date"] = pd.Timestamp(quarter["Date"])
+
+    sources = _yoy_sources(df)
+    values = np.array([quarter.get(col, np.nan) for col in sources], dtype=float)
+    if len(df) >= 4:
+        base = df.iloc[-4, df.columns.get_indexer(sources)].to_numpy(dtype=float)
+    else:
+        base = np.full(len(sources), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy = (values / base - 1) * 100
+    quarter.update(zip((f"{col}_YoY_%" for col in sources), yoy))
+
+    # Build the row as one float block and insert the few non-numeric
+    # columns (normally just 'Date'); a per-cell constructor is far slower.
+    columns = list(df.columns) + [col for col in quarter if col not in df.columns]
+    dtypes = dict(df.dtypes.items())
+    other = [col for col in columns if col in dtypes and dtypes[col].kind not in "biufc"]
+    numeric = [col for col in columns if col not in other]
+    row = pd.DataFrame(np.array([[quarter.get(col, np.nan) for col in numeric]], dtype=float), columns=numeric)
+    for col in other:
+        row.insert(columns.index(col), col, [quarter.get(col)])
+    out = pd.concat([df, row], ignore_index=True)
+    if num_quarters is not None:
+        out = out.tail(num_quarters).reset_index(drop=True)
+    return out
+
+def _yoy_sources(df):
+    """Numeric columns that get a YoY column: everything except 'Date' and existing YoY columns."""
+    return [
+        col for col, dtype in df.dtypes.items()
+        if col != "Date" and not str(col).endswith("_YoY_%") and dtype.kind in "biufc"
+    ]
 
 def add_income_statement_ratios(df):
     """
@@ -33,9 +100,9 @@ def add_income_statement_ratios(df):
 def add_cash_flow_ratios(df):
     """
     Add Free Cash Flow column to cash flow DataFrame.
-    Free Cash Flow = Operating Cash Flow - Capital Expenditures
+    Free Cash Flow = Operating Cash Flow - |Capital Expenditure|
     """
-    if "Total Cash From Operating Activities" in df.columns and "Capital Expenditures" in df.columns:
-        df["Free_Cash_Flow"] = df["Total Cash From Operating Activities"] - df["Capital Expenditures"]
+    if "Operating Cash Flow" in df.columns and "Capital Expenditure" in df.columns:
+        df["Free_Cash_Flow"] = df["Operating Cash Flow"] - abs(df["Capital Expenditure"])
 
     return df
@@ -1,11 +1,69 @@
+import json
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
 import streamlit as st
-from data_fetcher import get_balance_sheet_data, get_income_statement_data, get_cash_flow_data
+from data_fetcher import fetch_statements
 from score import score_full_company
-from buffett_score import score_buffett_company
+from buffett_score import buffett_metrics, buffett_overall
 from lynch import score_lynch_company
-from gpt_summary import get_financial_summary
+from gpt_summary import build_analysis_prompt, stream_financial_summary
+from memo import clear_all, memo_stats, memoize
+from metrics import records_from_breakdown
+from prompt_builder import build_prompt
+import gpt_cache
+import statement_cache
+import tracing
+from visualize import plot_scores_figure
 import pandas as pd
-import matplotlib.pyplot as plt
+
+logger = logging.getLogger("app")
+
+# How long the GPT request waits for the metrics to ground its prompt.
+# Memoized or disk-cached statements score well within it; a cold fetch
+# does not, and the request then goes out ungrounded so it overlaps the fetch.
+GROUNDING_WAIT = 0.25  # seconds
+
+# In-process memoization: revisiting a ticker needs no network access and
+# no rescoring. Scorers are keyed by the content of the statement frames.
+fetch_statements_cached = memoize("Statements", maxsize=64, ttl=3600)(fetch_statements)
+score_full_cached = memoize("Financial Health", maxsize=256)(score_full_company)
+buffett_metrics_cached = memoize("Buffett", maxsize=256)(buffett_metrics)
+score_lynch_cached = memoize("Lynch", maxsize=256)(score_lynch_company)
+
+@st.cache_resource
+def _background_executor():
+    # Shared across reruns and sessions; GPT calls are I/O bound
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="gpt")
+
+def start_gpt_analysis(prompt, grounded=True):
+    """
+    Starts streaming GPT's analysis of a grounded prompt (prompt_builder),
+    or of the ticker-only one with grounded=False, on the background
+    executor right away. Returns the SummaryStream (for its timings) and a
+    generator that yields the chunks as they arrive, for st.write_stream.
+    """
+    chunks = queue.Queue()
+    stream = stream_financial_summary(prompt, grounded=grounded)
+
+    def run():
+        try:
+            for chunk in stream:
+                chunks.put(chunk)
+        finally:
+            chunks.put(None)
+
+    _background_executor().submit(tracing.bind(run))
+
+    def drain():
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    return stream, drain()
 
 def simple_recommendation(score):
     if score >= 7.5:
@@ -16,26 +74,7 @@ def simple_recommendation(score):
         return "SELL"
 
 def plot_scores(title, scores_dict):
-    labels = list(scores_dict.keys())
-    scores = [scores_dict[k] for k in labels]
-    fig, ax = plt.subplots()
-    bars = ax.bar(labels, scores, color=['#1f77b4','#ff7f0e','#2ca02c'])
-    ax.set_ylim(0, 10)
-    ax.set_ylabel('Score (0-10)')
-    ax.set_title(title)
-    
-    # Add score labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(
-            bar.get_x() + bar.get_width() / 2,
-            height + 0.1,
-            f'{height:.2f}',
-            ha='center',
-            va='bottom'
-        )
-    
-    st.pyplot(fig)
+    st.pyplot(plot_scores_figure(title, scores_dict))
 
 def format_to_billions_with_dollar(df, cols):
     def to_billions(x):
@@ -47,86 +86,166 @@ def format_to_billions_with_dollar(df, cols):
             df[col] = df[col].apply(to_billions)
     return df
 
+def render_timing_panel(trace):
+    """
+    Collapsible table of the page's spans (nested calls indented) with the
+    trace as a download, as plain JSON or for chrome://tracing / Perfetto.
+    """
+    records = trace.records()
+    total = trace.total()
+    logger.info("Page load for %s: %.2fs %s", trace.name, total, ", ".join(
+        f"{r['name']}={r['duration']:.2f}s" for r in records if r["depth"] == 0))
+
+    with st.expander(f"Page timings ({total:.2f}s)"):
+        st.dataframe(pd.DataFrame([{
+            "Span": "\u2003" * r["depth"] + r["name"],
+            "Start (s)": round(r["start"], 3),
+            "Duration (s)": round(r["duration"], 3),
+            "Thread": r["thread"],
+            "Attributes": ", ".join(f"{k}={v}" for k, v in r["attrs"].items()),
+        } for r in records]), hide_index=True)
+        left, right = st.columns(2)
+        left.download_button("Chrome trace", json.dumps(trace.to_chrome()),
+                             file_name=f"{trace.name}.trace.json", mime="application/json")
+        right.download_button("Span list (JSON)", json.dumps(trace.to_json()),
+                              file_name=f"{trace.name}.spans.json", mime="application/json")
+
+def render_cache_panel():
+    """Sidebar panel with cache sizes, hit rates and a button to clear the in-memory cache."""
+    with st.sidebar:
+        st.header("Cache")
+        stats = pd.DataFrame(memo_stats()).set_index("name")
+        overall = stats.loc["All"]
+        st.metric("In-memory hit rate", f"{overall['hit_rate']:.0%}")
+        st.caption(f"{int(overall['entries'])} entries held in memory")
+        st.dataframe(stats[["entries", "hits", "misses", "hit_rate"]])
+
+        for label, cache in (("Statements on disk", statement_cache.get_default_cache()),
+                             ("GPT answers on disk", gpt_cache.get_default_cache())):
+            if cache is not None:
+                disk = cache.stats()
+                st.caption(f"{label}: {disk['entries']} entries, {disk['hit_rate']:.0%} hit rate")
+
+        st.button("Clear in-memory cache", on_click=clear_all)
+
+def render_statements(bs_df, is_df, cf_df):
+    """The three statement tables (key balance sheet columns in billions)."""
+    st.subheader("Balance Sheet Data")
+    if bs_df is not None and not bs_df.empty:
+        key_columns = [
+            "Date",
+            "Total Assets",
+            "Long Term Debt",
+            "Debt_to_Equity"
+        ]
+        display_df = bs_df[[col for col in key_columns if col in bs_df.columns]].copy()
+
+        # Drop rows where all numeric columns are empty/NaN
+        financial_cols = [col for col in key_columns if col != "Date"]
+        display_df = display_df.dropna(subset=financial_cols, how='all')
+
+        formatted_df = format_to_billions_with_dollar(display_df, financial_cols)
+
+        st.dataframe(formatted_df, width=1000, height=400)
+    else:
+        st.write("No relevant Balance Sheet data available.")
+
+    st.subheader("Income Statement Data")
+    if is_df is not None and not is_df.empty:
+        st.dataframe(is_df)
+    else:
+        st.write("No relevant Income Statement data available.")
+
+    st.subheader("Cash Flow Data")
+    if cf_df is not None and not cf_df.empty:
+        st.dataframe(cf_df)
+    else:
+        st.write("No relevant Cash Flow data available.")
+
+def fetch_and_score(ticker):
+    """
+    Statements and scores of a ticker: ((bs_df, is_df, cf_df), {scorer:
+    overall score}, every scorer's MetricRecords).
+    """
+    with tracing.span("Fetch statements", ticker=ticker):
+        statements = fetch_statements_cached(ticker)
+
+    with tracing.span("Score"):
+        overall_fh_score, fh_breakdown = score_full_cached(*statements)
+        buffett_records = buffett_metrics_cached(*statements)
+        overall_lynch_score, lynch_breakdown = score_lynch_cached(*statements)
+    overall = {"financial_health": overall_fh_score, "buffett": buffett_overall(buffett_records),
+               "lynch": overall_lynch_score}
+    records = (records_from_breakdown("financial_health", fh_breakdown) + buffett_records
+               + records_from_breakdown("lynch", lynch_breakdown))
+    return statements, overall, records
+
+def render_ticker(ticker):
+    """Renders the dashboard for one ticker; each phase is a span of the page trace."""
+    # Fetch and score in the background. The GPT prompt carries the
+    # computed metrics when they are ready within GROUNDING_WAIT; otherwise
+    # the ticker-only request starts now and overlaps the fetch, trading
+    # the grounding for an earlier answer.
+    scoring = _background_executor().submit(tracing.bind(fetch_and_score), ticker)
+    with tracing.span("Wait for grounding", limit=GROUNDING_WAIT) as s:
+        try:
+            scoring.result(timeout=GROUNDING_WAIT)
+            grounded = True
+        except TimeoutError:
+            grounded = False
+        s.set(grounded=grounded)
+
+    if not grounded:
+        gpt_stream, gpt_chunks = start_gpt_analysis(build_analysis_prompt(ticker), grounded=False)
+    with tracing.span("Wait for scores"):
+        (bs_df, is_df, cf_df), overall, records = scoring.result()
+    if grounded:
+        # The request runs while we render the statements and charts
+        with tracing.span("Build prompt") as s:
+            prompt = build_prompt(ticker, (bs_df, is_df, cf_df), overall, records)
+            s.set(tokens=prompt.tokens, dropped=len(prompt.dropped))
+        gpt_stream, gpt_chunks = start_gpt_analysis(prompt.text)
+
+    with tracing.span("Render statements"):
+        render_statements(bs_df, is_df, cf_df)
+
+    st.subheader("Scores Summary")
+    scores_dict = {
+        "Financial Health": overall["financial_health"],
+        "Buffett": overall["buffett"],
+        "Lynch": overall["lynch"],
+    }
+    with tracing.span("Render scores"):
+        plot_scores("Company Financial Scores", scores_dict)
+
+    # Local simple recommendation
+    rec = simple_recommendation(overall["financial_health"])
+    st.markdown(f"### Simple Recommendation: **{rec}**")
+
+    # GPT analysis, rendered as it streams in
+    st.subheader("GPT Analysis Summary")
+    with tracing.span("Wait for GPT", grounded=grounded):
+        gpt_analysis = st.write_stream(gpt_chunks)
+
+    if not gpt_analysis:
+        st.error("GPT returned an empty response.")
+    elif gpt_stream.ttft is not None:
+        grounding = prompt if grounded else (f"ungrounded: the metrics were not ready within {GROUNDING_WAIT}s, "
+                                             "so the request did not wait for the fetch")
+        st.caption(f"First token after {gpt_stream.ttft:.2f}s, complete after {gpt_stream.total:.2f}s"
+                   + (" (cached)" if gpt_stream.cached else "") + f"; {grounding}")
+
 def main():
     st.title("Financial Health Dashboard")
 
     ticker = st.text_input("Enter Stock Ticker (e.g., AAPL)").upper()
 
     if ticker:
-        # Fetch data
-        bs_df = get_balance_sheet_data(ticker)
-        is_df = get_income_statement_data(ticker)
-        cf_df = get_cash_flow_data(ticker)
-
-        st.subheader("Balance Sheet Data")
-        if bs_df is not None and not bs_df.empty:
-            key_columns = [
-                "Date",
-                "Total Assets",
-                "Long Term Debt",
-                "Debt_to_Equity"
-            ]
-            display_df = bs_df[[col for col in key_columns if col in bs_df.columns]].copy()
-
-            # Drop rows where all numeric columns are empty/NaN
-            financial_cols = [col for col in key_columns if col != "Date"]
-            display_df = display_df.dropna(subset=financial_cols, how='all')
-
-            formatted_df = format_to_billions_with_dollar(display_df, financial_cols)
-
-            st.dataframe(formatted_df, width=1000, height=400)
-        else:
-            st.write("No relevant Balance Sheet data available.")
-
-        st.subheader("Income Statement Data")
-        if is_df is not None and not is_df.empty:
-            st.dataframe(is_df)
-        else:
-            st.write("No relevant Income Statement data available.")
-
-        st.subheader("Cash Flow Data")
-        if cf_df is not None and not cf_df.empty:
-            st.dataframe(cf_df)
-        else:
-            st.write("No relevant Cash Flow data available.")
-
-        # Scores
-        overall_fh_score, fh_breakdown = score_full_company(bs_df, is_df, cf_df)
-        overall_buffett_score, buffett_breakdown = score_buffett_company(bs_df, is_df, cf_df)
-        overall_lynch_score, lynch_breakdown = score_lynch_company(bs_df, is_df, cf_df)
-
-        st.subheader("Scores Summary")
-        scores_dict = {
-            "Financial Health": overall_fh_score,
-            "Buffett": overall_buffett_score,
-            "Lynch": overall_lynch_score,
-        }
-        plot_scores("Company Financial Scores", scores_dict)
+        with tracing.trace(ticker) as page:
+            render_ticker(ticker)
+        render_timing_panel(page)
 
-        # Local simple recommendation
-        rec = simple_recommendation(overall_fh_score)
-        st.markdown(f"### Simple Recommendation: **{rec}**")
-
-        # New GPT prompt (independent analysis + technical analysis)
-        gpt_prompt = f"""
-        You are an expert financial analyst. Conduct an independent due diligence analysis on the company {ticker}.
-        Consider fundamental financial health and also perform a technical analysis of the stock's recent market trends.
-        Provide a detailed investment analysis covering strengths, weaknesses, risks, and opportunities.
-        Conclude with a clear recommendation: BUY, HOLD, or SELL as of today.
-        """
-
-        with st.spinner("Getting GPT financial analysis..."):
-            gpt_analysis = get_financial_summary(gpt_prompt)
-
-        # Debug output to verify GPT response
-        if not gpt_analysis:
-            st.error("GPT returned an empty response.")
-        else:
-            st.write("GPT raw output:")
-            st.write(gpt_analysis)
-
-        st.subheader("GPT Analysis Summary")
-        st.text_area("GPT Investment Analysis", gpt_analysis, height=400)
+    render_cache_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,329 @@
+"""
+Asynchronous statement fetching with rate limiting and retries.
+
+All requests of an AsyncStatementFetcher share one token-bucket rate
+limiter and one concurrency cap. Throttled (HTTP 429), failed (5xx,
+connection errors) and timed-out requests are retried with jittered
+exponential backoff. Results are the same prepared frames as
+data_fetcher.fetch_statements().
+
+Two sources are available:
+    - BackendSource runs any data_fetcher backend (yfinance by default)
+      in worker threads.
+    - HTTPStatementSource reads raw statements from an HTTP endpoint, such
+      as the stand-in server from stub_server().
+
+Usage:
+    bundles = fetch_universe(["AAPL", "MSFT"], rate=2, max_concurrency=4)
+"""
+import asyncio
+import contextlib
+import functools
+import random
+import socket
+import time
+
+import pandas as pd
+
+from data_fetcher import StatementBundle, get_default_backend, prepare_statement
+from fetch_backend import STATEMENT_ATTRS, STATEMENTS
+
+
+class RateLimited(Exception):
+    """The source asked us to slow down (HTTP 429 / Yahoo rate limit)."""
+
+    def __init__(self, message="rate limited", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientFetchError(Exception):
+    """A failure worth retrying (server error, dropped connection)."""
+
+
+# === RATE LIMITING ===
+class TokenBucket:
+    """
+    Allows `rate` tokens per second on average, with bursts of up to
+    `capacity`. Waiters are served in arrival order. A request for more
+    than `capacity` tokens waits for a full bucket and takes all of it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens=1):
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+# === SOURCES ===
+class BackendSource:
+    """
+    Wraps a synchronous data_fetcher backend; each statement is loaded in a
+    worker thread from one ticker object per symbol.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_default_backend()
+
+    def open(self, ticker):
+        return self.backend.ticker(ticker)
+
+    async def fetch_raw(self, stock, statement):
+        try:
+            return await asyncio.to_thread(getattr, stock, STATEMENT_ATTRS[statement])
+        except Exception as e:
+            # yfinance signals throttling with YFRateLimitError / "Too Many Requests"
+            if "ratelimit" in type(e).__name__.lower() or "too many requests" in str(e).lower():
+                raise RateLimited(str(e)) from e
+            if isinstance(e, (ConnectionError, TimeoutError)):
+                raise TransientFetchError(str(e)) from e
+            raise
+
+    async def close(self):
+        pass
+
+
+class HTTPStatementSource:
+    """
+    Reads raw statements from GET <base_url>/<TICKER>/<statement>, which
+    returns the raw frame in raw_to_payload()'s split JSON layout.
+    An unknown ticker (404) yields an empty statement, like Yahoo does.
+    """
+
+    def __init__(self, base_url, session=None):
+        self.base_url = base_url.rstrip("/")
+        self._session = session
+        self._owns_session = session is None
+
+    def open(self, ticker):
+        return ticker.upper()
+
+    async def fetch_raw(self, ticker, statement):
+        import aiohttp
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.get(f"{self.base_url}/{ticker}/{statement}") as resp:
+                if resp.status == 429:
+                    retry_after = resp.headers.get("Retry-After")
+                    raise RateLimited("HTTP 429", float(retry_after) if retry_after else None)
+                if resp.status == 404:
+                    return pd.DataFrame()
+                if resp.status >= 500:
+                    raise TransientFetchError(f"HTTP {resp.status}")
+                resp.raise_for_status()
+                payload = await resp.json()
+        except aiohttp.ClientConnectionError as e:
+            raise TransientFetchError(str(e)) from e
+        return raw_from_payload(payload)
+
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+
+def raw_to_payload(raw):
+    """Serializes a raw statement for HTTPStatementSource (split orient, ISO dates)."""
+    return {
+        "index": [str(i) for i in raw.index],
+        "columns": [pd.Timestamp(c).isoformat() for c in raw.columns],
+        "data": [[None if v != v else v for v in row] for row in raw.to_numpy(dtype=float).tolist()],
+    }
+
+def raw_from_payload(payload):
+    if not payload.get("index"):
+        return pd.DataFrame()
+    return pd.DataFrame(
+        payload["data"],
+        index=payload["index"],
+        columns=pd.to_datetime(payload["columns"]),
+        dtype=float,
+    )
+
+
+# === FETCHER ===
+class AsyncStatementFetcher:
+    """
+    Fetches prepared statements for many tickers concurrently.
+
+    Args:
+        source: BackendSource or HTTPStatementSource (default: yfinance in threads)
+        rate: requests per second allowed by the shared token bucket
+        burst: token bucket capacity (default: `rate`)
+        max_concurrency: requests in flight at once
+        max_retries: retries per request after the first attempt
+        timeout: seconds allowed per request attempt
+        base_delay, max_delay: backoff bounds in seconds
+    """
+
+    def __init__(self, source=None, rate=5, burst=None, max_concurrency=8, max_retries=5,
+                 timeout=15, base_delay=0.5, max_delay=30):
+        self.source = source or BackendSource()
+        self.limiter = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    async def _fetch_raw(self, handle, statement):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    return await asyncio.wait_for(self.source.fetch_raw(handle, statement), self.timeout)
+            except RateLimited as e:
+                self.throttled += 1
+                error = e
+                delay = max(e.retry_after or 0, backoff_delay(attempt, self.base_delay, self.max_delay))
+            except (TransientFetchError, asyncio.TimeoutError) as e:
+                error = e
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+
+            if attempt == self.max_retries:
+                raise error
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def fetch(self, ticker, num_quarters=8):
+        """Returns the StatementBundle for one ticker, requesting its statements concurrently."""
+        handle = self.source.open(ticker)
+        raws = await asyncio.gather(*(self._fetch_raw(handle, s) for s in STATEMENTS),
+                                    return_exceptions=True)
+        for raw in raws:
+            if isinstance(raw, BaseException):
+                raise raw
+        return StatementBundle(*(
+            prepare_statement(statement, raw, num_quarters) for statement, raw in zip(STATEMENTS, raws)
+        ))
+
+    async def fetch_many(self, tickers, num_quarters=8):
+        """
+        Returns a dict of ticker -> StatementBundle, or the exception that
+        ended that ticker's retries.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        results = await asyncio.gather(
+            *(self.fetch(t, num_quarters) for t in tickers), return_exceptions=True
+        )
+        return dict(zip(tickers, results))
+
+    def stats(self):
+        return {"requests": self.requests, "retries": self.retries, "throttled": self.throttled}
+
+    async def close(self):
+        await self.source.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def fetch_universe(tickers, source=None, num_quarters=8, **options):
+    """
+    Synchronous entry point: fetches every ticker and returns
+    {ticker: StatementBundle or exception}. Options go to AsyncStatementFetcher.
+    """
+    async def run():
+        async with AsyncStatementFetcher(source, **options) as fetcher:
+            return await fetcher.fetch_many(tickers, num_quarters)
+    return asyncio.run(run())
+
+
+# === STAND-IN SERVER ===
+@functools.lru_cache(maxsize=None)
+def counters_key():
+    """
+    The web.AppKey of the stub app's {"requests", "throttled"} counters:
+    app[counters_key()]. Built on first use, since aiohttp is only
+    imported once a server is needed.
+    """
+    from aiohttp import web
+
+    return web.AppKey("counters", dict)
+
+
+def make_stub_app(backend, throttle_every=0, retry_after=0, latency=0.0):
+    """
+    aiohttp application serving raw statements from any sync backend
+    (FixtureBackend, SyntheticBackend) in HTTPStatementSource's format.
+
+    Args:
+        throttle_every: answer every Nth request with 429 (0 disables)
+        retry_after: Retry-After seconds sent with each 429
+        latency: seconds added to every response
+    """
+    from aiohttp import web
+
+    counters = {"requests": 0, "throttled": 0}
+
+    async def statement(request):
+        counters["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if throttle_every and counters["requests"] % throttle_every == 0:
+            counters["throttled"] += 1
+            return web.json_response({"error": "Too Many Requests"}, status=429,
+                                     headers={"Retry-After": str(retry_after)})
+
+        name = request.match_info["statement"]
+        if name not in STATEMENT_ATTRS:
+            raise web.HTTPNotFound()
+        raw = getattr(backend.ticker(request.match_info["ticker"]), STATEMENT_ATTRS[name])
+        if raw.empty:
+            raise web.HTTPNotFound()
+        return web.json_response(raw_to_payload(raw))
+
+    app = web.Application()
+    app[counters_key()] = counters
+    app.router.add_get("/{ticker}/{statement}", statement)
+    return app
+
+
+@contextlib.asynccontextmanager
+async def stub_server(backend, host="127.0.0.1", **options):
+    """
+    Runs make_stub_app() on a free local port and yields its base URL.
+
+        async with stub_server(FixtureBackend("fixtures"), throttle_every=3) as url:
+            async with AsyncStatementFetcher(HTTPStatementSource(url)) as fetcher:
+                bundle = await fetcher.fetch("AAPL")
+    """
+    from aiohttp import web
+
+    sock = socket.socket()
+    sock.bind((host, 0))
+    runner = web.AppRunner(make_stub_app(backend, **options))
+    await runner.setup()
+    try:
+        await web.SockSite(runner, sock).start()
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,188 @@
+"""
+Point-in-time backtest of the three scores over stored quarterly history.
+
+For every as-of date, each ticker is scored only on quarters that had been
+reported by then: a quarter ending on D counts from D + report_lag days.
+The scorers see the latest `window` such quarters, the same view a live
+fetch_statements(num_quarters=window) would have had on that date.
+
+Usage:
+    python backtest.py --history .cache/history --out panel.parquet
+    python backtest.py tickers.txt --history .cache/history --start 2015-01-01 --report-lag 45
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from batch import RESULT_COLUMNS, score_bundle, write_results, _read_tickers
+from history_store import DEFAULT_HISTORY_PATH, HistoryStore
+
+DEFAULT_REPORT_LAG = 45   # days between quarter end and the filing being public
+PANEL_COLUMNS = [c for c in RESULT_COLUMNS if c != "ticker"] + ["statement_date"]
+
+
+# === PER-TICKER REPLAY ===
+def replay_ticker(ticker, bundle, dates, window=8, report_lag=DEFAULT_REPORT_LAG):
+    """
+    Scores one ticker at every as-of date.
+
+    Args:
+        bundle: full statement history (StatementBundle-like, sorted by Date)
+        dates: as-of dates, ascending
+
+    Returns:
+        list of result rows (dicts with 'date', 'ticker' and PANEL_COLUMNS);
+        dates before the first reported quarter are skipped.
+    """
+    dates = pd.DatetimeIndex(dates)
+    cutoffs = (dates - pd.Timedelta(days=report_lag)).to_numpy()
+    # Row count of each statement visible at each date; window views are
+    # positional slices of the stored frames, never re-filtered copies.
+    visible = [
+        np.searchsorted(df["Date"].to_numpy(), cutoffs, side="right") if df is not None else None
+        for df in bundle
+    ]
+
+    rows = []
+    last_key, last_row = None, None
+    for i, date in enumerate(dates):
+        key = tuple(int(v[i]) if v is not None else 0 for v in visible)
+        if not any(key):
+            continue
+        if key != last_key:
+            views = tuple(
+                df.iloc[max(0, n - window):n] if df is not None and n else None
+                for df, n in zip(bundle, key)
+            )
+            last_row = score_bundle(ticker, views)
+            last_row["statement_date"] = max(v["Date"].iloc[-1] for v in views if v is not None)
+            last_key = key
+        rows.append(dict(last_row, date=date))
+    return rows
+
+def _replay_chunk(root, tickers, dates, window, report_lag):
+    store = HistoryStore(root)
+    rows = []
+    for ticker in tickers:
+        bundle = store.read_bundle(ticker)
+        if any(df is not None for df in bundle):
+            rows += replay_ticker(ticker, bundle, dates, window, report_lag)
+    return rows
+
+
+# === UNIVERSE RUN ===
+def quarter_ends(history, tickers, start=None, end=None, report_lag=DEFAULT_REPORT_LAG):
+    """
+    Quarter-end as-of dates from the first stored quarter (plus the
+    reporting lag) to the last one, clipped to [start, end].
+    """
+    first, last = None, None
+    for ticker in tickers:
+        table = history.read(ticker, "income_statement", columns=[], as_arrow=True)
+        if table is None or table.num_rows == 0:
+            continue
+        dates = table["Date"].to_numpy()
+        first = dates[0] if first is None else min(first, dates[0])
+        last = dates[-1] if last is None else max(last, dates[-1])
+    if first is None:
+        return pd.DatetimeIndex([])
+
+    lag = pd.Timedelta(days=report_lag)
+    first = pd.Timestamp(first) + lag if start is None else pd.Timestamp(start)
+    last = pd.Timestamp(last) + lag if end is None else pd.Timestamp(end)
+    return pd.date_range(first, last, freq="QE")
+
+def run_backtest(tickers, history, dates=None, start=None, end=None, window=8,
+                 report_lag=DEFAULT_REPORT_LAG, workers=None, chunk_size=25, progress=None):
+    """
+    Replays the stored history of every ticker and scores it at each as-of date.
+
+    Args:
+        tickers: iterable of ticker symbols
+        history: HistoryStore to read statements from
+        dates: as-of dates (default: quarter ends covering the stored history)
+        start, end: bounds for the default dates
+        window: quarters the scorers see, like num_quarters in a live fetch
+        report_lag: days after quarter end before a quarter may be used
+        workers: scoring processes; 0 runs in this process (default: one per CPU)
+        chunk_size: tickers per worker task
+        progress: optional callback(done, total) called per finished chunk
+
+    Returns:
+        DataFrame indexed by (date, ticker) with PANEL_COLUMNS.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if dates is None:
+        dates = quarter_ends(history, tickers, start, end, report_lag)
+    dates = pd.DatetimeIndex(sorted(dates))
+
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    rows = []
+    done = 0
+    if workers == 0:
+        for chunk in chunks:
+            rows += _replay_chunk(history.root, chunk, dates, window, report_lag)
+            done += len(chunk)
+            if progress:
+                progress(done, len(tickers))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_replay_chunk, history.root, chunk, dates, window, report_lag): chunk
+                       for chunk in chunks}
+            for future in as_completed(futures):
+                rows += future.result()
+                done += len(futures[future])
+                if progress:
+                    progress(done, len(tickers))
+
+    panel = pd.DataFrame(rows, columns=["date", "ticker"] + PANEL_COLUMNS)
+    return panel.set_index(["date", "ticker"]).sort_index()
+
+
+# === CLI ===
+def _print_progress(done, total):
+    print(f"\r[{done:>{len(str(total))}}/{total}] tickers replayed",
+          end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the scores over stored quarterly history.")
+    parser.add_argument("tickers", nargs="?", help="file with ticker symbols (default: every stored ticker)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="HistoryStore directory")
+    parser.add_argument("--out", default="backtest.parquet", help="score panel (.csv or .parquet)")
+    parser.add_argument("--start", help="first as-of date")
+    parser.add_argument("--end", help="last as-of date")
+    parser.add_argument("--window", type=int, default=8, help="quarters visible to the scorers")
+    parser.add_argument("--report-lag", type=int, default=DEFAULT_REPORT_LAG,
+                        help="days after quarter end before a quarter is usable")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="scoring processes, 0 to run in-process (default: one per CPU)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    history = HistoryStore(args.history)
+    tickers = _read_tickers(args.tickers) if args.tickers else history.tickers("income_statement")
+    if not tickers:
+        parser.error(f"no tickers stored in {args.history}")
+
+    start = time.perf_counter()
+    panel = run_backtest(tickers, history, start=args.start, end=args.end, window=args.window,
+                         report_lag=args.report_lag, workers=args.workers,
+                         progress=None if args.quiet else _print_progress)
+    elapsed = time.perf_counter() - start
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    write_results(panel.reset_index(), args.out)
+    dates = panel.index.get_level_values("date").nunique()
+    print(f"Scored {len(panel)} (date, ticker) pairs over {dates} dates in {elapsed:.2f}s", file=sys.stderr)
+    print(f"Results written to {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
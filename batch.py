@@ -0,0 +1,268 @@
+"""
+Batch scoring of a whole ticker universe.
+
+Fetching runs on a bounded thread pool (it is network bound), scoring on a
+process pool (it is CPU bound). Each ticker's failure is recorded in its
+result row instead of aborting the run.
+
+Usage:
+    python batch.py tickers.txt --out scores.csv
+    python batch.py tickers.txt --fixtures fixtures/ --out scores.parquet
+    python batch.py --synthetic 1000 --out scores.csv
+    python batch.py tickers.txt --metrics --out scores.parquet    # + every metric, for screener.py
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+import pandas as pd
+
+from data_fetcher import fetch_statements
+from fetch_backend import FixtureBackend, SyntheticBackend, synthetic_universe
+from score import score_full_company
+from buffett_score import buffett_metrics, buffett_overall
+from lynch import score_lynch_company
+from metrics import METRICS, as_float, records_from_breakdown
+from rules import load_strategy
+import tracing
+
+RESULT_COLUMNS = [
+    "ticker",
+    "financial_health",
+    "balance_sheet_score",
+    "income_statement_score",
+    "cash_flow_score",
+    "buffett",
+    "lynch",
+    "error",
+]
+
+# Raw value of every breakdown metric, added with metrics=True
+METRIC_COLUMNS = [f"{m.scorer}.{m.name}" for m in METRICS]
+
+# Bump when the scoring code changes results, so refresh.py rescores every ticker
+SCORING_VERSION = 1
+
+
+class BatchSummary(NamedTuple):
+    total: int
+    succeeded: int
+    failed: int
+    elapsed: float
+
+    @property
+    def tickers_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"Scored {self.succeeded}/{self.total} tickers ({self.failed} failed) "
+                f"in {self.elapsed:.2f}s - {self.tickers_per_second:.1f} tickers/s")
+
+
+# === PER-TICKER WORK ===
+def score_bundle(ticker, bundle, strategy=None, metrics=False):
+    """
+    Runs the three scorers on one ticker's statements and returns a result row.
+    With a rules.Strategy, its overall score is added under the strategy's name;
+    with metrics=True, every metric's raw value is added (METRIC_COLUMNS).
+    Scoring errors are captured in the row's 'error' field.
+    """
+    try:
+        fh_score, fh_breakdown = score_full_company(*bundle)
+        buffett_records = buffett_metrics(*bundle)
+        lynch_score, lynch_breakdown = score_lynch_company(*bundle)
+        if strategy is not None or metrics:
+            records = (records_from_breakdown("financial_health", fh_breakdown) + buffett_records
+                       + records_from_breakdown("lynch", lynch_breakdown))
+        if strategy is not None:
+            strategy_score, _ = strategy.score_records(records)
+    except Exception as e:
+        return _error_row(ticker, f"score: {type(e).__name__}: {e}")
+
+    row = {
+        "ticker": ticker,
+        "financial_health": float(fh_score),
+        "balance_sheet_score": float(fh_breakdown["Balance Sheet Score"]),
+        "income_statement_score": float(fh_breakdown["Income Statement Score"]),
+        "cash_flow_score": float(fh_breakdown["Cash Flow Score"]),
+        "buffett": float(buffett_overall(buffett_records)),
+        "lynch": float(lynch_score),
+        "error": None,
+    }
+    if strategy is not None:
+        row[strategy.name] = float(strategy_score)
+    if metrics:
+        row.update((METRIC_COLUMNS[r.metric_id], as_float(r.value)) for r in records)
+    return row
+
+def _error_row(ticker, message):
+    row = dict.fromkeys(RESULT_COLUMNS)
+    row.update(ticker=ticker, error=message)
+    return row
+
+def _fetch(ticker, num_quarters, backend, history, lean=False):
+    return fetch_statements(ticker, num_quarters=num_quarters, backend=backend, history=history, lean=lean)
+
+
+# === UNIVERSE RUN ===
+def score_universe(tickers, backend=None, num_quarters=8, fetch_workers=8,
+                   score_workers=None, progress=None, history=None, strategy=None, metrics=False, lean=False):
+    """
+    Fetches and scores every ticker.
+
+    Args:
+        tickers: iterable of ticker symbols
+        backend: data source passed to fetch_statements (default: Yahoo Finance)
+        num_quarters: quarters kept per statement
+        fetch_workers: size of the fetching thread pool
+        score_workers: size of the scoring process pool; 0 scores in this
+            process (default: one per CPU)
+        progress: optional callback(done, total, row) called per finished ticker
+        history: optional HistoryStore that accumulates every fetched quarter
+        strategy: optional rules.Strategy scored as an extra column
+        metrics: also return every metric's raw value (METRIC_COLUMNS)
+        lean: fetch lean statement frames (only the columns the scorers
+            read, float32), which are also cheaper to send to the workers
+
+    Returns:
+        (DataFrame with one row per ticker in RESULT_COLUMNS, BatchSummary)
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    total = len(tickers)
+    rows = []
+    start = time.perf_counter()
+
+    def finish(row):
+        rows.append(row)
+        if progress:
+            progress(len(rows), total, row)
+
+    score_pool = ProcessPoolExecutor(max_workers=score_workers) if score_workers != 0 else None
+    try:
+        fetch = tracing.bind(_fetch)    # record the fetch spans into an active trace
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+            fetches = {fetch_pool.submit(fetch, t, num_quarters, backend, history, lean): t for t in tickers}
+            scores = {}
+
+            for future in as_completed(fetches):
+                ticker = fetches[future]
+                try:
+                    bundle = future.result()
+                except Exception as e:
+                    finish(_error_row(ticker, f"fetch: {type(e).__name__}: {e}"))
+                    continue
+
+                if score_pool is None:
+                    finish(score_bundle(ticker, bundle, strategy, metrics))
+                else:
+                    scores[score_pool.submit(score_bundle, ticker, bundle, strategy, metrics)] = ticker
+
+            for future in as_completed(scores):
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    # Worker died or the bundle could not be sent to it
+                    finish(_error_row(scores[future], f"score: {type(e).__name__}: {e}"))
+    finally:
+        if score_pool is not None:
+            score_pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    columns = RESULT_COLUMNS[:-1] + ([strategy.name] if strategy is not None else []) \
+        + (METRIC_COLUMNS if metrics else []) + ["error"]
+    results = pd.DataFrame(rows, columns=columns)
+    results = results.set_index("ticker").reindex(tickers).reset_index()
+    failed = int(results["error"].notna().sum())
+    return results, BatchSummary(total, total - failed, failed, elapsed)
+
+
+def write_results(results, path):
+    """Writes the result table as Parquet or CSV depending on the file extension."""
+    if path.endswith(".parquet"):
+        results.to_parquet(path, index=False)
+    else:
+        results.to_csv(path, index=False)
+
+
+# === CLI ===
+def _print_progress(done, total, row):
+    status = "ERROR" if row["error"] else "ok"
+    print(f"\r[{done:>{len(str(total))}}/{total}] {row['ticker']:<8} {status:<5}",
+          end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+def _read_tickers(path):
+    with open(path) as f:
+        return [t for line in f for t in line.replace(",", " ").split()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a list of tickers in batch.")
+    parser.add_argument("tickers", nargs="?", help="file with ticker symbols (whitespace or comma separated)")
+    parser.add_argument("--out", default="scores.csv", help="result table (.csv or .parquet)")
+    parser.add_argument("--fixtures", help="read statements from a FixtureBackend directory")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="use N generated tickers (or synthetic data for the given tickers)")
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--score-workers", type=int, default=None,
+                        help="scoring processes, 0 to score in-process (default: one per CPU)")
+    parser.add_argument("--quiet", action="store_true", help="no per-ticker progress")
+    parser.add_argument("--history", metavar="DIR", help="also store every fetched quarter in a HistoryStore")
+    parser.add_argument("--strategy", metavar="FILE", help="YAML/JSON scoring strategy to add as a column")
+    parser.add_argument("--metrics", action="store_true",
+                        help="also write every metric's raw value (for screener.py)")
+    parser.add_argument("--lean", action="store_true",
+                        help="keep only the statement columns the scorers read, as float32")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a Chrome trace of the run (scoring spans need --score-workers 0)")
+    args = parser.parse_args(argv)
+
+    history = None
+    if args.history:
+        # pyarrow is only needed for --history; scoring workers never import it
+        from history_store import HistoryStore
+        history = HistoryStore(args.history)
+
+    backend = None
+    if args.fixtures:
+        backend = FixtureBackend(args.fixtures)
+    elif args.synthetic is not None:
+        backend = SyntheticBackend()
+
+    if args.tickers:
+        tickers = _read_tickers(args.tickers)
+    elif args.synthetic:
+        tickers = synthetic_universe(args.synthetic)
+    else:
+        parser.error("a ticker file or --synthetic N is required")
+
+    with tracing.trace("batch") if args.trace else contextlib.nullcontext() as trace:
+        results, summary = score_universe(
+            tickers,
+            backend=backend,
+            num_quarters=args.quarters,
+            fetch_workers=args.fetch_workers,
+            score_workers=args.score_workers,
+            progress=None if args.quiet else _print_progress,
+            history=history,
+            strategy=load_strategy(args.strategy) if args.strategy else None,
+            metrics=args.metrics,
+            lean=args.lean,
+        )
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    write_results(results, args.out)
+
+    print(summary, file=sys.stderr)
+    print(f"Results written to {args.out}", file=sys.stderr)
+    if trace is not None:
+        trace.save(args.trace)
+        print(f"Trace ({len(trace.spans)} spans) written to {args.trace}", file=sys.stderr)
+    return 0 if summary.failed < summary.total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Startup cost of importing the scorers, measured with `python -X importtime`.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --statement "import batch" --budget 1.0 --allow pandas pyarrow
+
+Runs the import statement in fresh interpreters and takes the fastest run.
+Fails (exit code 1) if it takes longer than --budget seconds or loads any of
+the heavy optional packages that only plotting, fetching or GPT calls need.
+Other entry points are timed for reference.
+"""
+import argparse
+import subprocess
+import sys
+
+DEFAULT_STATEMENT = "import score, buffett_score, lynch"
+DEFAULT_BUDGET = 0.5   # seconds
+HEAVY = ("pandas", "matplotlib", "yfinance", "openai", "streamlit", "pyarrow", "dotenv", "aiohttp")
+REFERENCE = ["import data_fetcher", "import batch", "import gpt_summary", "import visualize"]
+
+
+def import_profile(statement):
+    """
+    Runs `statement` under -X importtime in a fresh interpreter.
+    Returns ({module: (self_us, cumulative_us)}, total seconds).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    modules, total = {}, 0
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(fields) != 3 or not fields[0].strip().isdigit():   # header or unrelated output
+            continue
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2][1:]
+        modules[name.strip()] = (self_us, cumulative_us)
+        if not name.startswith(" "):   # top-level import: its cumulative time covers the nested ones
+            total += cumulative_us
+    return modules, total / 1e6
+
+
+def best_profile(statement, repeat):
+    runs = [import_profile(statement) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--statement", default=DEFAULT_STATEMENT)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--allow", nargs="*", default=[], metavar="PACKAGE",
+                        help="heavy packages the statement may load")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    modules, total = best_profile(args.statement, args.repeat)
+    heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY) - set(args.allow))
+
+    print(f"{args.statement}: {total:.3f}s (budget {args.budget:.3f}s), {len(modules)} modules")
+    for name, (self_us, _) in sorted(modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"    {self_us / 1e3:8.1f} ms  {name}")
+    for statement in REFERENCE:
+        print(f"{statement:<25}: {best_profile(statement, 1)[1]:.3f}s (reference)")
+
+    failures = []
+    if total > args.budget:
+        failures.append(f"took {total:.3f}s, over the {args.budget:.3f}s budget")
+    if heavy:
+        failures.append(f"loads {', '.join(heavy)}")
+    if failures:
+        print(f"FAIL: {args.statement!r} " + "; ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Memory held by prepared statement frames, full vs lean.
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --tickers 2000 --extra-columns 80
+
+Prepares the same synthetic raw statements (padded with --extra-columns
+filler line items per statement, like real Yahoo frames) both ways and
+reports, per ticker: the bytes held by the frames (deep), the bytes
+allocated while preparing them (tracemalloc peak), the pickled size sent
+to scoring workers, and the preparation time. Then scores both sets and
+fails (exit code 1) if any metric value or score differs by more than
+--rtol. Differences of nearly equal amounts (growth rates, owner earnings
+close to zero) lose their relative precision with float32 inputs, so
+currency, percent and score values also get a small absolute tolerance
+(ATOL): float32 holds billions to within ~$100.
+"""
+import argparse
+import pickle
+import sys
+import tracemalloc
+
+import numpy as np
+
+from data_fetcher import StatementBundle, prepare_statement
+from fetch_backend import STATEMENT_ATTRS, STATEMENTS, SyntheticBackend, synthetic_universe
+from metrics import CURRENCY, METRICS, PERCENT, PERCENT_POINTS, MetricBatch
+
+from benchmarks.harness import format_seconds, measure
+
+
+# Absolute tolerances on top of --rtol: dollars, percentage points, ratios, 0-10 scores
+ATOL = {CURRENCY: 1e3, PERCENT_POINTS: 1e-4, PERCENT: 1e-6, "score": 1e-4}
+
+
+def raw_statements(tickers, quarters, extra_columns):
+    backend = SyntheticBackend(num_quarters=quarters + 4, extra_columns=extra_columns)
+    raws = {}
+    for ticker in tickers:
+        stock = backend.ticker(ticker)
+        raws[ticker] = [getattr(stock, STATEMENT_ATTRS[s]) for s in STATEMENTS]
+    return raws
+
+
+def prepare_all(raws, quarters, lean):
+    return {ticker: StatementBundle(*(prepare_statement(s, raw, quarters, lean) for s, raw in zip(STATEMENTS, statements)))
+            for ticker, statements in raws.items()}
+
+
+def frame_bytes(bundles):
+    return sum(int(df.memory_usage(deep=True).sum()) for bundle in bundles.values() for df in bundle if df is not None)
+
+
+def traced_peak(fn):
+    """(result, bytes allocated at the peak while running fn)."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def differences(full, lean, rtol):
+    """Metric names (or 'overall') whose values or scores differ beyond rtol, with counts."""
+    a, b = MetricBatch.from_bundles(full), MetricBatch.from_bundles(lean)
+    bad = {}
+    for field in ("value", "score"):
+        for m in METRICS:
+            atol = ATOL["score"] if field == "score" else ATOL.get(m.kind, 0)
+            close = np.isclose(a.array[field][:, m.id], b.array[field][:, m.id], rtol=rtol, atol=atol, equal_nan=True)
+            n = int((~close).sum())
+            if n:
+                bad[f"{m.scorer}.{m.name} ({field})"] = n
+    for scorer in a.overall.dtype.names:
+        close = np.isclose(a.overall[scorer], b.overall[scorer], rtol=rtol, atol=ATOL["score"], equal_nan=True)
+        n = int((~close).sum())
+        if n:
+            bad[f"{scorer} overall"] = n
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--extra-columns", type=int, default=60, help="filler line items per statement")
+    parser.add_argument("--rtol", type=float, default=1e-5, help="allowed relative difference of results")
+    args = parser.parse_args(argv)
+
+    tickers = synthetic_universe(args.tickers)
+    raws = raw_statements(tickers, args.quarters, args.extra_columns)
+    sample = dict(list(raws.items())[:20])
+
+    results = {}
+    for mode, lean in (("full", False), ("lean", True)):
+        bundles, peak = traced_peak(lambda: prepare_all(raws, args.quarters, lean))
+        timing = measure(lambda: prepare_all(sample, args.quarters, lean), repeat=5)
+        results[mode] = bundles
+        n = len(bundles)
+        print(f"{mode:<5} {frame_bytes(bundles) / n:>9,.0f} B/ticker held  "
+              f"{peak / n:>9,.0f} B/ticker peak allocated  "
+              f"{len(pickle.dumps(bundles)) / n:>9,.0f} B/ticker pickled  "
+              f"prepare {format_seconds(timing['median'] / len(sample))}/ticker")
+
+    full, lean = results["full"], results["lean"]
+    print(f"Lean frames hold {frame_bytes(full) / frame_bytes(lean):.1f}x less "
+          f"({frame_bytes(full) - frame_bytes(lean):,} bytes for {len(full)} tickers)")
+
+    bad = differences(full, lean, args.rtol)
+    if bad:
+        print(f"FAIL: results differ beyond rtol={args.rtol}: "
+              + "; ".join(f"{name}: {n} tickers" for name, n in bad.items()))
+        return 1
+    print(f"OK: all metric values, scores and overall scores agree within rtol={args.rtol} (atol {ATOL})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
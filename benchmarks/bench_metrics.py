@@ -0,0 +1,91 @@
+"""
+Nested breakdown dicts vs MetricBatch for a synthetic universe.
+
+    python -m benchmarks.bench_metrics --tickers 5000
+
+Scores every ticker both ways and reports the time taken and the memory
+held by the results (deep object size), after checking that both hold
+the same scores.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from buffett_score import score_buffett_company
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+from lynch import score_lynch_company
+from metrics import METRICS, MetricBatch
+from score import score_full_company
+
+
+def score_to_dicts(bundles):
+    return {
+        ticker: (score_full_company(*bundle), score_buffett_company(*bundle), score_lynch_company(*bundle))
+        for ticker, bundle in bundles.items()
+    }
+
+
+def deep_size(obj, seen=None):
+    """Bytes held by obj and everything it references (containers, strings, numbers)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) if obj.base is None else sys.getsizeof(obj) + obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def check_same(dicts, batch):
+    fh = np.array([d[0][0] for d in dicts.values()])
+    buffett = np.array([d[1][0] for d in dicts.values()])
+    lynch = np.array([d[2][0] for d in dicts.values()])
+    assert np.allclose(fh, batch.overall["financial_health"], equal_nan=True)
+    assert np.allclose(buffett, batch.overall["buffett"], equal_nan=True)
+    assert np.allclose(lynch, batch.overall["lynch"], equal_nan=True)
+    assert np.isfinite(batch.array["score"]).all() and batch.array.shape[1] == len(METRICS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    backend = SyntheticBackend()
+    bundles = {t: fetch_statements(t, backend=backend, cache=None) for t in synthetic_universe(args.tickers)}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score_to_dicts(bundles)  # warm up, so lazily built pandas state is not counted
+        dicts, dict_time = timed(score_to_dicts, bundles)
+        batch, batch_time = timed(MetricBatch.from_bundles, bundles)
+    check_same(dicts, batch)
+    # Ticker strings are shared by both results, so count them for neither
+    shared = sum(sys.getsizeof(t) for t in bundles)
+    dict_bytes = deep_size(dicts) - shared
+    batch_bytes = deep_size(batch) - shared
+
+    n = len(bundles)
+    print(f"{n} tickers x {len(METRICS)} metrics; overall scores identical.")
+    print(f"breakdown dicts : {dict_time:6.2f}s  {dict_bytes / 2**20:8.2f} MiB ({dict_bytes / n:,.0f} B/ticker)")
+    print(f"MetricBatch     : {batch_time:6.2f}s  {batch_bytes / 2**20:8.2f} MiB ({batch_bytes / n:,.0f} B/ticker)")
+    print(f"                  {dict_bytes / batch_bytes:.1f}x less memory, {dict_time / batch_time:.2f}x time")
+
+
+if __name__ == "__main__":
+    main()
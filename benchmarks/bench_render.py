@@ -0,0 +1,83 @@
+"""
+Trend chart rendering: visualize.plot_trend per chart vs the pooled
+figures of render_batch, in-process and on a process pool.
+
+    python -m benchmarks.bench_render --charts 300
+
+Reports charts per second and the peak RSS of each run. Each variant runs
+in its own process so the RSS numbers do not include the others.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+
+from fetch_backend import SyntheticBackend, synthetic_universe
+from data_fetcher import fetch_statements
+from render_batch import chart_jobs, peak_rss_mb, render_charts
+
+COLUMNS = ["Total Revenue", "Net Income", "Free Cash Flow"]
+
+
+def build_jobs(charts, out_dir, fmt):
+    backend = SyntheticBackend()
+    tickers = synthetic_universe(-(-charts // len(COLUMNS)))
+    bundles = {t: fetch_statements(t, backend=backend, cache=None) for t in tickers}
+    jobs, _ = chart_jobs(bundles, COLUMNS, out_dir, fmt)
+    return jobs[:charts]
+
+
+def run_plot_trend(jobs, fmt, workers):
+    import pandas as pd
+    from visualize import plot_trend
+
+    start = time.perf_counter()
+    for ticker, column, dates, values, path in jobs:
+        df = pd.DataFrame({"Date": dates, column: values})
+        plot_trend(df, column, f"{ticker} - {column}", save_path=path)
+    return time.perf_counter() - start, peak_rss_mb(), None
+
+def run_pooled(jobs, fmt, workers):
+    start = time.perf_counter()
+    rows, worker_rss = render_charts(jobs, fmt, workers=workers)
+    assert all(error is None for *_, error in rows)
+    return time.perf_counter() - start, peak_rss_mb(), worker_rss
+
+
+def _variant(name, charts, fmt, workers):
+    import contextlib
+    with tempfile.TemporaryDirectory() as out_dir:
+        jobs = build_jobs(charts, out_dir, fmt)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return VARIANTS[name](jobs, fmt, workers)
+
+VARIANTS = {
+    "plot_trend (new pyplot figure per chart)": run_plot_trend,
+    "render_batch, in-process": run_pooled,
+    "render_batch, process pool": run_pooled,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--charts", type=int, default=300)
+    parser.add_argument("--format", choices=("png", "svg"), default="png")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for the pool run")
+    args = parser.parse_args(argv)
+
+    for name in VARIANTS:
+        workers = 0 if "in-process" in name or "plot_trend" in name else args.workers
+        # A fresh process per variant keeps each peak RSS separate
+        with ProcessPoolExecutor(max_workers=1) as runner:
+            elapsed, rss, worker_rss = runner.submit(_variant, name, args.charts, args.format, workers).result()
+        rss_text = f"{rss:.0f} MB" + (f" (workers {worker_rss:.0f} MB)" if worker_rss else "")
+        print(f"{name:<42}: {elapsed:6.2f}s  {args.charts / elapsed:6.1f} charts/s  peak RSS {rss_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Screener query latency on a large universe.
+
+    python -m benchmarks.bench_screener
+    python -m benchmarks.bench_screener --tickers 50000 --budget 0.02
+
+Scores --seed-tickers synthetic tickers for real, then tiles their metric
+rows (with random jitter) up to --tickers rows. Times building the column
+indexes and a set of representative queries, and compares the first one
+with the same filter and sort done in pandas. Fails (exit code 1) if a query's
+median exceeds --budget seconds.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+from metrics import MetricBatch
+from screener import Screener
+
+from benchmarks.harness import format_seconds, measure
+
+QUERIES = {
+    "quality": "ROIC > 5% and buffett.Debt_to_Equity < 1.5 and lynch.EPS_Growth > 20% "
+               "order by financial_health desc limit 20",
+    "single range": "financial_health >= 5 and financial_health < 6 limit 50",
+    "or / not": "(buffett >= 7 or lynch >= 6) and not financial_health.Gross_Margin < 0.5 "
+                "order by buffett limit 20",
+    "top-k only": "order by lynch.Net_Cash_Position desc limit 10",
+    "multi-key sort": "buffett > 4 order by lynch desc, buffett desc limit 100",
+}
+
+
+def build_universe(tickers, seed_tickers, seed=0):
+    """A MetricBatch of `tickers` rows tiled from really scored seed tickers."""
+    backend = SyntheticBackend()
+    start = time.perf_counter()
+    seed_batch = MetricBatch.from_bundles({t: fetch_statements(t, backend=backend, cache=None)
+                                           for t in synthetic_universe(seed_tickers)})
+    per_ticker = (time.perf_counter() - start) / seed_tickers
+
+    rng = np.random.default_rng(seed)
+    rows = np.arange(tickers) % seed_tickers
+    batch = MetricBatch([f"T{i:06d}" for i in range(tickers)])
+    jitter = rng.normal(1.0, 0.1, size=batch.array.shape)
+    batch.array["value"] = seed_batch.array["value"][rows] * jitter
+    batch.array["score"] = seed_batch.array["score"][rows]
+    for scorer in batch.overall.dtype.names:
+        batch.overall[scorer] = np.clip(seed_batch.overall[scorer][rows] * rng.normal(1.0, 0.1, tickers), 0, 10)
+    return batch, per_ticker
+
+
+def pandas_query(frame):
+    """The "quality" query in plain pandas, for reference."""
+    selected = frame[(frame["buffett.ROIC"] > 0.05) & (frame["buffett.Debt-to-Equity"] < 1.5)
+                     & (frame["lynch.EPS Growth %"] > 20)]
+    return selected.sort_values("financial_health", ascending=False).head(20)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickers", type=int, default=10_000)
+    parser.add_argument("--seed-tickers", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=0.01, help="seconds per query (median)")
+    args = parser.parse_args(argv)
+
+    batch, per_ticker = build_universe(args.tickers, args.seed_tickers)
+    start = time.perf_counter()
+    screener = Screener.from_batch(batch)
+    build = time.perf_counter() - start
+    print(f"{len(screener)} tickers, {len(screener.columns)} columns, {screener.nbytes / 2 ** 20:.1f} MiB "
+          f"with indexes, built in {format_seconds(build).strip()}")
+    print(f"Rescoring instead: ~{per_ticker * args.tickers:.1f}s for {args.tickers} tickers "
+          f"({format_seconds(per_ticker).strip()} per ticker)")
+
+    failures = []
+    for name, query in QUERIES.items():
+        result = screener.query(query)
+        timing = measure(lambda: screener.query(query))
+        print(f"{name:<15} median {format_seconds(timing['median'])}  min {format_seconds(timing['min'])}"
+              f"  {result.matched:>6} matched")
+        if timing["median"] > args.budget:
+            failures.append(f"{name} took {format_seconds(timing['median']).strip()}")
+
+    frame = pd.DataFrame(screener.columns, index=screener.tickers)
+    reference = measure(lambda: pandas_query(frame))
+    print(f"{'pandas quality':<15} median {format_seconds(reference['median'])}  (same filter and sort on a DataFrame)")
+
+    if failures:
+        print(f"FAIL: over the {args.budget}s budget: " + "; ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
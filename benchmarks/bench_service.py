@@ -0,0 +1,129 @@
+"""
+Load generator for the scoring service.
+
+    python -m benchmarks.bench_service --requests 2000 --concurrency 32
+    python -m benchmarks.bench_service --url http://127.0.0.1:8080 --batch-size 25
+
+Without --url, a service is started in this process on synthetic (fake)
+data with an in-memory statement cache. Requests pick tickers from a
+universe of --tickers symbols, so repeated tickers exercise the shared
+cache; --payload-share of them post raw statements instead of a ticker.
+Reports throughput, client-side latency percentiles, status codes and the
+server's per-stage latency from /metrics.
+"""
+import argparse
+import asyncio
+import contextlib
+import random
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from async_fetcher import raw_to_payload
+from fetch_backend import STATEMENT_ATTRS, SyntheticBackend, synthetic_universe
+
+
+def payload_bodies(count, seed=0):
+    """Raw statement payloads for POST /score, generated once up front."""
+    backend = SyntheticBackend(seed=seed + 1)
+    bodies = []
+    for ticker in synthetic_universe(count, prefix="PAY"):
+        stock = backend.ticker(ticker)
+        bodies.append({"ticker": ticker, "statements": {
+            statement: raw_to_payload(getattr(stock, attr)) for statement, attr in STATEMENT_ATTRS.items()
+        }})
+    return bodies
+
+
+async def run_load(url, requests, concurrency, tickers, batch_size, payload_share, seed=0):
+    import aiohttp
+
+    rng = random.Random(seed)
+    universe = synthetic_universe(tickers)
+    payloads = payload_bodies(8) if payload_share else []
+    latencies, statuses = [], Counter()
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    def next_request():
+        if batch_size:
+            items = [{"ticker": rng.choice(universe)} for _ in range(batch_size)]
+            return "POST", f"{url}/score/batch", {"items": items}
+        if payload_share and rng.random() < payload_share:
+            return "POST", f"{url}/score", rng.choice(payloads)
+        return "GET", f"{url}/score/{rng.choice(universe)}", None
+
+    async def client(session):
+        while not queue.empty():
+            queue.get_nowait()
+            method, target, body = next_request()
+            start = time.perf_counter()
+            try:
+                async with session.request(method, target, json=body) as resp:
+                    await resp.read()
+                    statuses[resp.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        async with session.get(f"{url}/metrics") as resp:
+            metrics = await resp.text()
+    return np.array(latencies), statuses, elapsed, metrics
+
+
+def stage_means(metrics):
+    """Mean seconds per stage from the scoring_stage_duration_seconds histogram."""
+    sums = dict(re.findall(r'scoring_stage_duration_seconds_sum\{stage="(\w+)"\} ([\d.e+-]+)', metrics))
+    counts = dict(re.findall(r'scoring_stage_duration_seconds_count\{stage="(\w+)"\} (\d+)', metrics))
+    return {stage: (float(sums[stage]) / int(counts[stage]), int(counts[stage])) for stage in sums if int(counts[stage])}
+
+
+async def main_async(args):
+    if args.url:
+        target = contextlib.nullcontext(args.url.rstrip("/"))
+    else:
+        from service import ScoringService, running_service
+        from statement_cache import StatementCache
+
+        service = ScoringService(SyntheticBackend(), cache=StatementCache(":memory:"), workers=args.workers)
+        target = running_service(service)
+
+    async with target as url:
+        latencies, statuses, elapsed, metrics = await run_load(
+            url, args.requests, args.concurrency, args.tickers, args.batch_size, args.payload_share)
+
+    items = args.requests * (args.batch_size or 1)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"{args.requests} requests ({items} scored items) in {elapsed:.2f}s: "
+          f"{args.requests / elapsed:.1f} req/s, {items / elapsed:.1f} items/s")
+    print(f"Latency p50 {p50:.1f} ms  p95 {p95:.1f} ms  p99 {p99:.1f} ms  max {latencies.max() * 1000:.1f} ms")
+    print("Status: " + ", ".join(f"{status}: {n}" for status, n in sorted(statuses.items(), key=str)))
+    for stage, (mean, count) in stage_means(metrics).items():
+        print(f"Server {stage:<5}: {count} calls, mean {mean * 1000:.2f} ms")
+    return 0 if set(statuses) <= {200} else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="running service to load (default: start one on synthetic data)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tickers", type=int, default=200, help="size of the ticker universe")
+    parser.add_argument("--batch-size", type=int, default=0, help="send /score/batch requests of N items")
+    parser.add_argument("--payload-share", type=float, default=0.1,
+                        help="fraction of single requests that post raw statements")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes of the local service")
+    args = parser.parse_args(argv)
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""
+Overhead of the tracing instrumentation on the fetch and scoring paths.
+
+    python -m benchmarks.bench_tracing
+    python -m benchmarks.bench_tracing --quarters 40 --tolerance 0.03
+
+Times each decorated function three ways on synthetic statements: the
+undecorated function (`__wrapped__`), the decorated one with no trace
+active, and the decorated one inside a trace. The tracing-off overhead is
+the cost of a decorated no-op times the spans a call opens; the script
+fails (exit code 1) if it exceeds --tolerance of the undecorated time.
+"""
+import argparse
+import sys
+
+from buffett_score import score_buffett_company
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend
+from lynch import score_lynch_company
+from score import score_full_company
+import tracing
+
+from benchmarks.harness import format_seconds, measure
+
+
+def build_cases(quarters):
+    """{name: (decorated fn, args)} on one synthetic bundle."""
+    backend = SyntheticBackend(num_quarters=quarters)
+    bundle = fetch_statements("BENCH", num_quarters=quarters, backend=backend, cache=None)
+    return {
+        "fetch_statements": (fetch_statements, ("BENCH", quarters, backend, None)),
+        "score_full_company": (score_full_company, tuple(bundle)),
+        "score_buffett_company": (score_buffett_company, tuple(bundle)),
+        "score_lynch_company": (score_lynch_company, tuple(bundle)),
+    }
+
+
+def wrapper_cost(repeat):
+    """Seconds a decorated call costs over a plain one with no trace active."""
+    def noop():
+        return None
+    decorated = tracing.traced()(noop)
+    plain = measure(noop, repeat=repeat)["min"]
+    return max(measure(decorated, repeat=repeat)["min"] - plain, 0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="allowed slowdown with tracing off")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    cost = wrapper_cost(args.repeat)
+    print(f"Decorated call with tracing off: +{format_seconds(cost).strip()} per span")
+    print(f"{'function':<24}{'undecorated':>13}{'tracing off':>13}{'tracing on':>13}{'spans':>7}{'overhead off':>14}")
+    failures = []
+    for name, (fn, fn_args) in build_cases(args.quarters).items():
+        plain = measure(lambda: fn.__wrapped__(*fn_args), repeat=args.repeat)["min"]
+        off = measure(lambda: fn(*fn_args), repeat=args.repeat)["min"]
+        with tracing.trace("bench") as trace:
+            on = measure(lambda: fn(*fn_args), repeat=args.repeat)["min"]
+        with tracing.trace("count") as single:
+            fn(*fn_args)
+        # Whole-call timings are too noisy to resolve a few hundred ns, so the
+        # off overhead is estimated from the spans a call would open
+        overhead = len(single.spans) * cost / plain
+        print(f"{name:<24}{format_seconds(plain):>13}{format_seconds(off):>13}{format_seconds(on):>13}"
+              f"{len(single.spans):>7}{overhead:>13.3%}")
+        if overhead > args.tolerance:
+            failures.append(f"{name}: tracing off adds {overhead:.2%}")
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Scalar vs vectorized Financial Health scoring on a synthetic universe.
+
+    python -m benchmarks.bench_vector_score --tickers 10000
+
+Verifies that vector_score.score_full_universe matches score_full_company
+for every ticker before reporting timings.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+from score import score_full_company
+from vector_score import stack_statements, score_full_universe
+
+SECTIONS = ["Balance Sheet Breakdown", "Income Statement Breakdown", "Cash Flow Breakdown"]
+
+
+def build_universe(size, num_quarters=8):
+    """
+    Prepared statements for `size` synthetic tickers. Some tickers get edge
+    cases (missing columns, one quarter, zero revenue, NaNs) so every
+    branch of the scalar scorer is exercised.
+    """
+    backend = SyntheticBackend(num_quarters=num_quarters)
+    bundles = {}
+    for i, ticker in enumerate(synthetic_universe(size)):
+        bs, is_, cf = fetch_statements(ticker, num_quarters=num_quarters, backend=backend, cache=None)
+
+        case = i % 10
+        if case == 1:
+            bs = bs.drop(columns=["Current_Ratio", "Debt_to_Equity"])
+        elif case == 2:
+            is_ = is_.tail(1)
+        elif case == 3:
+            is_ = is_.drop(columns=["Gross Profit"])
+            is_.loc[is_.index[-1], "Total Revenue"] = 0.0
+        elif case == 4:
+            bs.loc[bs.index[-1], "Cash_to_Assets"] = np.nan
+            cf = None
+        bundles[ticker] = (bs, is_, cf)
+    return bundles
+
+
+def _same(scalar, vector):
+    if scalar is None or (isinstance(scalar, float) and math.isnan(scalar)):
+        return math.isnan(vector)
+    return scalar == vector or (math.isnan(scalar) and math.isnan(vector))
+
+
+def check_identical(bundles, result):
+    mismatches = []
+    for ticker, bundle in bundles.items():
+        overall, breakdown = score_full_company(*bundle)
+        row = result.loc[ticker]
+        expected = {"Financial Health": overall}
+        for section in ("Balance Sheet Score", "Income Statement Score", "Cash Flow Score"):
+            expected[section] = breakdown[section]
+        for section in SECTIONS:
+            for name, metric in breakdown[section].items():
+                expected[name] = metric["value"]
+                expected[f"{name} Score"] = metric["score"]
+        mismatches += [(ticker, k) for k, v in expected.items() if not _same(v, row[k])]
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tickers", type=int, default=10000)
+    parser.add_argument("--quarters", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    bundles = build_universe(args.tickers, args.quarters)
+    print(f"Built {len(bundles)} synthetic tickers in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for bundle in bundles.values():
+            score_full_company(*bundle)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stacked = [stack_statements({t: b[i] for t, b in bundles.items()}) for i in range(3)]
+    stacking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = score_full_universe(*stacked, tickers=list(bundles))
+    vector = time.perf_counter() - start
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mismatches = check_identical(bundles, result)
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} mismatches, e.g. {mismatches[:5]}")
+
+    print(f"score_full_company loop : {scalar:8.3f}s")
+    print(f"stack_statements        : {stacking:8.3f}s")
+    print(f"score_full_universe     : {vector:8.3f}s  ({scalar / vector:.0f}x faster than the loop)")
+    print("Results identical for every ticker.")
+
+
+if __name__ == "__main__":
+    main()
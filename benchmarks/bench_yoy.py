@@ -0,0 +1,56 @@
+"""
+Per-column vs vectorized vs incremental YoY computation on wide statements.
+
+    python -m benchmarks.bench_yoy --quarters 40 --extra-columns 80
+
+The per-column baseline is the previous add_all_yoy loop over
+compute_yoy_change. All three paths are checked to give the same frame
+before timings are reported.
+"""
+import argparse
+
+import pandas as pd
+
+from analysis import add_all_yoy, append_quarter_yoy, compute_yoy_change
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend
+
+from benchmarks.harness import format_seconds, measure
+
+
+def add_all_yoy_per_column(df):
+    for col in df.columns:
+        if col != "Date" and df[col].dtype != "object":
+            df = compute_yoy_change(df, col)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quarters", type=int, default=40)
+    parser.add_argument("--extra-columns", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    backend = SyntheticBackend(num_quarters=args.quarters, extra_columns=args.extra_columns)
+    frame = fetch_statements("BENCH", num_quarters=args.quarters, backend=backend, cache=None).income_statement
+    history = add_all_yoy(frame.iloc[:-1].reset_index(drop=True))
+    latest = frame.iloc[-1]
+
+    expected = add_all_yoy_per_column(frame.copy())
+    pd.testing.assert_frame_equal(add_all_yoy(frame.copy()), expected)
+    pd.testing.assert_frame_equal(append_quarter_yoy(history, latest), expected)
+    print(f"{frame.shape[1] - 1} numeric columns x {len(frame)} quarters; results identical.")
+
+    timings = {
+        "per-column loop": measure(add_all_yoy_per_column, setup=lambda: (frame.copy(),), repeat=args.repeat),
+        "vectorized": measure(add_all_yoy, setup=lambda: (frame.copy(),), repeat=args.repeat),
+        "append one quarter": measure(lambda: append_quarter_yoy(history, latest), repeat=args.repeat),
+    }
+    baseline = timings["per-column loop"]["median"]
+    for name, stats in timings.items():
+        print(f"{name:<20} {format_seconds(stats['median'])}  ({baseline / stats['median']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Minimal asv-style timing harness shared by the benchmark scripts.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+
+def measure(fn, setup=None, repeat=7, number=None, min_time=0.2):
+    """
+    Times fn over `repeat` rounds of `number` calls each and returns per-call
+    statistics in seconds. When `setup` is given, each call gets fresh
+    arguments from setup(), created outside the timed region. `number` is
+    picked automatically so a round takes at least `min_time` seconds.
+    """
+    make_args = setup or (lambda: ())
+
+    def run_round(n):
+        args = [make_args() for _ in range(n)]
+        start = time.perf_counter()
+        for a in args:
+            fn(*a)
+        return time.perf_counter() - start
+
+    if number is None:
+        number = 1
+        while True:
+            elapsed = run_round(number)
+            if elapsed >= min_time or number >= 10 ** 6:
+                break
+            number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    rounds = [run_round(number) / number for _ in range(repeat)]
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def environment():
+    """Interpreter, library versions and git revision the results were taken on."""
+    import numpy
+    import pandas
+
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    try:
+        import matplotlib
+        info["matplotlib"] = matplotlib.__version__
+    except ImportError:
+        pass
+    try:
+        info["git_revision"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def write_results(path, params, results):
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "params": params, "benchmarks": results}, f, indent=2)
+
+
+def compare(baseline_path, results, threshold=1.2):
+    """
+    Prints median ratios against a previous results file and returns the
+    names of benchmarks that got slower than `threshold` times the baseline.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["benchmarks"]
+
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  <-- regression"
+            regressions.append(name)
+        print(f"{name:<28} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
@@ -0,0 +1,117 @@
+"""
+Offline benchmark suite for the fetch, prepare, score and render paths.
+
+    python -m benchmarks.run --out bench_results.json
+    python -m benchmarks.run --quarters 40 --extra-columns 80 --only score
+    python -m benchmarks.run --compare bench_results.json
+
+Statements come from SyntheticBackend, so no network is needed. Results
+(per-call seconds plus environment and parameters) are written as JSON;
+--compare prints the ratio to an earlier results file and exits non-zero
+if any benchmark regressed past --threshold.
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from analysis import add_all_yoy
+from buffett_score import score_buffett_company
+from data_fetcher import _prepare_df, fetch_statements
+from fetch_backend import SyntheticBackend
+from lynch import score_lynch_company
+from score import score_full_company
+from utils import format_metric
+from visualize import plot_scores_figure, plot_trend
+
+from benchmarks.harness import compare, format_seconds, measure, write_results
+
+FORMAT_VALUES = [1234.5, 0.1834, 2.5e9, -7.1e6, 512.0, None, float("nan")]
+
+
+def build_suite(quarters, extra_columns):
+    """Returns {name: (fn, setup)} for every benchmark on fixtures of the given size."""
+    backend = SyntheticBackend(num_quarters=quarters, extra_columns=extra_columns)
+    raw_balance_sheet = backend.ticker("BENCH").quarterly_balance_sheet
+    bundle = fetch_statements("BENCH", num_quarters=quarters, backend=backend, cache=None)
+    bs_df, is_df, cf_df = bundle
+    scores = {"Financial Health": 6.2, "Buffett": 7.4, "Lynch": 5.1}
+
+    def render(fn):
+        def run(*args):
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn(*args)
+            plt.close("all")
+        return run
+
+    return {
+        "fetch.fetch_statements": (
+            lambda: fetch_statements("BENCH", num_quarters=quarters, backend=backend, cache=None),
+            None,
+        ),
+        "prepare._prepare_df": (
+            lambda df: _prepare_df("balance_sheet", df, quarters),
+            lambda: (raw_balance_sheet.copy(),),
+        ),
+        "analysis.add_all_yoy": (
+            add_all_yoy,
+            lambda: (is_df.copy(),),
+        ),
+        "score.score_full_company": (lambda: score_full_company(bs_df, is_df, cf_df), None),
+        "score.score_buffett_company": (lambda: score_buffett_company(bs_df, is_df, cf_df), None),
+        "score.score_lynch_company": (lambda: score_lynch_company(bs_df, is_df, cf_df), None),
+        "utils.format_metric": (
+            lambda: [format_metric(v, is_currency=True) for v in FORMAT_VALUES]
+            + [format_metric(v, is_percentage=True) for v in FORMAT_VALUES],
+            None,
+        ),
+        "render.plot_trend": (
+            render(lambda: plot_trend(is_df, "Total Revenue", "Revenue", save_path=io.BytesIO())),
+            None,
+        ),
+        "render.plot_scores": (
+            render(lambda: plot_scores_figure("Scores", scores).savefig(io.BytesIO(), format="png")),
+            None,
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--quarters", type=int, default=8, help="quarters per synthetic statement")
+    parser.add_argument("--extra-columns", type=int, default=60,
+                        help="filler line items per statement (Yahoo frames have dozens)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--only", help="run benchmarks whose name contains this text")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    suite = build_suite(args.quarters, args.extra_columns)
+    results = {}
+    for name, (fn, setup) in suite.items():
+        if args.only and args.only not in name:
+            continue
+        stats = measure(fn, setup=setup, repeat=args.repeat)
+        results[name] = stats
+        print(f"{name:<28} median {format_seconds(stats['median'])}  min {format_seconds(stats['min'])}")
+
+    params = {"quarters": args.quarters, "extra_columns": args.extra_columns, "repeat": args.repeat}
+    write_results(args.out, params, results)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,111 +1,309 @@
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
 import pandas as pd
 
+from fetch_backend import STATEMENT_ATTRS, STATEMENTS, YFinanceBackend
+from schema import canonicalize, resolve_columns
+from statement_cache import get_default_cache
+from tracing import annotate, bind, frame_rows, span, traced
+
+
+class StatementBundle(NamedTuple):
+    """
+    Prepared quarterly statements for one ticker. Unpacks in the argument
+    order of the scorers: score_full_company(*bundle).
+    """
+    balance_sheet: Optional[pd.DataFrame]
+    income_statement: Optional[pd.DataFrame]
+    cash_flow: Optional[pd.DataFrame]
+
+
+# Line items the scorers (score.py, buffett_score.py, lynch.py) read, and the
+# inputs of the derived columns added below. analysis.py works on whatever
+# numeric columns a frame has. Lean frames keep only these, as float32.
+LEAN_COLUMNS = {
+    "balance_sheet": [
+        "Total Assets", "Current Assets", "Current Liabilities", "Total Liabilities Net Minority Interest",
+        "Total Equity Gross Minority Interest", "Stockholders Equity", "Cash And Cash Equivalents",
+    ],
+    "income_statement": [
+        "Total Revenue", "Gross Profit", "Net Income", "Basic Average Shares", "Reconciled Depreciation",
+    ],
+    "cash_flow": [
+        "Operating Cash Flow", "Capital Expenditure", "Free Cash Flow", "Depreciation And Amortization",
+    ],
+}
+DERIVED_COLUMNS = {
+    "balance_sheet": ["Debt_to_Equity", "Current_Ratio", "Cash_to_Assets"],
+    "income_statement": [],
+    "cash_flow": ["Free Cash Flow"],
+}
+LEAN_RTOL = 1e-6    # a column is stored as float32 only if every value round-trips within this
+
+_default_backend = None
+_DEFAULT_CACHE = object()
+
+def get_default_backend():
+    """Returns the backend used when none is passed (Yahoo Finance unless overridden)."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = YFinanceBackend()
+    return _default_backend
+
+def set_default_backend(backend):
+    """Swaps the data source for every fetch, e.g. a FixtureBackend for offline runs."""
+    global _default_backend
+    _default_backend = backend
+
+def _resolve_cache(cache, backend):
+    # The shared on-disk cache only fronts the default backend; explicit
+    # backends (fixtures, fakes) are uncached unless a cache is passed in.
+    if cache is _DEFAULT_CACHE:
+        return get_default_cache() if backend is None else None
+    return cache
+
+def _cache_key(statement, lean):
+    # Lean frames are cached apart from the full ones
+    return f"{statement}:lean" if lean else statement
+
+def _cache_status(cache, missing):
+    if cache is None:
+        return "off"
+    if not missing:
+        return "hit"
+    return "miss" if len(missing) == len(STATEMENTS) else "partial"
+
+
+# === ALL STATEMENTS ===
+@traced(args={"ticker_symbol": "ticker", "num_quarters": "quarters"}, result=frame_rows)
+def fetch_statements(ticker_symbol, num_quarters=8, backend=None, cache=_DEFAULT_CACHE, history=None,
+                     lean=False):
+    """
+    Fetches and prepares all three quarterly statements for the given ticker
+    from a single ticker object, loading them concurrently when the backend
+    allows it. Statements found in the cache are not requested at all.
+    If a HistoryStore is passed as `history`, every quarter the source
+    returned (not just the latest num_quarters) is upserted into it.
+    With lean=True the frames only hold the columns the scorers read, as
+    float32 where that is exact enough (see lean_frame()).
+    Returns a StatementBundle of (balance sheet, income statement, cash flow).
+    """
+    cache = _resolve_cache(cache, backend)
+    backend = backend or get_default_backend()
+
+    frames = {}
+    if cache is not None:
+        for statement in STATEMENTS:
+            hit, df = cache.lookup(ticker_symbol, _cache_key(statement, lean), num_quarters)
+            if hit:
+                frames[statement] = df
+    missing = [statement for statement in STATEMENTS if statement not in frames]
+    annotate(cache=_cache_status(cache, missing))
+
+    if missing:
+        stock = backend.ticker(ticker_symbol)
+
+        def load(statement):
+            # Backends load lazily, so this is where the source (Yahoo) is called
+            with span("source", ticker=ticker_symbol, statement=statement, backend=type(backend).__name__):
+                raw = getattr(stock, STATEMENT_ATTRS[statement])
+            if history is None:
+                return prepare_statement(statement, raw, num_quarters, lean)
+            # The history keeps every line item, so lean frames are cut from the full one
+            full = prepare_statement(statement, raw, max(raw.shape[1], num_quarters))
+            if full is None:
+                return None
+            history.upsert(ticker_symbol, statement, full)
+            recent = full.tail(num_quarters).reset_index(drop=True)
+            return lean_frame(statement, recent) if lean else recent
+
+        if getattr(backend, "concurrent", False) and len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                loaded = list(pool.map(bind(load), missing))
+        else:
+            loaded = [load(statement) for statement in missing]
+
+        for statement, df in zip(missing, loaded):
+            frames[statement] = df
+            if cache is not None:
+                cache.store(ticker_symbol, _cache_key(statement, lean), num_quarters, df)
+
+    return StatementBundle(*(frames[statement] for statement in STATEMENTS))
+
+
+@traced(args=("statement", "lean"), result=frame_rows)
+def prepare_statement(statement, raw, num_quarters=8, lean=False):
+    """
+    Turns a raw yfinance-shaped statement (line items as rows, dates as
+    columns) into the same prepared frame the matching get_*_data returns.
+    With lean=True, line items no scorer reads are dropped before the
+    frame is transposed, and the values are downcast as in lean_frame().
+    """
+    if not lean:
+        return _BUILDERS[statement](raw, num_quarters)
+    df = _BUILDERS[statement](raw, num_quarters, keep=LEAN_COLUMNS[statement])
+    return None if df is None else _downcast(df)
+
+
+def lean_frame(statement, df):
+    """
+    The lean version of a prepared frame: only 'Date', the LEAN_COLUMNS and
+    derived columns of the statement, with every value column that
+    round-trips through float32 within LEAN_RTOL stored as float32.
+    """
+    if df is None:
+        return None
+    wanted = set(LEAN_COLUMNS[statement]) | set(DERIVED_COLUMNS[statement])
+    return _downcast(df[[col for col in df.columns if col == "Date" or col in wanted]])
+
+
+def _downcast(df):
+    columns = [col for col in df.columns if col != "Date"]
+    if not columns:
+        return df    # none of the lean line items reported
+    values = np.column_stack([df[col].to_numpy(dtype=np.float64) for col in columns])
+    with np.errstate(over="ignore", invalid="ignore"):
+        narrow = values.astype(np.float32)
+        exact = (np.abs(narrow - values) <= LEAN_RTOL * np.abs(values)) | np.isnan(values)
+    safe = exact.all(axis=0)
+    if not safe.all():
+        return df.astype({col: np.float32 for col, ok in zip(columns, safe) if ok})
+    # The usual case: build the frame once instead of a per-column astype
+    return pd.DataFrame({"Date": df["Date"].to_numpy(), **{col: narrow[:, i] for i, col in enumerate(columns)}})
+
+
+def _fetch_one(statement, ticker_symbol, num_quarters, backend, cache):
+    cache = _resolve_cache(cache, backend)
+    if cache is not None:
+        hit, df = cache.lookup(ticker_symbol, statement, num_quarters)
+        if hit:
+            annotate(cache="hit")
+            return df
+    annotate(cache="off" if cache is None else "miss")
+
+    backend = backend or get_default_backend()
+    stock = backend.ticker(ticker_symbol)
+    with span("source", ticker=ticker_symbol, statement=statement, backend=type(backend).__name__):
+        raw = getattr(stock, STATEMENT_ATTRS[statement])
+    df = prepare_statement(statement, raw, num_quarters)
+    if cache is not None:
+        cache.store(ticker_symbol, statement, num_quarters, df)
+    return df
+
+
 # === BALANCE SHEET ===
-def get_balance_sheet_data(ticker_symbol, num_quarters=8):
+@traced(args={"ticker_symbol": "ticker"}, result=frame_rows)
+def get_balance_sheet_data(ticker_symbol, num_quarters=8, backend=None, cache=_DEFAULT_CACHE):
     """
     Fetches and prepares quarterly balance sheet data for the given ticker.
     Calculates Debt to Equity, Current Ratio, and Cash to Assets if possible.
     """
-    stock = yf.Ticker(ticker_symbol)
-    df = stock.quarterly_balance_sheet.T
-    df = _prepare_df(df, num_quarters)
+    return _fetch_one("balance_sheet", ticker_symbol, num_quarters, backend, cache)
 
-    if df is not None:
-        # Liabilities & Equity columns to look for
-        liab_cols = ["Total Liab", "Total Liabilities Net Minority Interest", "Total Liabilities"]
-        equity_cols = ["Total Stockholder Equity", "Total Equity Gross Minority Interest", "Ordinary Shares Number"]
+def _build_balance_sheet(raw, num_quarters, keep=None):
+    df = _prepare_df("balance_sheet", raw, num_quarters, keep)
 
-        liab_col = next((col for col in liab_cols if col in df.columns), None)
-        equity_col = next((col for col in equity_cols if col in df.columns), None)
+    if df is not None:
+        # Equity: gross of minority interest where reported, else stockholders' equity
+        liab_col = "Total Liabilities Net Minority Interest"
+        equity_col = next((col for col in ["Total Equity Gross Minority Interest", "Stockholders Equity"]
+                           if col in df.columns), None)
 
-        if liab_col and equity_col:
+        if liab_col in df.columns and equity_col:
             df["Debt_to_Equity"] = df[liab_col] / df[equity_col]
 
-        if "Total Current Assets" in df.columns and "Total Current Liabilities" in df.columns:
-            df["Current_Ratio"] = df["Total Current Assets"] / df["Total Current Liabilities"]
+        if "Current Assets" in df.columns and "Current Liabilities" in df.columns:
+            df["Current_Ratio"] = df["Current Assets"] / df["Current Liabilities"]
 
-        if "Cash" in df.columns and "Total Assets" in df.columns:
-            df["Cash_to_Assets"] = df["Cash"] / df["Total Assets"]
-
-        # Standardize important column names if missing
-        if "Total Assets" not in df.columns:
-            for col in ["Total Asset", "TotalAssets"]:
-                if col in df.columns:
-                    df.rename(columns={col: "Total Assets"}, inplace=True)
+        if "Cash And Cash Equivalents" in df.columns and "Total Assets" in df.columns:
+            df["Cash_to_Assets"] = df["Cash And Cash Equivalents"] / df["Total Assets"]
 
     return df
 
 
 # === INCOME STATEMENT ===
-def get_income_statement_data(ticker_symbol, num_quarters=8):
+@traced(args={"ticker_symbol": "ticker"}, result=frame_rows)
+def get_income_statement_data(ticker_symbol, num_quarters=8, backend=None, cache=_DEFAULT_CACHE):
     """
     Fetches and prepares quarterly income statement data for the given ticker.
-    Standardizes key column names for consistency.
+    Line items carry their canonical names (see schema.py).
     """
-    stock = yf.Ticker(ticker_symbol)
-    df = stock.quarterly_financials.T
-    df = _prepare_df(df, num_quarters)
+    return _fetch_one("income_statement", ticker_symbol, num_quarters, backend, cache)
 
-    if df is not None:
-        # Standardize column names
-        if "Total Revenue" not in df.columns:
-            for col in ["TotalRevenue", "Revenues"]:
-                if col in df.columns:
-                    df.rename(columns={col: "Total Revenue"}, inplace=True)
-
-        if "Gross Profit" not in df.columns:
-            for col in ["GrossProfit"]:
-                if col in df.columns:
-                    df.rename(columns={col: "Gross Profit"}, inplace=True)
-
-        if "Net Income" not in df.columns:
-            for col in ["NetIncome", "Net Income Applicable To Common Shares"]:
-                if col in df.columns:
-                    df.rename(columns={col: "Net Income"}, inplace=True)
-
-    return df
+def _build_income_statement(raw, num_quarters, keep=None):
+    return _prepare_df("income_statement", raw, num_quarters, keep)
 
 
 # === CASH FLOW ===
-def get_cash_flow_data(ticker_symbol, num_quarters=8):
+@traced(args={"ticker_symbol": "ticker"}, result=frame_rows)
+def get_cash_flow_data(ticker_symbol, num_quarters=8, backend=None, cache=_DEFAULT_CACHE):
     """
     Fetches and prepares quarterly cash flow data for the given ticker.
     Calculates Free Cash Flow if missing.
-    Standardizes column names.
+    Line items carry their canonical names (see schema.py).
     """
-    stock = yf.Ticker(ticker_symbol)
-    df = stock.quarterly_cashflow.T
-    df = _prepare_df(df, num_quarters)
+    return _fetch_one("cash_flow", ticker_symbol, num_quarters, backend, cache)
+
+def _build_cash_flow(raw, num_quarters, keep=None):
+    df = _prepare_df("cash_flow", raw, num_quarters, keep)
 
     if df is not None:
         # Add Free Cash Flow if missing and data available
         if "Free Cash Flow" not in df.columns:
-            if "Total Cash From Operating Activities" in df.columns and "Capital Expenditures" in df.columns:
-                df["Free Cash Flow"] = df["Total Cash From Operating Activities"] - abs(df["Capital Expenditures"])
-
-        # Standardize capital expenditure column name
-        if "Capital Expenditure" not in df.columns:
-            for col in ["Capital Expenditures", "CapitalExpenditures"]:
-                if col in df.columns:
-                    df.rename(columns={col: "Capital Expenditure"}, inplace=True)
+            if "Operating Cash Flow" in df.columns and "Capital Expenditure" in df.columns:
+                df["Free Cash Flow"] = df["Operating Cash Flow"] - abs(df["Capital Expenditure"])
 
     return df
 
 
+_BUILDERS = {
+    "balance_sheet": _build_balance_sheet,
+    "income_statement": _build_income_statement,
+    "cash_flow": _build_cash_flow,
+}
+
+
 # === Shared Preparation Function ===
-def _prepare_df(df, num_quarters):
+def _prepare_df(statement, raw, num_quarters, keep=None):
     """
-    Prepares raw dataframes by:
-    - Converting index to datetime
+    Prepares raw (line items as rows) statements by:
+    - Keeping only the line items whose canonical name is in `keep`, if given
+    - Transposing to one row per quarter and converting the index to datetime
     - Sorting descending by date and trimming to required quarters
     - Sorting ascending for logical presentation
+    - Mapping line items to canonical float64 columns (see schema.py)
     - Resetting index and renaming 'index' to 'Date'
     """
-    if df.empty:
+    if raw.empty:
         return None
+    if keep is not None:
+        return _prepare_lean(statement, raw, num_quarters, keep)
+    df = raw.T
     df.index = pd.to_datetime(df.index)
     df = df.sort_index(ascending=False).head(num_quarters)
-    df = df.sort_index()
+    df = canonicalize(statement, df.sort_index())
     df = df.reset_index().rename(columns={"index": "Date"})
     return df
+
+def _prepare_lean(statement, raw, num_quarters, keep):
+    """
+    _prepare_df for the `keep` line items only: picks those rows and the
+    latest quarters out of the raw frame and builds the result from one
+    float64 block, so the full raw frame is never transposed or cast.
+    Line items outside `keep` are not looked at, so not logged as unmapped.
+    """
+    renames = resolve_columns(statement, list(raw.index)).renames
+    wanted = set(keep)
+    rows = [i for i, item in enumerate(raw.index) if renames.get(item, item) in wanted]
+    dates = pd.to_datetime(raw.columns)
+    recent = np.argsort(dates.to_numpy(), kind="stable")[-num_quarters:]
+    try:
+        values = raw.to_numpy(dtype=np.float64)
+    except (TypeError, ValueError):
+        values = raw.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    values = values[rows][:, recent]
+    columns = {"Date": dates[recent]}
+    columns.update((renames.get(raw.index[i], raw.index[i]), values[n]) for n, i in enumerate(rows))
+    return pd.DataFrame(columns)
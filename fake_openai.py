@@ -0,0 +1,257 @@
+"""
+Local stand-in for the OpenAI chat completions API (plus the files and
+batches endpoints of the batch-file workflow), for exercising gpt_summary,
+gpt_cache and gpt_batch offline.
+
+    with FakeOpenAIServer(reply="BUY", latency=0.5) as server:
+        client = OpenAI(base_url=server.url, api_key="test")
+        ...
+        print(server.requests)
+
+Point gpt_summary at it with OPENAI_BASE_URL=<server.url> and any
+OPENAI_API_KEY.
+"""
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    """
+    Serves POST /v1/chat/completions with a canned reply on a free local port.
+    Requests with "stream": true get the reply word by word as server-sent events.
+    Files uploaded to /v1/files can be run as a batch through /v1/batches;
+    a batch completes `batch_delay` seconds after it was created.
+
+    Args:
+        reply: message content, or a callable(request_body) -> str
+        latency: seconds to wait before answering
+        token_delay: seconds between streamed chunks
+        fail_with: optional (status, message) to answer every request with
+        fail_when: optional callable(request_body) -> (status, message) or None,
+            e.g. to reject a parameter
+        throttle_every: answer every n-th completion request with HTTP 429
+        batch_delay: seconds until a created batch reports "completed"
+    """
+
+    def __init__(self, reply="Fake analysis. Recommendation: HOLD", latency=0.0, token_delay=0.0,
+                 fail_with=None, fail_when=None, throttle_every=0, batch_delay=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.fail_with = fail_with
+        self.fail_when = fail_when
+        self.throttle_every = throttle_every
+        self.batch_delay = batch_delay
+        self.requests = 0
+        self.throttled = 0
+        self.bodies = []
+        self.files = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _content(self, body):
+        return self.reply(body) if callable(self.reply) else self.reply
+
+    def _failure(self, body):
+        if self.fail_with:
+            return self.fail_with
+        return self.fail_when(body) if self.fail_when else None
+
+    def _add_file(self, data, filename, purpose):
+        with self._lock:
+            file_id = f"file-{len(self.files) + 1}"
+            self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                                   "filename": filename, "purpose": purpose, "data": data}
+        return {k: v for k, v in self.files[file_id].items() if k != "data"}
+
+    def _create_batch(self, request):
+        """Answers every line of the input file right away; status flips to completed after batch_delay."""
+        lines = [json.loads(line) for line in self.files[request["input_file_id"]]["data"].splitlines() if line.strip()]
+        output, errors = [], []
+        for i, line in enumerate(lines):
+            body = line["body"]
+            failure = self._failure(body)
+            if failure:
+                status, message = failure
+                errors.append({"id": f"batch_req_{i}", "custom_id": line["custom_id"],
+                               "response": {"status_code": status, "body": {"error": {"message": message}}},
+                               "error": None})
+            else:
+                output.append({"id": f"batch_req_{i}", "custom_id": line["custom_id"],
+                               "response": {"status_code": 200, "request_id": f"req_{i}",
+                                            "body": _completion(body.get("model", "fake"), self._content(body), body)},
+                               "error": None})
+
+        def jsonl(records):
+            return "".join(json.dumps(r) + "\n" for r in records).encode()
+
+        with self._lock:
+            batch_id = f"batch_{len(self.batches) + 1}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"], "completion_window": request.get("completion_window", "24h"),
+            "created_at": int(time.time()), "metadata": request.get("metadata"),
+            "request_counts": {"total": len(lines), "completed": len(output), "failed": len(errors)},
+            "output_file_id": self._add_file(jsonl(output), "output.jsonl", "batch_output")["id"],
+            "error_file_id": self._add_file(jsonl(errors), "errors.jsonl", "batch_output")["id"] if errors else None,
+            "_ready_at": time.monotonic() + self.batch_delay,
+        }
+        return self._batch(batch_id)
+
+    def _batch(self, batch_id):
+        batch = dict(self.batches[batch_id])
+        ready = time.monotonic() >= batch.pop("_ready_at")
+        batch["status"] = "completed" if ready else "in_progress"
+        if not ready:
+            batch["output_file_id"] = batch["error_file_id"] = None
+        return batch
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].rstrip("/").split("/")
+                if parts[-2:-1] == ["batches"] and parts[-1] in fake.batches:
+                    return self._send_json(200, fake._batch(parts[-1]))
+                if parts[-1] == "content" and parts[-3:-2] == ["files"] and parts[-2] in fake.files:
+                    data = fake.files[parts[-2]]["data"]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    return self.wfile.write(data)
+                self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                if self.path.endswith("/files"):
+                    return self._upload(raw)
+                body = json.loads(raw or b"{}")
+                if self.path.endswith("/batches"):
+                    if body.get("input_file_id") not in fake.files:
+                        return self._send_json(400, {"error": {"message": "unknown input_file_id"}})
+                    return self._send_json(200, fake._create_batch(body))
+
+                with fake._lock:
+                    fake.requests += 1
+                    fake.bodies.append(body)
+                    throttle = fake.throttle_every and fake.requests % fake.throttle_every == 0
+                    fake.throttled += bool(throttle)
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if not self.path.endswith("/chat/completions"):
+                    return self._send_json(404, {"error": {"message": "not found"}})
+                if throttle:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    data = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    return self.wfile.write(data)
+                failure = fake._failure(body)
+                if failure:
+                    status, message = failure
+                    return self._send_json(status, {"error": {"message": message, "type": "fake_error"}})
+
+                content = fake._content(body)
+                if body.get("stream"):
+                    return self._send_stream(body.get("model", "fake"), content)
+                self._send_json(200, _completion(body.get("model", "fake"), content, body))
+
+            def _upload(self, raw):
+                message = BytesParser(policy=HTTP).parsebytes(
+                    b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + raw)
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+                upload = fields["file"]
+                self._send_json(200, fake._add_file(upload.get_payload(decode=True), upload.get_filename(),
+                                                    fields["purpose"].get_content().strip()))
+
+            def _send_stream(self, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                words = content.split(" ")
+                pieces = [w if i == 0 else " " + w for i, w in enumerate(words)] if content else []
+                for delta in [{"role": "assistant"}] + [{"content": p} for p in pieces]:
+                    self._send_event(_chunk(model, delta, None))
+                    if fake.token_delay:
+                        time.sleep(fake.token_delay)
+                self._send_event(_chunk(model, {}, "stop"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _send_event(self, payload):
+                self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def _completion(model, content, body=None):
+    # Rough token counts (4 characters per token) so clients can track usage
+    prompt_tokens = len(json.dumps((body or {}).get("messages", ""))) // 4
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def _chunk(model, delta, finish_reason):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
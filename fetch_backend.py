@@ -0,0 +1,216 @@
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# The three quarterly statements, in the order data_fetcher returns them,
+# mapped to the yfinance.Ticker attribute that holds the raw frame.
+STATEMENT_ATTRS = {
+    "balance_sheet": "quarterly_balance_sheet",
+    "income_statement": "quarterly_financials",
+    "cash_flow": "quarterly_cashflow",
+}
+STATEMENTS = tuple(STATEMENT_ATTRS)
+
+
+# === YAHOO FINANCE ===
+class YFinanceBackend:
+    """
+    Live backend: one yf.Ticker per symbol, so the three statements share
+    the same session and cookie/crumb setup. yfinance is only imported
+    when the first ticker is requested.
+    """
+    # yfinance statement properties are independent requests and can be
+    # loaded from several threads at once
+    concurrent = True
+
+    def ticker(self, ticker_symbol):
+        import yfinance as yf
+
+        return yf.Ticker(ticker_symbol)
+
+
+# === LOCAL FIXTURES ===
+class FixtureBackend:
+    """
+    Offline backend reading raw statements saved with write_fixture().
+    Layout: <root>/<TICKER>/<statement>.csv, shaped like the yfinance
+    frames (line items as rows, quarter-end dates as columns).
+    """
+    concurrent = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def ticker(self, ticker_symbol):
+        return FixtureTicker(self.root, ticker_symbol)
+
+
+class FixtureTicker:
+    """
+    Stand-in for yf.Ticker exposing the quarterly statement attributes.
+    Missing fixture files behave like Yahoo's empty frames.
+    """
+    def __init__(self, root, ticker_symbol):
+        self.ticker = ticker_symbol
+        self._dir = os.path.join(root, ticker_symbol.upper())
+
+    def _read(self, statement):
+        path = os.path.join(self._dir, f"{statement}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col=0)
+        df.columns = pd.to_datetime(df.columns)
+        return df
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._read("balance_sheet")
+
+    @property
+    def quarterly_financials(self):
+        return self._read("income_statement")
+
+    @property
+    def quarterly_cashflow(self):
+        return self._read("cash_flow")
+
+
+def write_fixture(root, ticker_symbol, raw_statements):
+    """
+    Saves raw yfinance-shaped statements for FixtureBackend.
+
+    Args:
+        root: fixture directory
+        ticker_symbol: str
+        raw_statements: dict of statement name -> raw DataFrame
+    """
+    ticker_dir = os.path.join(root, ticker_symbol.upper())
+    os.makedirs(ticker_dir, exist_ok=True)
+    for statement, df in raw_statements.items():
+        if statement not in STATEMENT_ATTRS:
+            raise ValueError(f"Unknown statement '{statement}'")
+        df.to_csv(os.path.join(ticker_dir, f"{statement}.csv"))
+
+
+def raw_statements(stock):
+    """
+    Returns the raw statements of a yf.Ticker-like object as a dict.
+    """
+    return {statement: getattr(stock, attr) for statement, attr in STATEMENT_ATTRS.items()}
+
+
+# === SYNTHETIC DATA ===
+class SyntheticBackend:
+    """
+    Offline backend generating plausible yfinance-shaped statements.
+    Each ticker gets its own deterministic random company, so runs are
+    reproducible and can be scaled to any universe size.
+
+    Args:
+        num_quarters: quarters of history per statement
+        extra_columns: filler line items added to each statement, to mimic
+            the width of real Yahoo frames
+        end: last quarter-end date
+        seed: base seed mixed with the ticker symbol
+    """
+    concurrent = False
+
+    def __init__(self, num_quarters=6, extra_columns=0, end="2025-06-30", seed=0):
+        self.num_quarters = num_quarters
+        self.extra_columns = extra_columns
+        self.end = end
+        self.seed = seed
+
+    def ticker(self, ticker_symbol):
+        return SyntheticTicker(self, ticker_symbol)
+
+
+class SyntheticTicker:
+    def __init__(self, backend, ticker_symbol):
+        self.ticker = ticker_symbol
+        self._statements = _synthetic_statements(
+            ticker_symbol.upper(), backend.num_quarters, backend.extra_columns, backend.end, backend.seed
+        )
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self._statements["balance_sheet"]
+
+    @property
+    def quarterly_financials(self):
+        return self._statements["income_statement"]
+
+    @property
+    def quarterly_cashflow(self):
+        return self._statements["cash_flow"]
+
+
+def synthetic_universe(size, prefix="SYN"):
+    """Returns `size` ticker symbols for use with SyntheticBackend."""
+    width = len(str(size))
+    return [f"{prefix}{i:0{width}d}" for i in range(size)]
+
+
+def _synthetic_statements(ticker_symbol, num_quarters, extra_columns, end, seed):
+    rng = np.random.default_rng([seed, zlib.crc32(ticker_symbol.encode())])
+    # yfinance returns the newest quarter first
+    dates = pd.date_range(end=end, periods=num_quarters, freq="QE")[::-1]
+    n = num_quarters
+
+    growth = rng.normal(0.02, 0.05, n)
+    revenue = rng.lognormal(21, 1.5) * np.cumprod(1 + growth)[::-1]
+    gross_margin = np.clip(rng.normal(rng.uniform(0.2, 0.7), 0.02, n), 0.05, 0.95)
+    net_margin = rng.normal(rng.uniform(-0.05, 0.25), 0.03, n)
+    net_income = revenue * net_margin
+    shares = rng.uniform(5e7, 5e9) * np.ones(n)
+    depreciation = revenue * rng.uniform(0.02, 0.08)
+
+    total_assets = revenue * rng.uniform(2, 6) * rng.normal(1, 0.01, n)
+    total_liabilities = total_assets * rng.uniform(0.2, 0.9)
+    equity = total_assets - total_liabilities
+    current_assets = total_assets * rng.uniform(0.2, 0.5)
+    current_liabilities = current_assets / rng.uniform(0.6, 3)
+    cash = total_assets * rng.uniform(0.01, 0.2)
+
+    capex = -revenue * rng.uniform(0.02, 0.1)
+    operating_cash_flow = net_income + depreciation + revenue * rng.normal(0.02, 0.02, n)
+
+    statements = {
+        "balance_sheet": {
+            "Total Assets": total_assets,
+            "Current Assets": current_assets,
+            "Current Liabilities": current_liabilities,
+            "Total Liabilities Net Minority Interest": total_liabilities,
+            "Total Equity Gross Minority Interest": equity,
+            "Stockholders Equity": equity * rng.uniform(0.9, 1.0),
+            "Cash And Cash Equivalents": cash,
+            "Long Term Debt": total_liabilities * rng.uniform(0.1, 0.6),
+            "Retained Earnings": equity * rng.uniform(-0.2, 0.8),
+            "Ordinary Shares Number": shares,
+        },
+        "income_statement": {
+            "Total Revenue": revenue,
+            "Gross Profit": revenue * gross_margin,
+            "Operating Income": revenue * (net_margin + 0.05),
+            "Net Income": net_income,
+            "Basic Average Shares": shares,
+            "Basic EPS": net_income / shares,
+            "Diluted EPS": net_income / (shares * 1.02),
+            "Reconciled Depreciation": depreciation,
+        },
+        "cash_flow": {
+            "Operating Cash Flow": operating_cash_flow,
+            "Capital Expenditure": capex,
+            "Free Cash Flow": operating_cash_flow + capex,
+            "Depreciation And Amortization": depreciation,
+        },
+    }
+
+    frames = {}
+    for statement, items in statements.items():
+        for i in range(extra_columns):
+            items[f"Other Line Item {i}"] = rng.normal(0, 1e8, n)
+        frames[statement] = pd.DataFrame(items, index=dates).T
+    return frames
@@ -0,0 +1,511 @@
+"""
+GPT analyses for a whole watchlist, concurrently or through a batch file.
+
+`run` sends one chat completion per ticker with the async OpenAI client.
+With --grounded, each ticker's statements are fetched first and the
+request carries the same compact metrics prompt (prompt_builder) as the
+dashboard; otherwise the model only gets the ticker.
+All requests share a concurrency cap and a tokens-per-minute budget
+(estimated from the prompt length plus a reserve for the answer).
+Throttled (429), failed (5xx, connection errors) and timed-out requests are
+retried with jittered exponential backoff. Rejected parameters fall back as
+in gpt_summary.fallback_params().
+
+Every finished ticker is appended to a JSONL results file right away. A
+rerun skips tickers that already have an answer for the same request, so
+an interrupted run resumes where it stopped and only failed tickers are
+retried. Answers also go to the gpt_cache response cache, which the
+dashboard reads.
+
+The batch-file workflow (the OpenAI Batch API: cheaper, asynchronous)
+writes the same requests as a JSONL file, uploads it, and collects the
+answers into the same results file:
+
+    python gpt_batch.py run watchlist.txt --out analyses.jsonl --concurrency 8 --tpm 200000
+    python gpt_batch.py run watchlist.txt --grounded --budget 600
+    python gpt_batch.py prepare watchlist.txt --requests batch_input.jsonl
+    python gpt_batch.py submit batch_input.jsonl             # prints the batch id
+    python gpt_batch.py collect batch_abc123 --out analyses.jsonl --wait
+
+The client reads OPENAI_API_KEY and OPENAI_BASE_URL, so everything can be
+pointed at fake_openai.FakeOpenAIServer for testing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from async_fetcher import TokenBucket, backoff_delay
+from batch import _read_tickers
+from gpt_cache import get_default_cache, request_key
+from gpt_summary import _DEFAULT_CACHE, _build_params, build_analysis_prompt, fallback_params, get_client
+from prompt_builder import DEFAULT_TOKEN_BUDGET, build_prompt, metric_records
+
+DEFAULT_RESULTS_PATH = "analyses.jsonl"
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+
+class AnalysisResult(NamedTuple):
+    ticker: str
+    status: str             # "ok" or "error"
+    content: str
+    error: str
+    key: str                # gpt_cache.request_key of the original request
+    source: str             # "api", "cache" or "batch"
+    attempts: int
+    seconds: float
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def analysis_params(ticker, bundle=None, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    The chat completion request for a ticker: grounded in its statements
+    when a bundle is given (the same request the dashboard makes for the
+    same data), otherwise the ticker-only research request.
+    """
+    if bundle is None:
+        return _build_params(build_analysis_prompt(ticker))
+    overall, records = metric_records(bundle)
+    return _build_params(build_prompt(ticker, bundle, overall, records, budget).text, grounded=True)
+
+
+def request_params(tickers, grounded=False, budget=DEFAULT_TOKEN_BUDGET, fetch_workers=8):
+    """
+    ({ticker: request params}, {ticker: error}). With grounded=True the
+    statements are fetched first (through the statement cache); tickers
+    that cannot be fetched or scored end up in the errors.
+    """
+    if not grounded:
+        return {t: analysis_params(t) for t in tickers}, {}
+    from data_fetcher import fetch_statements
+
+    def build(ticker):
+        try:
+            return analysis_params(ticker, fetch_statements(ticker), budget)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+        built = dict(zip(tickers, pool.map(build, tickers)))
+    params = {t: p for t, p in built.items() if not isinstance(p, Exception)}
+    errors = {t: f"{type(e).__name__}: {e}" for t, e in built.items() if isinstance(e, Exception)}
+    return params, errors
+
+
+def estimate_tokens(params, reserve):
+    """Rough token count of a request (4 characters per token) plus `reserve` for the answer."""
+    return len(json.dumps(params.get("messages", ""))) // 4 + reserve
+
+
+# === RESULTS FILE ===
+class ResultStore:
+    """
+    Append-only JSONL file of AnalysisResults. The last line of a ticker
+    wins, so a retried failure simply shadows the earlier error.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def load(self):
+        """Returns {ticker: AnalysisResult}; a truncated last line (killed run) is ignored."""
+        results = {}
+        if not os.path.exists(self.path):
+            return results
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[record["ticker"]] = AnalysisResult(**record)
+        return results
+
+    def completed(self, keys):
+        """Tickers that already have an answer for the request in `keys` ({ticker: request_key})."""
+        return {t for t, r in self.load().items() if r.status == "ok" and keys.get(t) == r.key}
+
+    def append(self, result):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(result._asdict()) + "\n")
+
+
+# === ASYNC CLIENT ===
+def get_async_client():
+    """An AsyncOpenAI client without its own retries (AsyncAnalyzer retries)."""
+    from dotenv import load_dotenv
+    from openai import AsyncOpenAI
+
+    load_dotenv()
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+class AsyncAnalyzer:
+    """
+    Requests analyses for many tickers concurrently.
+
+    Args:
+        client: AsyncOpenAI client (default: get_async_client())
+        concurrency: requests in flight at once
+        tpm: tokens per minute allowed across all requests (None: no limit)
+        completion_reserve: tokens budgeted per request for the answer
+        max_retries: retries per ticker after the first attempt
+        timeout: seconds allowed per request attempt
+        base_delay, max_delay: backoff bounds in seconds
+        cache: gpt_cache.ResponseCache (default: the process-wide one; None: no cache)
+    """
+
+    def __init__(self, client=None, concurrency=8, tpm=None, completion_reserve=1500, max_retries=5,
+                 timeout=180, base_delay=1.0, max_delay=60, cache=_DEFAULT_CACHE):
+        self.client = client or get_async_client()
+        self.limiter = TokenBucket(tpm / 60, capacity=tpm) if tpm else None
+        self.completion_reserve = completion_reserve
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = get_default_cache() if cache is _DEFAULT_CACHE else cache
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    async def _complete(self, params):
+        """
+        Returns (response, attempts). Raises the last error once retries run
+        out, or at once if it is not retryable, with `attempts` set on it.
+        """
+        import openai
+
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire(estimate_tokens(params, self.completion_reserve))
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    return await self.client.chat.completions.create(**params, timeout=self.timeout), attempt + 1
+            except openai.BadRequestError as e:
+                params = fallback_params(params, e)
+                if params is None:
+                    e.attempts = attempt + 1
+                    raise
+                continue                           # a different request, not a retry
+            except openai.RateLimitError as e:
+                self.throttled += 1
+                error = e
+                retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+                delay = max(_seconds(retry_after), backoff_delay(attempt, self.base_delay, self.max_delay))
+            except (openai.APIConnectionError, openai.InternalServerError) as e:   # includes timeouts
+                error = e
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+            except openai.APIError as e:
+                e.attempts = attempt + 1
+                raise
+
+            if attempt == self.max_retries:
+                error.attempts = attempt + 1
+                raise error
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def analyze(self, ticker, params=None):
+        """Returns the AnalysisResult for one ticker; errors are returned, not raised."""
+        params = params or analysis_params(ticker)
+        key = request_key(params)
+        start = time.perf_counter()
+        cached = self.cache.lookup(key) if self.cache is not None else None
+        if cached is not None:
+            return AnalysisResult(ticker, "ok", cached, "", key, "cache", 0, time.perf_counter() - start, 0, 0)
+
+        try:
+            response, attempts = await self._complete(params)
+        except Exception as e:
+            return AnalysisResult(ticker, "error", "", f"{type(e).__name__}: {e}", key, "api",
+                                  getattr(e, "attempts", 1), time.perf_counter() - start, 0, 0)
+        return _result(ticker, key, "api", response, attempts, time.perf_counter() - start, self.cache)
+
+    async def analyze_many(self, tickers, store=None, progress=None, params=None):
+        """
+        Analyses every ticker and returns {ticker: AnalysisResult}. Results
+        are appended to `store` as they finish; progress(done, total, result)
+        is called for each one. `params` maps tickers to their requests
+        (default: analysis_params(ticker)).
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        params = params or {}
+        results = {}
+        for task in asyncio.as_completed([self.analyze(t, params.get(t)) for t in tickers]):
+            result = await task
+            results[result.ticker] = result
+            if store is not None:
+                store.append(result)
+            if progress:
+                progress(len(results), len(tickers), result)
+        return results
+
+    def stats(self):
+        return {"requests": self.requests, "retries": self.retries, "throttled": self.throttled}
+
+    async def close(self):
+        await self.client.close()
+
+
+def _seconds(retry_after):
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _result(ticker, key, source, response, attempts, seconds, cache=None):
+    """AnalysisResult from a chat completion (an object or a batch output dict); caches answers."""
+    if isinstance(response, dict):
+        content = (response["choices"][0]["message"].get("content") or "").strip()
+        usage = response.get("usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    else:
+        content = (response.choices[0].message.content or "").strip()
+        usage = response.usage
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if not content:
+        return AnalysisResult(ticker, "error", "", "EmptyCompletion: GPT returned an empty message.", key,
+                              source, attempts, seconds, prompt_tokens, completion_tokens)
+    if cache is not None:
+        cache.put(key, content)
+    return AnalysisResult(ticker, "ok", content, "", key, source, attempts, seconds,
+                          prompt_tokens, completion_tokens)
+
+
+# === SUMMARY ===
+class RunSummary(NamedTuple):
+    total: int
+    analysed: int
+    cached: int
+    skipped: int            # already answered in the results file
+    failed: int
+    retries: int
+    throttled: int
+    prompt_tokens: int
+    completion_tokens: int
+    elapsed: float
+
+    def __str__(self):
+        return (f"{self.total} tickers: {self.analysed} analysed ({self.cached} from cache), "
+                f"{self.skipped} already done, {self.failed} failed in {self.elapsed:.1f}s; "
+                f"{self.retries} retries ({self.throttled} throttled); "
+                f"{self.prompt_tokens} prompt + {self.completion_tokens} completion tokens")
+
+
+def _summarize(total, results, skipped, stats, elapsed):
+    done = [r for r in results.values() if r.status == "ok"]
+    return RunSummary(
+        total=total,
+        analysed=len(done),
+        cached=sum(r.source == "cache" for r in done),
+        skipped=skipped,
+        failed=len(results) - len(done),
+        retries=stats.get("retries", 0),
+        throttled=stats.get("throttled", 0),
+        prompt_tokens=sum(r.prompt_tokens for r in results.values()),
+        completion_tokens=sum(r.completion_tokens for r in results.values()),
+        elapsed=elapsed,
+    )
+
+
+def run_analyses(tickers, out=DEFAULT_RESULTS_PATH, resume=True, progress=None, grounded=False,
+                 budget=DEFAULT_TOKEN_BUDGET, **options):
+    """
+    Synchronous entry point: analyses the tickers not yet answered in `out`
+    and returns a RunSummary. With grounded=True the prompts carry each
+    ticker's metrics (see request_params). Options go to AsyncAnalyzer.
+    """
+    start = time.perf_counter()
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    store = ResultStore(out)
+    params, errors = request_params(tickers, grounded, budget)
+    done = store.completed({t: request_key(p) for t, p in params.items()}) if resume else set()
+    todo = [t for t in params if t not in done]
+
+    results = {}
+    for ticker, error in errors.items():
+        results[ticker] = AnalysisResult(ticker, "error", "", error, "", "api", 0, 0.0, 0, 0)
+        store.append(results[ticker])
+
+    async def run():
+        analyzer = AsyncAnalyzer(**options)
+        try:
+            return await analyzer.analyze_many(todo, store, progress, params), analyzer.stats()
+        finally:
+            await analyzer.close()
+
+    analysed, stats = asyncio.run(run()) if todo else ({}, {})
+    results.update(analysed)
+    return _summarize(len(tickers), results, len(done), stats, time.perf_counter() - start)
+
+
+# === BATCH FILES ===
+def write_batch_requests(tickers, path, out=None, grounded=False, budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Writes one Batch API request line per ticker (custom_id = ticker) and
+    returns how many were written. Tickers already answered in the results
+    file `out` are left out, as are (with grounded=True) tickers whose
+    statements could not be fetched.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    params, errors = request_params(tickers, grounded, budget)
+    for ticker, error in errors.items():
+        print(f"Skipping {ticker}: {error}", file=sys.stderr)
+    done = ResultStore(out).completed({t: request_key(p) for t, p in params.items()}) if out else set()
+    count = 0
+    with open(path, "w") as f:
+        for ticker in params:
+            if ticker in done:
+                continue
+            f.write(json.dumps({"custom_id": ticker, "method": "POST", "url": CHAT_ENDPOINT,
+                                "body": params[ticker]}) + "\n")
+            count += 1
+    return count
+
+
+def submit_batch(path, client=None, completion_window="24h"):
+    """Uploads a request file and starts a batch over it; returns the batch object."""
+    client = client or get_client()
+    with open(path, "rb") as f:
+        uploaded = client.files.create(file=(os.path.basename(path), f.read()), purpose="batch")
+    return client.batches.create(input_file_id=uploaded.id, endpoint=CHAT_ENDPOINT,
+                                 completion_window=completion_window,
+                                 metadata={"source": "gpt_batch", "requests": os.path.basename(path)})
+
+
+def collect_batch(batch_id, out=DEFAULT_RESULTS_PATH, client=None, wait=False, poll=30, cache=_DEFAULT_CACHE):
+    """
+    Appends the answers of a finished batch to the results file and returns
+    a RunSummary, or None if the batch is still running (and wait=False).
+    Requests the batch rejected are recorded as errors; `run` retries them
+    (with parameter fallbacks) on the next pass.
+    """
+    client = client or get_client()
+    cache = get_default_cache() if cache is _DEFAULT_CACHE else cache
+    start = time.perf_counter()
+    batch = client.batches.retrieve(batch_id)
+    while batch.status in ("validating", "in_progress", "finalizing"):
+        if not wait:
+            print(f"Batch {batch_id} is {batch.status}.", file=sys.stderr)
+            return None
+        time.sleep(poll)
+        batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        raise RuntimeError(f"batch {batch_id} ended as {batch.status}")
+
+    # The request keys come from the submitted bodies, whichever prompt they used
+    keys = {}
+    for line in client.files.content(batch.input_file_id).text.splitlines():
+        if line.strip():
+            request = json.loads(line)
+            keys[request["custom_id"]] = request_key(request["body"])
+
+    store = ResultStore(out)
+    results = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            ticker = record["custom_id"]
+            key = keys.get(ticker, "")
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                result = _result(ticker, key, "batch", response["body"], 1, 0.0, cache)
+            else:
+                error = record.get("error") or (response.get("body") or {}).get("error") or {}
+                result = AnalysisResult(ticker, "error", "", f"HTTP {response.get('status_code')}: "
+                                        f"{error.get('message', error)}", key, "batch", 1, 0.0, 0, 0)
+            results[ticker] = result
+            store.append(result)
+    return _summarize(len(results), results, 0, {}, time.perf_counter() - start)
+
+
+# === CLI ===
+def _print_progress(done, total, result):
+    status = "ok" if result.status == "ok" else "ERROR"
+    print(f"\r[{done:>{len(str(total))}}/{total}] {result.ticker:<8} {status:<5}",
+          end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GPT analyses for a list of tickers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="analyse concurrently with the async client")
+    run.add_argument("tickers", help="file with ticker symbols (whitespace or comma separated)")
+    run.add_argument("--out", default=DEFAULT_RESULTS_PATH, help="JSONL results file (appended to)")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--tpm", type=int, help="tokens per minute across all requests")
+    run.add_argument("--max-retries", type=int, default=5)
+    run.add_argument("--timeout", type=float, default=180, help="seconds per request attempt")
+    run.add_argument("--no-resume", action="store_true", help="also redo tickers already answered")
+    run.add_argument("--no-cache", action="store_true", help="ignore the response cache")
+    run.add_argument("--quiet", action="store_true", help="no per-ticker progress")
+
+    prepare = commands.add_parser("prepare", help="write a Batch API request file")
+    prepare.add_argument("tickers")
+    prepare.add_argument("--requests", default="batch_input.jsonl")
+    prepare.add_argument("--out", default=DEFAULT_RESULTS_PATH, help="leave out tickers answered here")
+    for command in (run, prepare):
+        command.add_argument("--grounded", action="store_true",
+                             help="fetch statements and send the dashboard's metrics prompt")
+        command.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="grounded prompt tokens")
+
+    submit = commands.add_parser("submit", help="upload a request file and start a batch")
+    submit.add_argument("requests")
+
+    collect = commands.add_parser("collect", help="append a finished batch's answers to the results file")
+    collect.add_argument("batch_id")
+    collect.add_argument("--out", default=DEFAULT_RESULTS_PATH)
+    collect.add_argument("--wait", action="store_true", help="poll until the batch is done")
+    collect.add_argument("--poll", type=float, default=30, help="seconds between polls")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        summary = run_analyses(
+            _read_tickers(args.tickers), args.out, resume=not args.no_resume,
+            progress=None if args.quiet else _print_progress, grounded=args.grounded, budget=args.budget,
+            concurrency=args.concurrency, tpm=args.tpm, max_retries=args.max_retries, timeout=args.timeout,
+            cache=None if args.no_cache else _DEFAULT_CACHE,
+        )
+        print(summary, file=sys.stderr)
+        print(f"Results written to {args.out}", file=sys.stderr)
+        return 1 if summary.failed else 0
+
+    if args.command == "prepare":
+        count = write_batch_requests(_read_tickers(args.tickers), args.requests, args.out,
+                                     grounded=args.grounded, budget=args.budget)
+        print(f"{count} requests written to {args.requests}", file=sys.stderr)
+    elif args.command == "submit":
+        batch = submit_batch(args.requests)
+        print(f"Submitted batch {batch.id} ({batch.status})", file=sys.stderr)
+        print(batch.id)
+    else:
+        summary = collect_batch(args.batch_id, args.out, wait=args.wait, poll=args.poll)
+        if summary is None:
+            return 2
+        print(summary, file=sys.stderr)
+        print(f"Results written to {args.out}", file=sys.stderr)
+        return 1 if summary.failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
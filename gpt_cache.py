@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "gpt_responses.sqlite")
+DEFAULT_TTL = 12 * 3600  # seconds
+DEFAULT_MAX_ENTRIES = 5000
+# v2: rows carry last_access for LRU eviction; older tables are ignored
+TABLE = "responses_v2"
+
+
+def request_key(params):
+    """
+    Content address of a chat completion request: SHA-256 of the model,
+    messages and every other parameter, serialized canonically.
+    """
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of completion texts keyed by request_key(), with a TTL.
+    Expired rows are purged when the cache is opened and on every put(), and
+    the least recently used ones are evicted once more than `max_entries`
+    are stored.
+
+    get_or_call() also coalesces concurrent identical requests: the first
+    caller makes the API call and everyone else asking for the same key
+    meanwhile waits for its result (single-flight). claim() and release()
+    expose the same single-flight to callers that stream the answer.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, last_access REAL NOT NULL, content TEXT NOT NULL)"
+        )
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def get(self, key):
+        """Returns the cached content for `key`, or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at, content FROM {TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[0] > self.ttl:
+                return None
+            self._conn.execute(f"UPDATE {TABLE} SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row[1]
+
+    def lookup(self, key):
+        """Like get(), but counted in the hit/miss statistics."""
+        content = self.get(key)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content
+
+    def put(self, key, content):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?, ?)", (key, now, now, content)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Purges expired rows, then the least recently used ones beyond max_entries."""
+        self._conn.execute(f"DELETE FROM {TABLE} WHERE created_at < ?", (time.time() - self.ttl,))
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN "
+                f"(SELECT rowid FROM {TABLE} ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def get_or_call(self, params, call):
+        """
+        Returns the cached completion for `params`, or the result of
+        call(params), which is stored on success. Exceptions from `call` are
+        raised to every coalesced caller and nothing is cached.
+        """
+        key = request_key(params)
+        content, leader = self.claim(key)
+        if not leader:
+            return content
+        try:
+            content = call(params)
+        except BaseException as e:
+            self.release(key, error=e)
+            raise
+        self.release(key, content)
+        return content
+
+    def claim(self, key):
+        """
+        Single-flight entry for callers that produce the content themselves,
+        e.g. while streaming it. Returns (content, False) for a cached answer
+        or, after waiting for it, the answer of a concurrent identical
+        request (its exception is raised here instead). Otherwise returns
+        (None, True): the caller leads and must call release() with the
+        content or the error.
+        """
+        content = self.get(key)
+        if content is not None:
+            with self._lock:
+                self.hits += 1
+            return content, False
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return flight.result(), False
+
+        # Another leader may have finished between our lookup and registering
+        content = self.get(key)
+        if content is not None:
+            with self._lock:
+                del self._inflight[key]
+            flight.set_result(content)
+            return content, False
+        return None, True
+
+    def release(self, key, content=None, error=None):
+        """
+        Ends a claim(): stores `content` and hands it to the callers waiting
+        for `key`, or raises `error` to them and stores nothing.
+        """
+        try:
+            if error is None:
+                self.put(key, content)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                flight = self._inflight.pop(key)
+            if error is None:
+                flight.set_result(content)
+            else:
+                flight.set_exception(error)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    def stats(self):
+        """
+        Returns hit/miss counters for this process plus the number of stored
+        entries. Coalesced calls shared another caller's API request;
+        evictions counts rows dropped by the max_entries bound.
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {TABLE}")
+            self._conn.commit()
+            self.hits = self.misses = self.coalesced = self.evictions = 0
+
+
+# === DEFAULT CACHE ===
+_UNSET = object()
+_default_cache = _UNSET
+
+def get_default_cache():
+    """
+    Returns the process-wide response cache, configured from the environment:
+    GPT_CACHE=off disables it, GPT_CACHE_PATH, GPT_CACHE_TTL and
+    GPT_CACHE_MAX_ENTRIES override the defaults.
+    """
+    global _default_cache
+    if _default_cache is _UNSET:
+        if os.getenv("GPT_CACHE", "on").lower() in ("0", "off", "false"):
+            _default_cache = None
+            return None
+        _default_cache = ResponseCache(
+            path=os.getenv("GPT_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl=float(os.getenv("GPT_CACHE_TTL", DEFAULT_TTL)),
+            max_entries=int(os.getenv("GPT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+    return _default_cache
+
+def set_default_cache(cache):
+    """Replaces the process-wide cache; None disables caching."""
+    global _default_cache
+    _default_cache = cache
@@ -1,12 +1,72 @@
+import argparse
+import logging
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import sys
+import threading
+import time
 
-load_dotenv()
+from gpt_cache import get_default_cache, request_key
+from tracing import annotate, span, traced
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger("gpt_summary")
+
+_DEFAULT_CACHE = object()
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The shared OpenAI client, created on first use: importing this module
+    loads neither the openai package nor .env, so scoring workers and CLIs
+    that never call the API do not pay for them.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from dotenv import load_dotenv
+                from openai import OpenAI
+
+                load_dotenv()
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+class EmptyCompletion(Exception):
+    """The API answered, but with no message content."""
+
+
+def build_analysis_prompt(ticker):
+    """
+    The dashboard's analysis request for a ticker (independent analysis +
+    technical analysis).
+    """
+    return f"""
+        You are an expert financial analyst. Conduct an independent due diligence analysis on the company {ticker}.
+        Consider fundamental financial health and also perform a technical analysis of the stock's recent market trends.
+        Provide a detailed investment analysis covering strengths, weaknesses, risks, and opportunities.
+        Conclude with a clear recommendation: BUY, HOLD, or SELL as of today.
+        """
+
+
+def _build_params(prompt_text, grounded=False):
+    """
+    The chat completion request. A grounded prompt (from prompt_builder)
+    already holds the instructions and the data, and asks for a short
+    answer, so it is sent as is with low verbosity and reasoning effort.
+    """
+    if grounded:
+        return dict(
+            model="gpt-5",
+            messages=[
+                {"role": "system", "content": "You are a helpful financial assistant."},
+                {"role": "user", "content": prompt_text},
+            ],
+            verbosity="low",
+            reasoning_effort="low",
+        )
 
-def get_financial_summary(prompt_text) -> str:
     prompt = f"""
 You are a financial analyst. Independently research and analyze the company described below.
 Provide a detailed report covering fundamentals, risks, opportunities, and technical analysis of the stock.
@@ -18,7 +78,7 @@ Company Information:
 Please be concise but thorough, and finish with your recommendation.
 """
 
-    params = dict(
+    return dict(
         model="gpt-5",
         messages=[
             {"role": "system", "content": "You are a helpful financial assistant."},
@@ -26,41 +86,191 @@ Please be concise but thorough, and finish with your recommendation.
         ]
     )
 
+
+@traced()
+def get_financial_summary(prompt_text, cache=_DEFAULT_CACHE, grounded=False) -> str:
+    """
+    Returns GPT's analysis for the prompt. Identical requests are answered
+    from the response cache (gpt_cache) instead of calling the API again;
+    pass cache=None to always call the API. Pass grounded=True for prompts
+    from prompt_builder.build_prompt().
+    """
+    params = _build_params(prompt_text, grounded)
+
+    if cache is _DEFAULT_CACHE:
+        cache = get_default_cache()
+
     try:
-        response = client.chat.completions.create(**params)
-        print("Full API response:", response)  # Debug: print full response to console/log
-        content = response.choices[0].message.content.strip()
-        if not content:
-            return "GPT returned an empty message."
-        return content
+        if cache is None:
+            return _complete(params)
+        return cache.get_or_call(params, _complete)
+    except EmptyCompletion:
+        return "GPT returned an empty message."
     except Exception as e:
-        error_msg = str(e)
-        # Retry logic for unsupported parameters
-        if ("unsupported" in error_msg.lower() or "does not support" in error_msg.lower()) and ("verbosity" in error_msg.lower() or "reasoning_effort" in error_msg.lower()):
-            print("Retrying without verbosity and reasoning_effort due to unsupported parameter error.")
-            for key in ["verbosity", "reasoning_effort"]:
-                if key in params:
-                    del params[key]
-            try:
-                response = client.chat.completions.create(**params)
-                print("Full API response on retry:", response)
-                content = response.choices[0].message.content.strip()
-                if not content:
-                    return "GPT returned an empty message on retry."
-                return content
-            except Exception as e2:
-                return f"Error calling ChatGPT API on retry: {str(e2)}"
-        elif "temperature" in error_msg.lower():
-            print("Retrying with temperature=1 due to unsupported temperature value.")
-            params["temperature"] = 1
+        return f"Error calling ChatGPT API: {str(e)}"
+
+
+class SummaryStream:
+    """
+    Iterates over GPT's analysis as text chunks while it is generated.
+    After iteration, `text` holds the full answer, `ttft` the seconds until
+    the first chunk and `total` the seconds until the last one.
+    A cached answer is yielded as a single chunk; so is the answer of an
+    identical request that was already streaming, which this one waits for
+    instead of calling the API again.
+    """
+
+    def __init__(self, prompt_text, cache=_DEFAULT_CACHE, grounded=False):
+        self.params = _build_params(prompt_text, grounded)
+        self.cache = get_default_cache() if cache is _DEFAULT_CACHE else cache
+        self.text = ""
+        self.ttft = None
+        self.total = None
+        self.cached = False
+
+    def __iter__(self):
+        with span("gpt_summary.SummaryStream", model=self.params["model"]) as s:
+            yield from self._chunks()
+            s.set(cached=self.cached, ttft=self.ttft, chars=len(self.text))
+
+    def _chunks(self):
+        start = time.perf_counter()
+        key = request_key(self.params)
+        leader = self.cache is None
+        if not leader:
             try:
-                response = client.chat.completions.create(**params)
-                print("Full API response on retry:", response)
-                content = response.choices[0].message.content.strip()
-                if not content:
-                    return "GPT returned an empty message on retry."
-                return content
-            except Exception as e3:
-                return f"Error calling ChatGPT API on retry: {str(e3)}"
+                cached, leader = self.cache.claim(key)
+            except Exception as e:
+                # The identical request this one waited for failed
+                self.total = time.perf_counter() - start
+                if isinstance(e, EmptyCompletion):
+                    self.text = "GPT returned an empty message."
+                else:
+                    self.text = f"Error calling ChatGPT API: {str(e)}"
+                yield self.text
+                return
+        if not leader:
+            # Cached, or streamed meanwhile by an identical request
+            self.cached = True
+            self.ttft = self.total = time.perf_counter() - start
+            self.text = cached
+            yield cached
+            return
+
+        chunks = []
+        error = None
+        completed = False
+        try:
+            response = _create_completion(dict(self.params, stream=True))
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - start
+                chunks.append(delta)
+                yield delta
+            completed = True
+        except Exception as e:
+            error = e
+            chunks.append(f"Error calling ChatGPT API: {str(e)}")
+            yield chunks[-1]
+        finally:
+            self.total = time.perf_counter() - start
+            self.text = "".join(chunks)
+            ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+            logger.info("GPT stream: first token after %s, completed in %.2fs (%d chunks)",
+                        ttft, self.total, len(chunks))
+            if self.cache is not None:
+                self._release(key, error, completed)
+
+    def _release(self, key, error, completed):
+        """Stores the answer and hands it (or the failure) to identical requests waiting on this one."""
+        if error is None and not completed:
+            error = RuntimeError("the stream was closed before the answer was complete")
+        elif error is None and not self.text.strip():
+            error = EmptyCompletion()
+        if error is not None:
+            self.cache.release(key, error=error)
         else:
-            return f"Error calling ChatGPT API: {error_msg}"
+            self.cache.release(key, self.text.strip())
+
+
+def stream_financial_summary(prompt_text, cache=_DEFAULT_CACHE, grounded=False):
+    """
+    Streaming variant of get_financial_summary(): returns a SummaryStream
+    that yields the answer in chunks as they arrive.
+    """
+    return SummaryStream(prompt_text, cache=cache, grounded=grounded)
+
+
+@traced(name="openai.chat.completions")
+def _complete(params):
+    """
+    Calls the chat completions API and returns the stripped message text.
+    Raises EmptyCompletion for empty answers so they are never cached.
+    """
+    response = _create_completion(params)
+    usage = getattr(response, "usage", None)
+    annotate(model=params.get("model"),
+             prompt_tokens=getattr(usage, "prompt_tokens", None),
+             completion_tokens=getattr(usage, "completion_tokens", None))
+    content = (response.choices[0].message.content or "").strip()
+    if not content:
+        raise EmptyCompletion()
+    return content
+
+
+def fallback_params(params, error):
+    """
+    The request to retry after the API rejected one of its parameters:
+    without verbosity and reasoning_effort, or with temperature=1. Returns
+    None if `error` is not such a rejection or the fallback changes nothing.
+    Used by both the blocking calls here and gpt_batch.
+    """
+    error_msg = str(error).lower()
+    if ("unsupported" in error_msg or "does not support" in error_msg) and ("verbosity" in error_msg or "reasoning_effort" in error_msg):
+        fallback = {k: v for k, v in params.items() if k not in ("verbosity", "reasoning_effort")}
+        reason = "without verbosity and reasoning_effort due to unsupported parameter error"
+    elif "temperature" in error_msg:
+        fallback = dict(params, temperature=1)
+        reason = "with temperature=1 due to unsupported temperature value"
+    else:
+        return None
+    if fallback == params:
+        return None
+    logger.warning("Retrying %s.", reason)
+    return fallback
+
+
+def _create_completion(params):
+    while True:
+        try:
+            return get_client().chat.completions.create(**params)
+        except Exception as e:
+            params = fallback_params(params, e)
+            if params is None:
+                raise
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream GPT's investment analysis for a ticker.")
+    parser.add_argument("ticker")
+    parser.add_argument("--no-cache", action="store_true", help="always call the API")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)    # stream timings on stderr
+
+    stream = stream_financial_summary(build_analysis_prompt(args.ticker.upper()),
+                                      cache=None if args.no_cache else _DEFAULT_CACHE)
+    for chunk in stream:
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+In-process LRU memoization keyed by content hashes of the arguments.
+
+DataFrames are hashed by value (pandas' row hashes plus column names and
+dtypes), so two equal frames share a cache entry. Memos are registered
+by name: decorating again under the same name (as happens when Streamlit
+re-executes app.py on every interaction) reuses the existing entries.
+
+Cached results are shared between callers and must not be mutated.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def content_hash(value):
+    """Stable hex digest of a value; DataFrames and Series are hashed by content."""
+    h = hashlib.sha1()
+    _update_hash(h, value)
+    return h.hexdigest()
+
+def _update_hash(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(b"df")
+        h.update(repr((list(value.columns), [str(t) for t in value.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(b"series")
+        h.update(repr((value.name, str(value.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (tuple, list)):
+        h.update(b"(" if isinstance(value, tuple) else b"[")
+        for item in value:
+            _update_hash(h, item)
+        h.update(b")")
+    elif isinstance(value, dict):
+        h.update(b"{")
+        for key in sorted(value, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, value[key])
+        h.update(b"}")
+    else:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+class Memo:
+    """
+    LRU store with hit/miss counters for one memoized function. Entries
+    older than `ttl` seconds (if given) are recomputed.
+    """
+
+    def __init__(self, name, maxsize, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def call(self, fn, args, kwargs):
+        key = content_hash((args, kwargs))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] <= self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = fn(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (now, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+def memoize(name, maxsize=128, ttl=None):
+    """
+    Decorator caching a function's results in the named Memo.
+
+        @memoize("Financial Health", maxsize=256)
+        def score(bs_df, is_df, cf_df): ...
+    """
+    with _registry_lock:
+        memo = _registry.get(name)
+        if memo is None:
+            memo = _registry[name] = Memo(name, maxsize, ttl)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return memo.call(fn, args, kwargs)
+        wrapper.memo = memo
+        return wrapper
+    return decorator
+
+
+def memo_stats():
+    """Stats of every registered memo, plus an 'All' row with the combined hit rate."""
+    rows = [memo.stats() for memo in _registry.values()]
+    hits = sum(r["hits"] for r in rows)
+    misses = sum(r["misses"] for r in rows)
+    rows.append({
+        "name": "All",
+        "entries": sum(r["entries"] for r in rows),
+        "maxsize": sum(r["maxsize"] for r in rows),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+    })
+    return rows
+
+
+def clear_all():
+    for memo in _registry.values():
+        memo.clear()
@@ -0,0 +1,191 @@
+"""
+Compact metric records for the three scorers.
+
+A MetricRecord is a (metric_id, value, score) tuple holding the raw
+numeric value; the display string is only built when display() is called.
+MetricBatch stores every metric of N tickers in one contiguous structured
+NumPy array instead of N nested breakdown dicts.
+
+    records = buffett_metrics(bs_df, is_df, cf_df)
+    records[1].name, records[1].value, records[1].display()   # 'ROE', 0.183, '18.30%'
+
+    batch = MetricBatch.from_bundles({"AAPL": bundle, ...})
+    batch.to_frame("score")    # tickers x (scorer, metric)
+"""
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from utils import format_metric
+
+# Display kinds
+PLAIN = "plain"
+CURRENCY = "currency"
+PERCENT = "percent"            # ratio, shown x100 with a % sign
+PERCENT_POINTS = "points"      # already in percent, shown with a % sign
+
+SCORERS = ("financial_health", "buffett", "lynch")
+
+
+class MetricDef(NamedTuple):
+    id: int
+    scorer: str
+    section: str
+    name: str
+    kind: str
+
+
+_DEFINITIONS = [
+    ("financial_health", "Balance Sheet Breakdown", "Liquidity", PLAIN),
+    ("financial_health", "Balance Sheet Breakdown", "Leverage", PLAIN),
+    ("financial_health", "Balance Sheet Breakdown", "Asset Quality", PLAIN),
+    ("financial_health", "Balance Sheet Breakdown", "Cash Safety", PERCENT),
+    ("financial_health", "Balance Sheet Breakdown", "Retained Earnings Growth", PERCENT_POINTS),
+    ("financial_health", "Balance Sheet Breakdown", "Equity Strength", PLAIN),
+    ("financial_health", "Income Statement Breakdown", "Revenue Growth", PERCENT_POINTS),
+    ("financial_health", "Income Statement Breakdown", "Gross Margin", PERCENT),
+    ("financial_health", "Income Statement Breakdown", "Net Margin", PERCENT),
+    ("financial_health", "Income Statement Breakdown", "Net Income Growth", PERCENT_POINTS),
+    ("financial_health", "Income Statement Breakdown", "Earnings Quality", PLAIN),
+    ("financial_health", "Cash Flow Breakdown", "FCF Positivity", CURRENCY),
+    ("financial_health", "Cash Flow Breakdown", "FCF Growth", PERCENT_POINTS),
+    ("financial_health", "Cash Flow Breakdown", "FCF to Revenue", PERCENT),
+    ("financial_health", "Cash Flow Breakdown", "OpCF Positivity", CURRENCY),
+    ("financial_health", "Cash Flow Breakdown", "CapEx Discipline", PLAIN),
+    ("buffett", "", "Owner Earnings", CURRENCY),
+    ("buffett", "", "ROE", PERCENT),
+    ("buffett", "", "ROIC", PERCENT),
+    ("buffett", "", "Debt-to-Equity", PLAIN),
+    ("buffett", "", "EPS Growth", PERCENT),
+    ("buffett", "", "FCFF", CURRENCY),
+    ("buffett", "", "Gross Margin", PERCENT),
+    ("buffett", "", "Net Margin", PERCENT),
+    ("lynch", "", "EPS Growth %", PERCENT_POINTS),
+    ("lynch", "", "PEG Ratio", PLAIN),
+    ("lynch", "", "Debt-to-Equity", PLAIN),
+    ("lynch", "", "Dividend Yield + Growth", PLAIN),
+    ("lynch", "", "Net Cash Position", CURRENCY),
+]
+
+METRICS = tuple(MetricDef(i, *definition) for i, definition in enumerate(_DEFINITIONS))
+METRIC_IDS = {(m.scorer, m.name): m.id for m in METRICS}
+
+
+class MetricRecord(NamedTuple):
+    """One scored metric: raw value (None if unavailable) and its score."""
+    metric_id: int
+    value: Any
+    score: Any
+
+    @property
+    def definition(self):
+        return METRICS[self.metric_id]
+
+    @property
+    def name(self):
+        return METRICS[self.metric_id].name
+
+    def display(self):
+        """The value formatted for people (and GPT prompts)."""
+        return format_value(self.value, METRICS[self.metric_id].kind)
+
+
+def record(scorer, name, value, score):
+    return MetricRecord(METRIC_IDS[(scorer, name)], value, score)
+
+def format_value(value, kind):
+    if kind == PERCENT_POINTS:
+        formatted = format_metric(value)
+        return formatted if formatted == "N/A" else f"{value:.2f}%"
+    return format_metric(value, is_percentage=kind == PERCENT, is_currency=kind == CURRENCY)
+
+def records_from_breakdown(scorer, breakdown):
+    """
+    MetricRecords from a score_full_company or score_lynch_company breakdown
+    (values there are already raw numbers).
+    """
+    if scorer == "financial_health":
+        sections = [m.section for m in METRICS if m.scorer == scorer]
+        items = (item for section in dict.fromkeys(sections) for item in breakdown[section].items())
+    else:
+        items = breakdown.items()
+    return [record(scorer, name, metric["value"], metric["score"]) for name, metric in items]
+
+
+# === BATCH STORAGE ===
+RECORD_DTYPE = np.dtype([("value", "f8"), ("score", "f8")])
+OVERALL_DTYPE = np.dtype([(scorer, "f8") for scorer in SCORERS])
+
+
+def as_float(value):
+    """The value as a float; None and non-numeric values become NaN."""
+    try:
+        return np.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class MetricBatch:
+    """
+    All metrics of N tickers in one (N, len(METRICS)) structured array with
+    'value' and 'score' fields; column j is metric id j. Missing values are
+    NaN. `overall` holds the three overall scores per ticker; tickers whose
+    scoring failed keep NaN rows and have their error in `errors`.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self._rows = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.array = np.full((len(self.tickers), len(METRICS)), np.nan, dtype=RECORD_DTYPE)
+        self.overall = np.full(len(self.tickers), np.nan, dtype=OVERALL_DTYPE)
+        self.errors = {}
+
+    @classmethod
+    def from_bundles(cls, bundles):
+        """Scores every {ticker: (bs_df, is_df, cf_df)} bundle into a new batch."""
+        batch = cls(bundles)
+        for ticker, bundle in bundles.items():
+            try:
+                batch.score(ticker, bundle)
+            except Exception as e:
+                batch.errors[ticker] = f"{type(e).__name__}: {e}"
+        return batch
+
+    def score(self, ticker, bundle):
+        """Runs the three scorers on one bundle and fills the ticker's row."""
+        from buffett_score import buffett_metrics, buffett_overall
+        from lynch import score_lynch_company
+        from score import score_full_company
+
+        fh_score, fh_breakdown = score_full_company(*bundle)
+        buffett_records = buffett_metrics(*bundle)
+        lynch_score, lynch_breakdown = score_lynch_company(*bundle)
+
+        self.set(ticker, records_from_breakdown("financial_health", fh_breakdown)
+                 + buffett_records + records_from_breakdown("lynch", lynch_breakdown))
+        self.overall[self._rows[ticker]] = (fh_score, buffett_overall(buffett_records), lynch_score)
+
+    def set(self, ticker, records):
+        row = self.array[self._rows[ticker]]
+        ids = [r.metric_id for r in records]
+        row["value"][ids] = [as_float(r.value) for r in records]
+        row["score"][ids] = [as_float(r.score) for r in records]
+
+    def records(self, ticker):
+        """The ticker's metrics as MetricRecords (NaN for missing values)."""
+        row = self.array[self._rows[ticker]]
+        return [MetricRecord(m.id, float(row["value"][m.id]), float(row["score"][m.id])) for m in METRICS]
+
+    def to_frame(self, field="score"):
+        """DataFrame of one field, tickers as rows and (scorer, metric) columns."""
+        import pandas as pd
+
+        columns = pd.MultiIndex.from_tuples([(m.scorer, m.name) for m in METRICS], names=["scorer", "metric"])
+        return pd.DataFrame(self.array[field], index=pd.Index(self.tickers, name="ticker"), columns=columns)
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes + self.overall.nbytes
+
+    def __len__(self):
+        return len(self.tickers)
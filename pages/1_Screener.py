@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from screener import DEFAULT_LIMIT, QueryError, Screener
+
+EXAMPLE_QUERY = "ROIC > 10% and buffett.Debt_to_Equity < 1 order by financial_health desc"
+
+@st.cache_resource(max_entries=4)
+def load_screener(path, mtime):
+    # mtime is part of the cache key, so a new batch run is picked up
+    return Screener.load(path)
+
+def render_columns_help(screener):
+    with st.expander(f"Columns ({len(screener.columns)})"):
+        st.caption("Use <scorer>.<metric>, or just the metric when only one scorer has it. "
+                   "Names ignore case, spaces and punctuation; `%` follows the metric's unit.")
+        st.dataframe(pd.DataFrame({"column": list(screener.columns)}), hide_index=True)
+
+def main():
+    st.title("Screener")
+    st.caption("Filter and rank a scored universe. Create one with "
+               "`python batch.py tickers.txt --metrics --out scores.parquet`.")
+
+    path = st.sidebar.text_input("Batch results (.parquet or .csv)", "scores.parquet")
+    if not os.path.exists(path):
+        st.info(f"No results file at {path!r}.")
+        return
+    screener = load_screener(path, os.path.getmtime(path))
+    st.sidebar.caption(f"{len(screener)} tickers, {len(screener.columns)} columns")
+    if not any("." in name for name in screener.columns):
+        st.warning("This file only has the overall scores; rerun batch.py with --metrics to screen on metrics.")
+
+    query = st.text_input("Query", EXAMPLE_QUERY, key="screener_query")
+    limit = st.slider("Rows", 10, 500, DEFAULT_LIMIT, step=10)
+    try:
+        result = screener.query(query, limit=limit)
+    except QueryError as e:
+        st.error(str(e))
+        render_columns_help(screener)
+        return
+
+    st.caption(f"{result.matched} of {len(screener)} tickers match ({result.elapsed * 1000:.2f} ms)")
+    st.dataframe(result.to_frame(), width=1000)
+    render_columns_help(screener)
+
+main()
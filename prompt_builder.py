@@ -0,0 +1,280 @@
+"""
+Grounded GPT prompts built from the computed metrics, within a token budget.
+
+Instead of asking the model to research a ticker on its own, build_prompt()
+hands it the three overall scores, every breakdown metric (value formatted
+with metrics.format_value, and its score) and the key statement rows of
+the last quarters (in whole millions) as compact pipe-separated tables:
+
+    overall, records = metric_records(bundle)
+    prompt = build_prompt("AAPL", bundle, overall, records, budget=600)
+    prompt.text, prompt.tokens, prompt.dropped
+
+Lines are ranked by priority. When the prompt would exceed the budget,
+metrics without a value go first, then duplicated and secondary metrics
+and statement rows, so the headline numbers survive tight budgets. Tokens
+are counted with tiktoken when it is installed, otherwise estimated
+locally. Values are rounded for display, so the same statements always
+give the same prompt (and a gpt_cache hit).
+
+    python prompt_builder.py AAPL --budget 400
+"""
+import argparse
+import functools
+import re
+import sys
+from typing import NamedTuple
+
+from metrics import METRICS, SCORERS, format_value, records_from_breakdown
+from utils import format_metric
+
+DEFAULT_TOKEN_BUDGET = 600
+DEFAULT_QUARTERS = 4
+DEFAULT_MAX_WORDS = 250
+TIKTOKEN_ENCODING = "o200k_base"    # the gpt-4o / gpt-5 tokenizer
+
+SCORER_LABELS = {"financial_health": "health", "buffett": "buffett", "lynch": "lynch"}
+
+# Lower numbers are kept longer. Metrics without a value always rank last.
+METRIC_PRIORITY = {
+    ("financial_health", "Revenue Growth"): 1,
+    ("financial_health", "Net Margin"): 1,
+    ("financial_health", "Leverage"): 1,
+    ("buffett", "Owner Earnings"): 1,
+    ("buffett", "ROE"): 1,
+    ("buffett", "ROIC"): 1,
+    ("lynch", "EPS Growth %"): 1,
+    ("lynch", "PEG Ratio"): 1,
+    ("buffett", "Gross Margin"): 3,      # same value as financial_health's
+    ("buffett", "Net Margin"): 3,
+    ("lynch", "Debt-to-Equity"): 3,      # same value as buffett's
+}
+DEFAULT_METRIC_PRIORITY = 2
+MISSING_PRIORITY = 4
+
+# (statement index in the bundle, column, in millions, priority)
+STATEMENT_ROWS = [
+    (1, "Total Revenue", True, 1),
+    (1, "Net Income", True, 1),
+    (2, "Free Cash Flow", True, 1),
+    (1, "Diluted EPS", False, 2),
+    (1, "Operating Income", True, 2),
+    (2, "Operating Cash Flow", True, 2),
+    (0, "Stockholders Equity", True, 2),
+    (0, "Long Term Debt", True, 2),
+    (1, "Gross Profit", True, 3),
+    (0, "Total Assets", True, 3),
+    (0, "Cash And Cash Equivalents", True, 3),
+    (2, "Capital Expenditure", True, 3),
+]
+
+INSTRUCTIONS = """\
+Analyse {ticker} using only the data below (scores are 0-10, higher is better; \
+N/A means not available). Cover strengths, weaknesses and risks in at most \
+{max_words} words, then finish with one line: "Recommendation: BUY", "HOLD" or "SELL"."""
+
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+    budget: int
+    dropped: tuple          # labels of the lines left out, first dropped first
+    tokenizer: str          # "tiktoken/<encoding>" or "estimate"
+
+    def __str__(self):
+        over = " (over budget)" if self.tokens > self.budget else ""
+        return (f"{self.tokens} prompt tokens{over} of {self.budget} ({self.tokenizer}), "
+                f"{len(self.dropped)} lines dropped")
+
+
+# === TOKEN COUNTING ===
+@functools.lru_cache(maxsize=None)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception:       # not installed, or the encoding file cannot be loaded
+        return None
+
+
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|\n|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text):
+    """
+    Approximate BPE token count: one token per up to 6 letters of a word,
+    per group of up to 3 digits, per newline and per punctuation character.
+    Tends to overestimate slightly, which keeps prompts within the budget.
+    """
+    count = 0
+    for piece in _PIECES.findall(text):
+        count += (len(piece) + 5) // 6 if piece[0].isalpha() else 1
+    return count
+
+
+def count_tokens(text):
+    """Tokens in `text` with tiktoken if available, else estimate_tokens()."""
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding is not None else estimate_tokens(text)
+
+
+def tokenizer_name():
+    return f"tiktoken/{TIKTOKEN_ENCODING}" if _encoding() is not None else "estimate"
+
+
+# === CONTENT ===
+def metric_records(bundle):
+    """The overall scores ({scorer: score}) and all MetricRecords of a statement bundle."""
+    from buffett_score import buffett_metrics, buffett_overall
+    from lynch import score_lynch_company
+    from score import score_full_company
+
+    fh_score, fh_breakdown = score_full_company(*bundle)
+    buffett_records = buffett_metrics(*bundle)
+    lynch_score, lynch_breakdown = score_lynch_company(*bundle)
+    overall = {"financial_health": fh_score, "buffett": buffett_overall(buffett_records), "lynch": lynch_score}
+    records = (records_from_breakdown("financial_health", fh_breakdown) + buffett_records
+               + records_from_breakdown("lynch", lynch_breakdown))
+    return overall, records
+
+
+def _missing(value):
+    return format_metric(value) == "N/A"
+
+
+def _score(score):
+    return "N/A" if _missing(score) else f"{score:.1f}"
+
+
+def _statement_value(value, millions):
+    # Whole millions: a fraction of the tokens of "$1.23B"-style cells
+    if _missing(value):
+        return "N/A"
+    return f"{value / 1e6:.0f}" if millions else f"{value:.2f}"
+
+
+def _quarter(date):
+    return f"{date.year}Q{(date.month - 1) // 3 + 1}"
+
+
+def _metric_lines(records):
+    """(priority, label, line) for every metric record."""
+    lines = []
+    for r in records:
+        m = METRICS[r.metric_id]
+        priority = MISSING_PRIORITY if _missing(r.value) else METRIC_PRIORITY.get((m.scorer, m.name),
+                                                                                   DEFAULT_METRIC_PRIORITY)
+        lines.append((priority, f"{m.scorer}.{m.name}",
+                      f"{SCORER_LABELS[m.scorer]}|{m.name}|{format_value(r.value, m.kind)}|{_score(r.score)}"))
+    return lines
+
+
+def _statement_lines(bundle, quarters):
+    """
+    The header row ("item|2025Q1|...") and (priority, label, line) for the
+    key statement rows, aligned on the last `quarters` dates of any statement.
+    """
+    frames = [df for df in bundle if df is not None and not df.empty]
+    dates = sorted(set().union(*(df["Date"] for df in frames)))[-quarters:] if frames else []
+    if not dates:
+        return None, []
+    positions = {}
+    lines = []
+    for index, column, millions, priority in STATEMENT_ROWS:
+        df = bundle[index]
+        if df is None or column not in df.columns:
+            continue
+        if index not in positions:
+            rows = dict(zip(df["Date"], range(len(df))))
+            positions[index] = [rows.get(d) for d in dates]
+        values = df[column].to_numpy()
+        cells = (_statement_value(None if i is None else values[i], millions) for i in positions[index])
+        lines.append((priority, column, column + "|" + "|".join(cells)))
+    return "item|" + "|".join(_quarter(d) for d in dates), lines
+
+
+def build_prompt(ticker, bundle, overall, records, budget=DEFAULT_TOKEN_BUDGET, quarters=DEFAULT_QUARTERS,
+                 max_words=DEFAULT_MAX_WORDS):
+    """
+    The grounded analysis prompt for a ticker as a Prompt (text and token
+    count). Drops the lowest-priority lines until it fits `budget` tokens;
+    the instructions and overall scores are always kept.
+
+    Args:
+        bundle: (bs_df, is_df, cf_df) prepared statements
+        overall: {scorer: overall score}
+        records: MetricRecords of the three scorers (see metric_records())
+    """
+    header = [
+        INSTRUCTIONS.format(ticker=ticker, max_words=max_words),
+        "",
+        "Scores: " + " ".join(f"{SCORER_LABELS[s]}={_score(overall.get(s))}" for s in SCORERS),
+    ]
+    metric_lines = _metric_lines(records)
+    table_header, statement_lines = _statement_lines(bundle, quarters)
+
+    # Drop order: highest priority number first, the later line first within a priority
+    optional = metric_lines + statement_lines
+    order = sorted(range(len(optional)), key=lambda i: (-optional[i][0], -i))
+    kept = set(range(len(optional)))
+    line_tokens = [count_tokens(line + "\n") for _, _, line in optional]
+    fixed = count_tokens("\n".join(header) + "\nMetrics (scorer|metric|value|score):\n"
+                         + (f"Statements ($M except EPS, last {quarters} quarters):\n{table_header}\n" if table_header else ""))
+
+    def render():
+        metrics = [optional[i][2] for i in range(len(metric_lines)) if i in kept]
+        statements = [optional[i][2] for i in range(len(metric_lines), len(optional)) if i in kept]
+        lines = list(header)
+        if metrics:
+            lines += ["Metrics (scorer|metric|value|score):"] + metrics
+        if statements:
+            lines += [f"Statements ($M except EPS, last {quarters} quarters):", table_header] + statements
+        return "\n".join(lines)
+
+    dropped = []
+    total = fixed + sum(line_tokens)
+    for i in order:
+        if total <= budget:
+            break
+        kept.discard(i)
+        dropped.append(optional[i][1])
+        total -= line_tokens[i]
+
+    # Per-line counts are close to, not exactly, the count of the joined text
+    text = render()
+    tokens = count_tokens(text)
+    for i in order[len(dropped):]:
+        if tokens <= budget:
+            break
+        kept.discard(i)
+        dropped.append(optional[i][1])
+        text = render()
+        tokens = count_tokens(text)
+    return Prompt(text, tokens, budget, tuple(dropped), tokenizer_name())
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the grounded GPT prompt for a ticker.")
+    parser.add_argument("ticker")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="prompt tokens")
+    parser.add_argument("--quarters", type=int, default=DEFAULT_QUARTERS, help="statement quarters shown")
+    parser.add_argument("--synthetic", action="store_true", help="use generated statements (no network)")
+    args = parser.parse_args(argv)
+
+    from data_fetcher import fetch_statements
+    from fetch_backend import SyntheticBackend
+
+    ticker = args.ticker.upper()
+    bundle = fetch_statements(ticker, backend=SyntheticBackend() if args.synthetic else None)
+    overall, records = metric_records(bundle)
+    prompt = build_prompt(ticker, bundle, overall, records, budget=args.budget, quarters=args.quarters)
+    print(prompt.text)
+    print(prompt, file=sys.stderr)
+    if prompt.dropped:
+        print("Dropped: " + ", ".join(prompt.dropped), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
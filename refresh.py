@@ -0,0 +1,329 @@
+"""
+Incremental refresh of a batch score table.
+
+Fetches fresh statements for every ticker, hashes each prepared
+(ticker, statement) frame and compares it with the hash stored by the
+previous refresh. Only tickers with a changed (or new) statement, no row
+in the score table or a failed row are rescored; their rows replace the
+old ones in the table, every other row is kept as is. Hashes are stored
+only after a ticker scored successfully, so failures are retried on the
+next run. Everything is rescored once when the scoring itself changed:
+batch.SCORING_VERSION, the built-in score bands or the strategy's rules.
+
+Usage:
+    python refresh.py tickers.txt --scores scores.parquet
+    python refresh.py tickers.txt --scores scores.parquet --metrics   # keep screener columns
+    python refresh.py --synthetic 1000 --scores scores.csv --full     # rescore everything
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from batch import (METRIC_COLUMNS, RESULT_COLUMNS, SCORING_VERSION, _error_row, _read_tickers, score_bundle,
+                   write_results)
+from data_fetcher import fetch_statements
+from fetch_backend import STATEMENTS, FixtureBackend, SyntheticBackend, synthetic_universe
+from rules import BUFFETT, FINANCIAL_HEALTH, LYNCH, load_strategy
+
+DEFAULT_STATE_PATH = os.path.join(".cache", "refresh.sqlite")
+
+
+class HashStore:
+    """
+    SQLite table of the content hash of each (ticker, statement,
+    num_quarters) frame as of the last successful scoring, plus the mean
+    seconds it took to score a ticker.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS statement_hashes (
+                ticker TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                num_quarters INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (ticker, statement, num_quarters)
+            );
+            CREATE TABLE IF NOT EXISTS refresh_meta (key TEXT PRIMARY KEY, value NOT NULL);
+            """
+        )
+        self._conn.commit()
+
+    def hashes(self, tickers, num_quarters):
+        """{(ticker, statement): hash} for the given tickers."""
+        wanted = set(tickers)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, statement, hash FROM statement_hashes WHERE num_quarters = ?",
+                (num_quarters,),
+            ).fetchall()
+        return {(ticker, statement): digest for ticker, statement, digest in rows if ticker in wanted}
+
+    def store(self, entries, num_quarters):
+        """Saves [(ticker, statement, hash)]."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO statement_hashes VALUES (?, ?, ?, ?, ?)",
+                [(ticker, statement, num_quarters, digest, now) for ticker, statement, digest in entries],
+            )
+            self._conn.commit()
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM refresh_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO refresh_meta VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM statement_hashes")
+            self._conn.commit()
+
+
+def frame_hash(df):
+    """
+    Hex digest of a prepared frame: column names, dates and values. Prepared
+    frames are the 'Date' column followed by float64 columns (schema.py), so
+    the values hash as one block; memo.content_hash is about twice as slow
+    on these small frames.
+    """
+    if df is None:
+        return "none"
+    h = hashlib.sha1("\0".join(map(str, df.columns)).encode())
+    h.update(df["Date"].to_numpy().tobytes())
+    h.update(df.iloc[:, 1:].to_numpy(dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+def bundle_hashes(bundle):
+    """{statement: frame_hash} of a StatementBundle (a missing frame hashes too)."""
+    return {statement: frame_hash(df) for statement, df in zip(STATEMENTS, bundle)}
+
+def scoring_fingerprint(strategy=None):
+    """
+    Identifies how rows are scored: SCORING_VERSION, the built-in rules and
+    the strategy's rules. Prefixed so SQLite never reads it as a number.
+    """
+    parts = [str(SCORING_VERSION)] + [s.fingerprint() for s in (FINANCIAL_HEALTH, BUFFETT, LYNCH)]
+    if strategy is not None:
+        parts.append(strategy.fingerprint())
+    return "sha1:" + hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+class RefreshSummary(NamedTuple):
+    total: int
+    rescored: int       # dirty tickers scored (including failures)
+    skipped: int        # unchanged tickers whose rows were kept
+    failed: int         # fetch or scoring failures; their previous rows are kept
+    fetch_seconds: float
+    hash_seconds: float
+    score_seconds: float
+    saved_seconds: float    # estimated scoring time the skipped tickers would have taken
+    elapsed: float
+
+    def __str__(self):
+        return (f"Refreshed {self.total} tickers in {self.elapsed:.2f}s: {self.rescored} rescored, "
+                f"{self.skipped} unchanged and skipped, {self.failed} failed "
+                f"(fetch {self.fetch_seconds:.2f}s, hash {self.hash_seconds:.2f}s, "
+                f"score {self.score_seconds:.2f}s; ~{self.saved_seconds:.2f}s of scoring saved)")
+
+
+# === REFRESH ===
+def refresh_scores(tickers, scores=None, backend=None, state=None, num_quarters=8, fetch_workers=8,
+                   score_workers=0, strategy=None, metrics=False, full=False, progress=None, lean=False):
+    """
+    Fetches every ticker, rescores those whose statements changed since the
+    last refresh and merges them into `scores`.
+
+    Args:
+        tickers: iterable of ticker symbols
+        scores: previous result table (batch.py layout) or None
+        backend: data source passed to fetch_statements (default: Yahoo Finance);
+            the statement cache is bypassed so new quarters are seen
+        state: HashStore with the hashes of the last refresh (default: .cache/refresh.sqlite)
+        score_workers: scoring processes, 0 to score in this process
+        strategy, metrics: as for batch.score_universe
+        full: rescore every ticker regardless of hashes (implied when the
+            scoring fingerprint differs from the last refresh's)
+        lean: fetch lean frames (data_fetcher.lean_frame); only changes to the
+            columns the scorers read then count. Switching modes rescores
+            every ticker once, since the hashes differ.
+        progress: optional callback(message) for stage updates
+
+    Returns:
+        (merged result table, RefreshSummary)
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    state = state if state is not None else HashStore()
+    start = time.perf_counter()
+
+    def fetch(ticker):
+        return fetch_statements(ticker, num_quarters=num_quarters, backend=backend, cache=None, lean=lean)
+
+    bundles, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+        for ticker, future in [(t, pool.submit(fetch, t)) for t in tickers]:
+            try:
+                bundles[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = f"fetch: {type(e).__name__}: {e}"
+    fetch_seconds = time.perf_counter() - start
+    if progress:
+        progress(f"Fetched {len(bundles)}/{len(tickers)} tickers in {fetch_seconds:.2f}s")
+
+    # A ticker is dirty if any statement hash changed or its previous row is missing or failed
+    hash_start = time.perf_counter()
+    hashes = {ticker: bundle_hashes(bundle) for ticker, bundle in bundles.items()}
+    hash_seconds = time.perf_counter() - hash_start
+    stored = state.hashes(bundles, num_quarters)
+    previous = scores.set_index("ticker") if scores is not None and not scores.empty else None
+    expected = RESULT_COLUMNS[1:] + ([strategy.name] if strategy is not None else []) \
+        + (METRIC_COLUMNS if metrics else [])
+    # A table without the requested columns (e.g. first run with --metrics), or scored
+    # by other code or rules, is rescored in full
+    fingerprint = scoring_fingerprint(strategy)
+    rescoring = state.get_meta("scoring_fingerprint") != fingerprint
+    full = full or rescoring or previous is None or not set(expected) <= set(previous.columns)
+    dirty = [
+        ticker for ticker in bundles
+        if full or ticker not in previous.index or pd.notna(previous.at[ticker, "error"])
+        or any(stored.get((ticker, statement)) != digest for statement, digest in hashes[ticker].items())
+    ]
+    skipped = len(bundles) - len(dirty)
+    if progress:
+        progress(f"{len(dirty)} tickers changed, {skipped} unchanged")
+
+    score_start = time.perf_counter()
+    if score_workers == 0 or len(dirty) < 2:
+        rows = [score_bundle(t, bundles[t], strategy, metrics) for t in dirty]
+    else:
+        with ProcessPoolExecutor(max_workers=score_workers) as pool:
+            rows = list(pool.map(score_bundle, dirty, [bundles[t] for t in dirty],
+                                 [strategy] * len(dirty), [metrics] * len(dirty)))
+    score_seconds = time.perf_counter() - score_start
+
+    scored = [row for row in rows if row["error"] is None]
+    failures.update((row["ticker"], row["error"]) for row in rows if row["error"] is not None)
+    if rescoring:
+        # Rows left from the old scoring (failed or absent tickers) must not count as current
+        state.clear()
+        state.set_meta("scoring_fingerprint", fingerprint)
+    state.store([(row["ticker"], statement, digest)
+                 for row in scored for statement, digest in hashes[row["ticker"]].items()], num_quarters)
+
+    # Scoring time the skipped tickers would have cost, from this run or the last one that scored
+    per_ticker = score_seconds / len(dirty) if dirty else state.get_meta("score_seconds_per_ticker", 0.0)
+    if dirty:
+        state.set_meta("score_seconds_per_ticker", per_ticker)
+
+    merged = _merge(scores, scored, failures, tickers)
+    summary = RefreshSummary(
+        total=len(tickers), rescored=len(dirty), skipped=skipped, failed=len(failures),
+        fetch_seconds=fetch_seconds, hash_seconds=hash_seconds, score_seconds=score_seconds, saved_seconds=per_ticker * skipped,
+        elapsed=time.perf_counter() - start,
+    )
+    return merged, summary
+
+
+def _merge(scores, scored, failures, tickers):
+    """
+    New rows replace the old ones; failed tickers keep their previous row
+    (or get an error row if they had none); tickers not refreshed are kept.
+    Previous rows stay in their order, tickers new to the table follow.
+    """
+    rows = {} if scores is None else {row["ticker"]: row for row in scores.to_dict("records")}
+    for ticker, message in failures.items():
+        rows.setdefault(ticker, _error_row(ticker, message))
+    rows.update((row["ticker"], row) for row in scored)
+    order = list(dict.fromkeys(([] if scores is None else list(scores["ticker"])) + tickers))
+
+    merged = pd.DataFrame([rows[t] for t in order if t in rows])
+    columns = [c for c in merged.columns if c != "error"] + ["error"]
+    return merged[columns] if not merged.empty else merged
+
+
+def read_scores(path):
+    """The previous result table, or None if the file does not exist yet."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rescore only the tickers whose statements changed.")
+    parser.add_argument("tickers", nargs="?", help="file with ticker symbols (whitespace or comma separated)")
+    parser.add_argument("--scores", default="scores.csv", help="score table to update (.csv or .parquet)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="statement hashes of the last refresh")
+    parser.add_argument("--fixtures", help="read statements from a FixtureBackend directory")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="use N generated tickers (or synthetic data for the given tickers)")
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--score-workers", type=int, default=0,
+                        help="scoring processes, 0 to score in-process")
+    parser.add_argument("--strategy", metavar="FILE", help="YAML/JSON scoring strategy to add as a column")
+    parser.add_argument("--metrics", action="store_true", help="also write every metric's raw value")
+    parser.add_argument("--full", action="store_true", help="rescore every ticker")
+    parser.add_argument("--lean", action="store_true",
+                        help="keep only the statement columns the scorers read, as float32")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if args.fixtures:
+        backend = FixtureBackend(args.fixtures)
+    elif args.synthetic is not None:
+        backend = SyntheticBackend()
+
+    if args.tickers:
+        tickers = _read_tickers(args.tickers)
+    elif args.synthetic:
+        tickers = synthetic_universe(args.synthetic)
+    else:
+        parser.error("a ticker file or --synthetic N is required")
+
+    merged, summary = refresh_scores(
+        tickers,
+        scores=read_scores(args.scores),
+        backend=backend,
+        state=HashStore(args.state),
+        num_quarters=args.quarters,
+        fetch_workers=args.fetch_workers,
+        score_workers=args.score_workers,
+        strategy=load_strategy(args.strategy) if args.strategy else None,
+        metrics=args.metrics,
+        full=args.full,
+        lean=args.lean,
+        progress=lambda message: print(message, file=sys.stderr),
+    )
+    if os.path.dirname(args.scores):
+        os.makedirs(os.path.dirname(args.scores), exist_ok=True)
+    write_results(merged, args.scores)
+
+    print(summary, file=sys.stderr)
+    print(f"Scores written to {args.scores}", file=sys.stderr)
+    return 0 if summary.failed < summary.total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
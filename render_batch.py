@@ -0,0 +1,360 @@
+"""
+Headless batch rendering of trend charts.
+
+Charts are drawn with the Agg renderer on figures that are never registered
+with pyplot: each process keeps one figure per size and redraws it for
+every (ticker, column) chart by swapping the line data, instead of building
+and leaking a new pyplot figure per chart. Statements are fetched on a
+thread pool, charts rendered on a process pool and written as PNG or SVG.
+
+Optionally a small-multiples grid per column (one panel per ticker, green
+when the last quarter is above the first) is written for quick screening.
+
+Usage:
+    python render_batch.py tickers.txt --columns "Total Revenue" "Net Income" --out charts/
+    python render_batch.py --synthetic 200 --format svg --grid
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from data_fetcher import fetch_statements
+from fetch_backend import FixtureBackend, SyntheticBackend, synthetic_universe
+
+DEFAULT_COLUMNS = ["Total Revenue", "Net Income", "Free Cash Flow"]
+FORMATS = ("png", "svg")
+RESULT_COLUMNS = ["ticker", "column", "path", "error"]
+GRID_COLUMNS = 6
+GRID_PANELS = 60   # panels per grid page
+
+
+class RenderSummary(NamedTuple):
+    charts: int
+    failed: int
+    grids: int
+    elapsed: float
+    peak_rss_mb: Optional[float]          # this process
+    worker_peak_rss_mb: Optional[float]   # largest rendering process
+
+    @property
+    def charts_per_second(self):
+        return self.charts / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        rss = "n/a" if self.peak_rss_mb is None else f"{self.peak_rss_mb:.0f} MB"
+        if self.worker_peak_rss_mb is not None:
+            rss += f" (workers {self.worker_peak_rss_mb:.0f} MB)"
+        return (f"Rendered {self.charts} charts ({self.failed} failed) and {self.grids} grids "
+                f"in {self.elapsed:.2f}s - {self.charts_per_second:.1f} charts/s, peak RSS {rss}")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _slug(column):
+    return re.sub(r"[^0-9A-Za-z]+", "_", column).strip("_")
+
+
+def chart_filename(ticker, column, fmt):
+    return f"{ticker}_{_slug(column)}.{fmt}"
+
+
+# === REUSABLE FIGURES ===
+class TrendFigure:
+    """
+    One trend chart (same look as visualize.plot_trend) whose line, title
+    and labels are updated in place for every chart it renders.
+    """
+
+    def __init__(self, figsize=(10, 5), dpi=100):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        (self.line,) = self.ax.plot([], [], marker="o", linestyle="-")
+        self.ax.xaxis_date()
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
+        self.ax.tick_params(axis="x", labelrotation=30)
+        self.ax.set_xlabel("Quarter")
+        self.ax.grid(True)
+        self.figure.subplots_adjust(left=0.1, right=0.97, top=0.92, bottom=0.18)
+
+    def render(self, dates, values, title, ylabel, target, fmt="png"):
+        self.line.set_data(mdates.date2num(dates), values)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_title(title)
+        self.ax.set_ylabel(ylabel)
+        self.figure.savefig(target, format=fmt)
+
+
+# Per-process figure pool, keyed by (figsize, dpi)
+_figures = {}
+
+
+def trend_figure(figsize=(10, 5), dpi=100):
+    """The pooled TrendFigure of this size, created on first use."""
+    key = (tuple(figsize), dpi)
+    if key not in _figures:
+        _figures[key] = TrendFigure(figsize, dpi)
+    return _figures[key]
+
+
+def render_grid(panels, target, title, fmt="png", ncols=GRID_COLUMNS):
+    """
+    Small-multiples page: one mini trend per (ticker, dates, values) panel,
+    green when the last value is above the first, red otherwise.
+    """
+    nrows = max(1, -(-len(panels) // ncols))
+    height = nrows * 1.5 + 0.8
+    figure = Figure(figsize=(ncols * 2.2, height), dpi=100)
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(nrows, ncols, squeeze=False)
+    for ax, (ticker, dates, values) in zip(axes.flat, panels):
+        finite = values[np.isfinite(values)]
+        rising = len(finite) > 1 and finite[-1] > finite[0]
+        ax.plot(mdates.date2num(dates), values, color="#2ca02c" if rising else "#d62728", linewidth=1.2)
+        ax.set_title(ticker, fontsize=8)
+        ax.set_xticks([])
+        ax.set_yticks([])
+    for ax in axes.flat[len(panels):]:
+        ax.set_axis_off()
+    figure.suptitle(title)
+    figure.subplots_adjust(left=0.02, right=0.98, bottom=0.02, top=1 - 0.8 / height,
+                           hspace=0.45, wspace=0.1)
+    figure.savefig(target, format=fmt)
+    figure.clear()
+
+
+# === WORKER TASKS ===
+def _render_chunk(jobs, fmt, figsize, dpi):
+    """Renders [(ticker, column, dates, values, path)]; returns (result rows, peak RSS)."""
+    rows = []
+    figure = trend_figure(figsize, dpi)
+    for ticker, column, dates, values, path in jobs:
+        try:
+            figure.render(dates, values, f"{ticker} - {column}", column, path, fmt)
+            rows.append((ticker, column, path, None))
+        except Exception as e:
+            rows.append((ticker, column, None, f"render: {type(e).__name__}: {e}"))
+    return rows, peak_rss_mb()
+
+
+def _render_grid_task(panels, path, title, column, fmt):
+    try:
+        render_grid(panels, path, title, fmt)
+        return [(None, column, path, None)], peak_rss_mb()
+    except Exception as e:
+        return [(None, column, None, f"render: {type(e).__name__}: {e}")], peak_rss_mb()
+
+
+# === UNIVERSE RUN ===
+def chart_jobs(bundles, columns, out_dir, fmt="png"):
+    """
+    Splits {ticker: StatementBundle} into chart jobs. Each column is taken
+    from the first statement that has it. Returns (jobs, skipped rows).
+    """
+    jobs, skipped = [], []
+    for ticker, bundle in bundles.items():
+        for column in columns:
+            df = next((df for df in bundle if df is not None and column in df.columns), None)
+            if df is None:
+                skipped.append((ticker, column, None, f"column '{column}' not found"))
+                continue
+            if df[column].isnull().all():
+                skipped.append((ticker, column, None, f"no valid data in column '{column}'"))
+                continue
+            path = os.path.join(out_dir, chart_filename(ticker, column, fmt))
+            jobs.append((ticker, column, df["Date"].to_numpy(), df[column].to_numpy(dtype=float), path))
+    return jobs, skipped
+
+
+def render_charts(jobs, fmt="png", workers=None, chunk_size=50, figsize=(10, 5), dpi=100,
+                  grids=(), progress=None):
+    """
+    Renders chart jobs (see chart_jobs) and grid pages on a process pool.
+
+    Args:
+        jobs: [(ticker, column, dates, values, path)]
+        workers: rendering processes; 0 renders in this process (default: one per CPU)
+        chunk_size: charts per worker task
+        grids: [(panels, path, title, column)] small-multiples pages
+        progress: optional callback(done, total) called per finished task
+
+    Returns:
+        (result rows [(ticker, column, path, error)], largest worker peak RSS
+        in MB or None). Grid pages are rows with ticker None.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {FORMATS}")
+    tasks = [(_render_chunk, (jobs[i:i + chunk_size], fmt, figsize, dpi),
+              [(t, c) for t, c, *_ in jobs[i:i + chunk_size]])
+             for i in range(0, len(jobs), chunk_size)]
+    tasks += [(_render_grid_task, (panels, path, title, column, fmt), [(None, column)])
+              for panels, path, title, column in grids]
+    total = len(jobs) + len(grids)
+    rows, worker_rss = [], []
+
+    def finish(task_rows):
+        rows.extend(task_rows)
+        if progress:
+            progress(len(rows), total)
+
+    if workers == 0:
+        for fn, args, _ in tasks:
+            finish(fn(*args)[0])
+        return rows, None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, *args): keys for fn, args, keys in tasks}
+        for future in as_completed(futures):
+            try:
+                task_rows, rss = future.result()
+            except Exception as e:
+                # Worker died or the task could not be sent to it
+                finish([(t, c, None, f"render: {type(e).__name__}: {e}") for t, c in futures[future]])
+                continue
+            worker_rss.append(rss)
+            finish(task_rows)
+    peaks = [rss for rss in worker_rss if rss is not None]
+    return rows, max(peaks) if peaks else None
+
+
+def render_universe(tickers, out_dir, columns=DEFAULT_COLUMNS, backend=None, num_quarters=8, fmt="png",
+                    fetch_workers=8, render_workers=None, chunk_size=50, grid=False, progress=None):
+    """
+    Fetches every ticker and renders one chart per (ticker, column) into out_dir.
+
+    Args:
+        tickers: iterable of ticker symbols
+        columns: statement line items to chart
+        backend: data source passed to fetch_statements (default: Yahoo Finance)
+        fmt: 'png' or 'svg'
+        fetch_workers: size of the fetching thread pool
+        render_workers: rendering processes; 0 renders in this process (default: one per CPU)
+        grid: also write small-multiples pages, grid_<column>_<page>.<fmt>
+        progress: optional callback(done, total) for the rendering phase
+
+    Returns:
+        (DataFrame of RESULT_COLUMNS, one row per (ticker, column) plus one
+        per grid page with ticker None; RenderSummary)
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    bundles, rows = {}, []
+    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+        fetches = {pool.submit(fetch_statements, t, num_quarters=num_quarters, backend=backend): t
+                   for t in tickers}
+        for future in as_completed(fetches):
+            ticker = fetches[future]
+            try:
+                bundles[ticker] = future.result()
+            except Exception as e:
+                rows += [(ticker, column, None, f"fetch: {type(e).__name__}: {e}") for column in columns]
+
+    bundles = {ticker: bundles[ticker] for ticker in tickers if ticker in bundles}
+    jobs, skipped = chart_jobs(bundles, columns, out_dir, fmt)
+    rows += skipped
+
+    grids = []
+    if grid:
+        for column in columns:
+            panels = [(ticker, dates, values) for ticker, col, dates, values, _ in jobs if col == column]
+            for page, i in enumerate(range(0, len(panels), GRID_PANELS), 1):
+                path = os.path.join(out_dir, f"grid_{_slug(column)}_{page}.{fmt}")
+                grids.append((panels[i:i + GRID_PANELS], path, f"{column} ({page})", column))
+
+    rendered, worker_rss = render_charts(jobs, fmt, render_workers, chunk_size, grids=grids, progress=progress)
+    rows += rendered
+    elapsed = time.perf_counter() - start
+
+    results = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    is_grid = results["ticker"].isna()
+    charts = results[~is_grid]
+    order = {t: i for i, t in enumerate(tickers)}
+    charts = charts.assign(_order=charts["ticker"].map(order)).sort_values(["_order", "column"])
+    results = pd.concat([charts.drop(columns="_order"), results[is_grid]], ignore_index=True)
+
+    failed = int((results["error"].notna() & results["error"].str.startswith(("fetch", "render"))).sum())
+    summary = RenderSummary(
+        charts=int(charts["path"].notna().sum()),
+        failed=failed,
+        grids=int(results.loc[is_grid, "path"].notna().sum()) if is_grid.any() else 0,
+        elapsed=elapsed,
+        peak_rss_mb=peak_rss_mb(),
+        worker_peak_rss_mb=worker_rss,
+    )
+    return results, summary
+
+
+# === CLI ===
+def _print_progress(done, total):
+    print(f"\r[{done:>{len(str(total))}}/{total}] charts rendered",
+          end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    from batch import _read_tickers
+
+    parser = argparse.ArgumentParser(description="Render trend charts for a list of tickers.")
+    parser.add_argument("tickers", nargs="?", help="file with ticker symbols (whitespace or comma separated)")
+    parser.add_argument("--out", default="charts", help="output directory")
+    parser.add_argument("--columns", nargs="+", default=DEFAULT_COLUMNS, help="line items to chart")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--grid", action="store_true", help="also write small-multiples grids per column")
+    parser.add_argument("--fixtures", help="read statements from a FixtureBackend directory")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="use N generated tickers (or synthetic data for the given tickers)")
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="rendering processes, 0 to render in-process (default: one per CPU)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if args.fixtures:
+        backend = FixtureBackend(args.fixtures)
+    elif args.synthetic is not None:
+        backend = SyntheticBackend()
+
+    if args.tickers:
+        tickers = _read_tickers(args.tickers)
+    elif args.synthetic:
+        tickers = synthetic_universe(args.synthetic)
+    else:
+        parser.error("a ticker file or --synthetic N is required")
+
+    results, summary = render_universe(
+        tickers, args.out, columns=args.columns, backend=backend, num_quarters=args.quarters,
+        fmt=args.format, fetch_workers=args.fetch_workers, render_workers=args.render_workers,
+        grid=args.grid, progress=None if args.quiet else _print_progress,
+    )
+    for row in results[results["error"].notna()].itertuples():
+        print(f"{row.ticker} {row.column}: {row.error}", file=sys.stderr)
+    print(summary, file=sys.stderr)
+    print(f"Charts written to {args.out}", file=sys.stderr)
+    return 0 if summary.charts else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Declarative scoring rules.
+
+Each metric's bands are declared as data and compiled once into an
+evaluator that scores a scalar or a whole NumPy array:
+
+    step           first matching band wins, e.g. [">=", 2, 10], [">=", 1.5, 7]
+    range          0 -> 5 below `low`, 5 -> 10 between `low` and `high`, 10 above
+    inverse_range  10 below `low`, 10 -> 5 up to `high`, falling to 0 above it
+
+A strategy is a named set of rules plus optional weights. The built-in
+strategies (FINANCIAL_HEALTH, BUFFETT, LYNCH) hold the bands the scorers
+use; custom ones are loaded from a dict or YAML file:
+
+    name: quality
+    metrics:
+      ROE:
+        source: buffett.ROE          # <scorer>.<metric> from metrics.METRICS
+        type: range
+        low: 0.12
+        high: 0.30
+        weight: 2
+      Leverage:
+        source: financial_health.Leverage
+        type: step
+        bands: [["<", 0.5, 10], ["<", 1.5, 6]]
+        otherwise: 2
+"""
+import hashlib
+import math
+import operator
+
+import numpy as np
+
+DEFAULT_MISSING_SCORE = 3.0
+
+_OPS = {
+    ">": (operator.gt, np.greater),
+    ">=": (operator.ge, np.greater_equal),
+    "<": (operator.lt, np.less),
+    "<=": (operator.le, np.less_equal),
+}
+
+
+class RuleError(ValueError):
+    """A rule or strategy definition is invalid."""
+
+
+def _is_missing(val):
+    return val is None or (isinstance(val, (float, np.floating)) and math.isnan(val))
+
+
+# === RULES ===
+class Rule:
+    """
+    Compiled scoring rule. Call it with a scalar (returns a float) or an
+    array (returns a float array). None always scores `missing`; NaN scores
+    `missing` too unless the rule sets nan_is_missing: false, in which case
+    NaN fails every comparison like in a plain if-ladder.
+    """
+
+    def __init__(self, name, missing=DEFAULT_MISSING_SCORE, nan_is_missing=True, weight=1.0, source=None):
+        self.name = name
+        self.missing = float(missing)
+        self.nan_is_missing = nan_is_missing
+        self.weight = float(weight)
+        self.source = source
+
+    def __call__(self, val):
+        if np.ndim(val) == 0:
+            if val is None or (self.nan_is_missing and _is_missing(val)):
+                return self.missing
+            return float(self._scalar(val))
+        values = np.asarray(val, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            scores = np.asarray(self._array(values), dtype=float)
+        if self.nan_is_missing:
+            scores = np.where(np.isnan(values), self.missing, scores)
+        return scores
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class StepRule(Rule):
+    def __init__(self, name, bands, otherwise=DEFAULT_MISSING_SCORE, nan_is_missing=False, **options):
+        super().__init__(name, nan_is_missing=nan_is_missing, **options)
+        try:
+            self.bands = [(op, float(threshold), float(score)) for op, threshold, score in bands]
+            self._compiled = [(_OPS[op], threshold, score) for op, threshold, score in self.bands]
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuleError(f"{name}: bands must be [op, threshold, score] with op in {list(_OPS)}") from e
+        self.otherwise = float(otherwise)
+
+    def _scalar(self, val):
+        for (py_op, _), threshold, score in self._compiled:
+            if py_op(val, threshold):
+                return score
+        return self.otherwise
+
+    def _array(self, values):
+        conditions = [np_op(values, threshold) for (_, np_op), threshold, _ in self._compiled]
+        return np.select(conditions, [score for _, _, score in self._compiled], default=self.otherwise)
+
+
+class RangeRule(Rule):
+    def __init__(self, name, low, high, **options):
+        super().__init__(name, **options)
+        self.low, self.high = float(low), float(high)
+        if self.high <= self.low:
+            raise RuleError(f"{name}: high must be greater than low")
+
+    def _scalar(self, val):
+        if val < self.low:
+            return max(0, 10 * (val / self.low))
+        if val > self.high:
+            return 10
+        return 5 + 5 * ((val - self.low) / (self.high - self.low))
+
+    def _array(self, values):
+        low, high = self.low, self.high
+        return np.select(
+            [values < low, values > high],
+            [np.maximum(0, 10 * (values / low)), 10.0],
+            default=5 + 5 * ((values - low) / (high - low)),
+        )
+
+
+class InverseRangeRule(RangeRule):
+    def _scalar(self, val):
+        if val < self.low:
+            return 10
+        if val > self.high:
+            return max(0, 10 - (10 * (val - self.high) / self.high))
+        return 10 - (5 * ((val - self.low) / (self.high - self.low)))
+
+    def _array(self, values):
+        low, high = self.low, self.high
+        return np.select(
+            [values < low, values > high],
+            [10.0, np.maximum(0, 10 - (10 * (values - high) / high))],
+            default=10 - (5 * ((values - low) / (high - low))),
+        )
+
+
+RULE_TYPES = {
+    "step": StepRule,
+    "range": RangeRule,
+    "inverse_range": InverseRangeRule,
+}
+
+
+def compile_rule(name, spec):
+    """Builds a Rule from its declaration (a dict with a 'type' key)."""
+    spec = dict(spec)
+    kind = spec.pop("type", None)
+    if kind not in RULE_TYPES:
+        raise RuleError(f"{name}: unknown rule type {kind!r}; expected one of {list(RULE_TYPES)}")
+    try:
+        return RULE_TYPES[kind](name, **spec)
+    except TypeError as e:
+        raise RuleError(f"{name}: {e}") from e
+
+
+# === STRATEGIES ===
+class Strategy:
+    """
+    Named set of compiled rules. The overall score is the weighted mean of
+    the rule scores.
+    """
+
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = dict(rules)
+
+    def __getitem__(self, metric):
+        return self.rules[metric]
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def score(self, values):
+        """
+        Scores {metric: value} (missing metrics score as missing) and returns
+        (overall, {metric: score}).
+        """
+        scores = {name: rule(values.get(name)) for name, rule in self.rules.items()}
+        weights = [rule.weight for rule in self.rules.values()]
+        overall = sum(w * s for w, s in zip(weights, scores.values())) / sum(weights)
+        return overall, scores
+
+    def score_records(self, records):
+        """Scores MetricRecords (from any of the scorers) by each rule's source metric."""
+        by_source = {(r.definition.scorer, r.name): r.value for r in records}
+        return self.score({name: by_source.get(rule.source) for name, rule in self.rules.items()})
+
+    def score_batch(self, batch):
+        """
+        Scores every ticker of a metrics.MetricBatch in one vectorized pass.
+        Returns a DataFrame indexed by ticker with one column per rule plus 'Overall'.
+        """
+        import pandas as pd
+
+        from metrics import METRIC_IDS
+
+        columns = {}
+        for name, rule in self.rules.items():
+            if rule.source not in METRIC_IDS:
+                raise RuleError(f"{self.name}.{name}: unknown source metric {rule.source!r}")
+            columns[name] = rule(batch.array["value"][:, METRIC_IDS[rule.source]])
+        weights = np.array([rule.weight for rule in self.rules.values()])
+        stacked = np.column_stack(list(columns.values()))
+        columns["Overall"] = stacked @ weights / weights.sum()
+        return pd.DataFrame(columns, index=pd.Index(batch.tickers, name="ticker"))
+
+    def fingerprint(self):
+        """Hex digest of the rule definitions; changes with any band, weight or source."""
+        parts = [self.name] + [
+            (metric, type(rule).__name__, sorted((k, v) for k, v in vars(rule).items() if not k.startswith("_")))
+            for metric, rule in self.rules.items()
+        ]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def __repr__(self):
+        return f"Strategy({self.name!r}, {list(self.rules)})"
+
+
+def compile_strategy(spec):
+    """Builds a Strategy from a dict: {"name": ..., "metrics": {metric: rule spec}}."""
+    name = spec.get("name")
+    metrics = spec.get("metrics")
+    if not name or not isinstance(metrics, dict) or not metrics:
+        raise RuleError("a strategy needs a name and a non-empty 'metrics' mapping")
+    rules = {}
+    for metric, rule_spec in metrics.items():
+        rule_spec = dict(rule_spec)
+        source = rule_spec.pop("source", f"{name}.{metric}")
+        scorer, _, source_metric = source.partition(".")
+        rules[metric] = compile_rule(metric, dict(rule_spec, source=(scorer, source_metric)))
+    return Strategy(name, rules)
+
+
+def load_strategy(source):
+    """
+    Loads a strategy from a dict, a YAML/JSON file path, or a YAML string.
+    YAML needs PyYAML; JSON files work without it.
+    """
+    if isinstance(source, dict):
+        return compile_strategy(source)
+    text = source
+    if "\n" not in source and (source.endswith((".yaml", ".yml", ".json"))):
+        with open(source) as f:
+            text = f.read()
+        if source.endswith(".json"):
+            import json
+            return compile_strategy(json.loads(text))
+    try:
+        import yaml
+    except ImportError as e:
+        raise RuleError("loading YAML strategies requires PyYAML (pip install pyyaml)") from e
+    return compile_strategy(yaml.safe_load(text))
+
+
+# === BUILT-IN STRATEGIES (the bands used by score.py, buffett_score.py and lynch.py) ===
+FINANCIAL_HEALTH_SPEC = {
+    "name": "financial_health",
+    "metrics": {
+        "Liquidity": {"type": "step", "bands": [[">=", 2, 10], [">=", 1.5, 7]]},
+        "Leverage": {"type": "step", "bands": [["<", 0.5, 10], ["<", 1, 7], ["<", 2, 5]]},
+        "Cash Safety": {"type": "step", "bands": [[">", 0.1, 10], [">", 0.05, 7]]},
+        "Revenue Growth": {"type": "step", "bands": [[">", 10, 10], [">", 5, 7]]},
+        "Gross Margin": {"type": "step", "bands": [[">", 0.4, 10], [">", 0.2, 7]]},
+        "Net Margin": {"type": "step", "bands": [[">", 0.2, 10], [">", 0.1, 7]]},
+        "Net Income Growth": {"type": "step", "bands": [[">", 10, 10], [">", 5, 7]]},
+        "FCF Positivity": {"type": "step", "bands": [[">", 0, 10]]},
+    },
+}
+
+BUFFETT_SPEC = {
+    "name": "buffett",
+    "metrics": {
+        "Owner Earnings": {"type": "step", "bands": [[">", 0, 10]], "otherwise": 0},
+        "ROE": {"type": "range", "low": 0.15, "high": 0.25},
+        "ROIC": {"type": "range", "low": 0.15, "high": 0.25},
+        "Debt-to-Equity": {"type": "inverse_range", "low": 0, "high": 2},
+        "EPS Growth": {"type": "range", "low": 0.05, "high": 0.15},
+        "FCFF": {"type": "step", "bands": [[">", 0, 10]], "otherwise": 0},
+        "Gross Margin": {"type": "range", "low": 0.4, "high": 0.6},
+        "Net Margin": {"type": "range", "low": 0.1, "high": 0.3},
+    },
+}
+
+LYNCH_SPEC = {
+    "name": "lynch",
+    "metrics": {
+        "EPS Growth %": {"type": "step", "bands": [[">=", 20, 10], [">=", 10, 7], [">=", 5, 5], [">", 0, 4]],
+                         "otherwise": 1},
+        "PEG Ratio": {"type": "step", "bands": [["<", 1, 10], ["<", 2, 7]]},
+        "Debt-to-Equity": {"type": "step", "bands": [["<", 0.5, 10], ["<", 1, 7], ["<", 2, 5]], "otherwise": 1},
+        "Net Cash Position": {"type": "step", "bands": [[">", 0, 10], [">", -1e9, 5]], "otherwise": 1},
+    },
+}
+
+FINANCIAL_HEALTH = compile_strategy(FINANCIAL_HEALTH_SPEC)
+BUFFETT = compile_strategy(BUFFETT_SPEC)
+LYNCH = compile_strategy(LYNCH_SPEC)
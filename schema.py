@@ -0,0 +1,244 @@
+"""
+Canonical statement schema.
+
+Yahoo Finance has renamed most statement line items over the years
+("Total Liab" became "Total Liabilities Net Minority Interest", "Cash"
+became "Cash And Cash Equivalents", ...), and saved fixtures may use either
+spelling. canonicalize() maps every known spelling onto one canonical name
+(the current Yahoo one) and casts the values to float64. It runs once per
+frame when a statement is prepared, so the scorers only ever look up the
+canonical names.
+
+Spellings are matched case-, space- and punctuation-insensitively, so
+"TotalRevenue", "total_revenue" and "Total Revenue" are the same key.
+Columns that match no entry keep their name and are logged (once per
+statement and column) on the "schema" logger; unmapped_columns() returns
+how often each was seen.
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("schema")
+
+# Canonical name -> older or alternative spellings of the same line item
+ALIASES = {
+    "balance_sheet": {
+        "Total Assets": ["Total Asset"],
+        "Current Assets": ["Total Current Assets"],
+        "Current Liabilities": ["Total Current Liabilities"],
+        "Total Liabilities Net Minority Interest": ["Total Liab", "Total Liabilities"],
+        "Total Non Current Liabilities Net Minority Interest": ["Total Non Current Liabilities"],
+        "Stockholders Equity": ["Total Stockholder Equity", "Total Stockholders Equity"],
+        "Total Equity Gross Minority Interest": ["Total Equity"],
+        "Common Stock Equity": [],
+        "Cash And Cash Equivalents": ["Cash", "Cash And Equivalents"],
+        "Cash Cash Equivalents And Short Term Investments": ["Cash And Short Term Investments"],
+        "Other Short Term Investments": ["Short Term Investments"],
+        "Receivables": ["Net Receivables"],
+        "Accounts Receivable": [],
+        "Inventory": [],
+        "Other Current Assets": [],
+        "Net PPE": ["Property Plant Equipment", "Net Property Plant And Equipment"],
+        "Goodwill": ["Good Will"],
+        "Other Intangible Assets": ["Intangible Assets"],
+        "Long Term Equity Investment": ["Long Term Investments"],
+        "Other Non Current Assets": ["Other Assets"],
+        "Accounts Payable": [],
+        "Current Debt": ["Short Long Term Debt", "Short Term Debt"],
+        "Long Term Debt": [],
+        "Total Debt": [],
+        "Net Debt": [],
+        "Other Current Liabilities": ["Other Current Liab"],
+        "Other Non Current Liabilities": ["Other Liab"],
+        "Retained Earnings": [],
+        "Common Stock": [],
+        "Capital Stock": [],
+        "Additional Paid In Capital": ["Capital Surplus"],
+        "Treasury Stock": [],
+        "Other Equity Interest": ["Other Stockholder Equity"],
+        "Minority Interest": [],
+        "Net Tangible Assets": [],
+        "Tangible Book Value": [],
+        "Working Capital": [],
+        "Invested Capital": [],
+        "Total Capitalization": [],
+        "Ordinary Shares Number": ["Common Stock Shares Outstanding"],
+        "Share Issued": [],
+        "Treasury Shares Number": [],
+    },
+    "income_statement": {
+        "Total Revenue": ["Revenues", "Revenue"],
+        "Operating Revenue": [],
+        "Cost Of Revenue": [],
+        "Gross Profit": [],
+        "Research And Development": ["Research Development"],
+        "Selling General And Administration": ["Selling General Administrative"],
+        "Operating Expense": ["Total Operating Expenses"],
+        "Total Expenses": [],
+        "Operating Income": [],
+        "Interest Expense": [],
+        "Interest Income": [],
+        "Other Income Expense": ["Total Other Income Expense Net"],
+        "Pretax Income": ["Income Before Tax"],
+        "Tax Provision": ["Income Tax Expense"],
+        "Net Income Continuous Operations": ["Net Income From Continuing Ops"],
+        "Net Income Discontinuous Operations": ["Discontinued Operations"],
+        "Minority Interests": ["Minority Interest"],
+        "Net Income": ["Net Income Applicable To Common Shares"],
+        "Net Income Common Stockholders": [],
+        "Basic Average Shares": [],
+        "Diluted Average Shares": [],
+        "Basic EPS": [],
+        "Diluted EPS": [],
+        "EBIT": [],
+        "EBITDA": [],
+        "Normalized EBITDA": [],
+        "Reconciled Depreciation": ["Depreciation"],
+        "Reconciled Cost Of Revenue": [],
+    },
+    "cash_flow": {
+        "Operating Cash Flow": ["Total Cash From Operating Activities"],
+        "Investing Cash Flow": ["Total Cashflows From Investing Activities"],
+        "Financing Cash Flow": ["Total Cash From Financing Activities"],
+        "Free Cash Flow": [],
+        "Capital Expenditure": ["Capital Expenditures"],
+        "Depreciation And Amortization": ["Depreciation"],
+        "Net Income From Continuing Operations": ["Net Income"],
+        "Stock Based Compensation": [],
+        "Change In Working Capital": [],
+        "Change In Inventory": ["Change To Inventory"],
+        "Changes In Account Receivables": ["Change To Account Receivables"],
+        "Changes In Cash": ["Change In Cash"],
+        "Cash Dividends Paid": ["Dividends Paid"],
+        "Repurchase Of Capital Stock": ["Repurchase Of Stock"],
+        "Issuance Of Capital Stock": ["Issuance Of Stock"],
+        "Net Issuance Payments Of Debt": ["Net Borrowings"],
+        "End Cash Position": [],
+        "Beginning Cash Position": [],
+    },
+}
+
+
+def normalize(name):
+    """Lookup key of a column name: lowercase alphanumerics only."""
+    return re.sub(r"[^0-9a-z]", "", str(name).lower())
+
+
+def _compile(aliases):
+    """{normalized spelling: (canonical, priority)}; the canonical spelling ranks first."""
+    index = {}
+    for canonical, spellings in aliases.items():
+        for priority, spelling in enumerate([canonical] + spellings):
+            key = normalize(spelling)
+            if key in index and index[key][0] != canonical:
+                raise ValueError(f"{spelling!r} is listed under both {index[key][0]!r} and {canonical!r}")
+            index.setdefault(key, (canonical, priority))
+    return index
+
+
+INDEX = {statement: _compile(aliases) for statement, aliases in ALIASES.items()}
+
+
+# === COLUMN RESOLUTION ===
+class Resolution(NamedTuple):
+    """How the columns of one frame map onto the canonical schema."""
+    renames: dict      # source column -> canonical name (only columns that change)
+    unmapped: list     # columns matching no schema entry, kept as they are
+    shadowed: list     # aliases kept as they are because a better spelling of the same item is present
+
+
+# Per-statement memo of raw column name -> (canonical, priority) or None.
+# Yahoo returns the same few hundred names for every ticker, so after the
+# first frames resolution is one dict lookup per column.
+_resolved = {statement: {} for statement in ALIASES}
+_unmapped_counts = Counter()
+_shadowed_logged = set()
+_lock = threading.Lock()
+
+
+def _lookup(statement, column):
+    memo = _resolved[statement]
+    try:
+        return memo[column]
+    except KeyError:
+        hit = INDEX[statement].get(normalize(column))
+        memo[column] = hit
+        return hit
+
+def resolve_columns(statement, columns):
+    """
+    Maps column names of a `statement` frame onto canonical names. When a
+    frame holds several spellings of one item, the canonical spelling (or
+    else the earliest listed alias) takes the name and the others are
+    reported as shadowed.
+    """
+    if statement not in INDEX:
+        raise ValueError(f"unknown statement {statement!r}; expected one of {list(INDEX)}")
+    best = {}
+    unmapped = []
+    for column in columns:
+        hit = _lookup(statement, column)
+        if hit is None:
+            unmapped.append(column)
+            continue
+        canonical, priority = hit
+        if canonical not in best or priority < best[canonical][1]:
+            best[canonical] = (column, priority)
+
+    renames = {column: canonical for canonical, (column, _) in best.items() if column != canonical}
+    winners = {column for column, _ in best.values()}
+    shadowed = [column for column in columns
+                if column not in winners and _lookup(statement, column) is not None]
+    return Resolution(renames, unmapped, shadowed)
+
+
+def _log_unmapped(statement, columns):
+    with _lock:
+        new = [column for column in columns if (statement, column) not in _unmapped_counts]
+        _unmapped_counts.update((statement, column) for column in columns)
+    for column in new:
+        logger.info("%s: no schema entry for column %r, kept as is", statement, column)
+
+def _log_shadowed(statement, columns):
+    with _lock:
+        new = [column for column in columns if (statement, column) not in _shadowed_logged]
+        _shadowed_logged.update((statement, column) for column in new)
+    for column in new:
+        logger.info("%s: column %r is another spelling of a column already present, kept as is",
+                    statement, column)
+
+
+# === FRAMES ===
+def canonicalize(statement, df):
+    """
+    Returns `df` (line items as columns) with canonical column names and
+    float64 values. Non-numeric cells become NaN. Unmapped and shadowed
+    columns keep their names; unmapped ones are logged.
+    """
+    resolution = resolve_columns(statement, list(df.columns))
+    if resolution.unmapped:
+        _log_unmapped(statement, resolution.unmapped)
+    if resolution.shadowed:
+        _log_shadowed(statement, resolution.shadowed)
+
+    if resolution.renames:
+        df = df.rename(columns=resolution.renames)
+    try:
+        return df.astype(np.float64)
+    except (TypeError, ValueError):
+        return df.apply(pd.to_numeric, errors="coerce").astype(np.float64)
+
+
+def unmapped_columns(statement=None):
+    """Counter of {(statement, column): frames seen} for columns with no schema entry."""
+    with _lock:
+        counts = Counter(_unmapped_counts)
+    if statement is not None:
+        counts = Counter({key: n for key, n in counts.items() if key[0] == statement})
+    return counts
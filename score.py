@@ -1,3 +1,8 @@
+from rules import FINANCIAL_HEALTH
+from tracing import traced
+
+
+@traced()
 def score_full_company(bs_df, is_df, cf_df):
     """
     Scores the company financial health by calculating:
@@ -147,74 +152,27 @@ def average_scores(metrics_dict):
         return 3.0  # default low score if no data
     return sum(scores) / len(scores)
 
+# Bands are declared in rules.FINANCIAL_HEALTH
 def score_liquidity(val):
-    if val is None:
-        return 3.0
-    if val >= 2:
-        return 10
-    if val >= 1.5:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Liquidity"](val)
 
 def score_leverage(val):
-    if val is None:
-        return 3.0
-    if val < 0.5:
-        return 10
-    if val < 1:
-        return 7
-    if val < 2:
-        return 5
-    return 3
+    return FINANCIAL_HEALTH["Leverage"](val)
 
 def score_cash_safety(val):
-    if val is None:
-        return 3.0
-    if val > 0.1:
-        return 10
-    if val > 0.05:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Cash Safety"](val)
 
 def score_revenue_growth(val):
-    if val is None:
-        return 3.0
-    if val > 10:
-        return 10
-    if val > 5:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Revenue Growth"](val)
 
 def score_gross_margin(val):
-    if val is None:
-        return 3.0
-    if val > 0.4:
-        return 10
-    if val > 0.2:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Gross Margin"](val)
 
 def score_net_margin(val):
-    if val is None:
-        return 3.0
-    if val > 0.2:
-        return 10
-    if val > 0.1:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Net Margin"](val)
 
 def score_net_income_growth(val):
-    if val is None:
-        return 3.0
-    if val > 10:
-        return 10
-    if val > 5:
-        return 7
-    return 3
+    return FINANCIAL_HEALTH["Net Income Growth"](val)
 
 def score_positive_fcf(val):
-    if val is None:
-        return 3.0
-    if val > 0:
-        return 10
-    return 3
+    return FINANCIAL_HEALTH["FCF Positivity"](val)
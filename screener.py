@@ -0,0 +1,476 @@
+"""
+Screener over a scored universe.
+
+Every breakdown metric of the three scorers (plus the overall scores) is
+held as one float64 column per metric, each with a sorted index built
+once, so questions over thousands of tickers are answered without
+rerunning any scorer:
+
+    screener = Screener.load("scores.parquet")      # from batch.py --metrics
+    screener.query("ROIC > 15% and buffett.Debt_to_Equity < 0.5 "
+                   "and lynch.EPS_Growth > 20% order by financial_health desc limit 20")
+
+Query language:
+    filter      comparisons (>, >=, <, <=, =, !=) between a column and a
+                number or another column, combined with and / or / not and
+                parentheses. Missing (NaN) values never match.
+    order by    one or more columns, each asc or desc (default desc)
+    limit       number of rows returned (default: `limit` argument)
+
+Columns are named <scorer>.<metric> as in metrics.METRICS (or just the
+metric when only one scorer has it), or financial_health / buffett /
+lynch for the overall scores. Names match case-, space- and
+punctuation-insensitively; quote exact names in backticks. Numbers take
+k/M/B/T suffixes and `%`, which follows the metric's unit: `ROIC > 15%`
+compares with 0.15, `lynch.EPS_Growth > 20%` with 20 (already in percent).
+
+Usage:
+    python screener.py scores.parquet "ROIC > 15% order by buffett desc limit 10"
+    python screener.py --synthetic 500 "financial_health >= 6"
+"""
+import argparse
+import functools
+import re
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from metrics import METRICS, PERCENT_POINTS, SCORERS, MetricBatch
+from schema import normalize
+
+DEFAULT_LIMIT = 50
+OVERALL_COLUMNS = list(SCORERS) + ["balance_sheet_score", "income_statement_score", "cash_flow_score"]
+METRIC_KINDS = {f"{m.scorer}.{m.name}": m.kind for m in METRICS}
+
+
+class QueryError(ValueError):
+    """The query could not be parsed or names an unknown column."""
+
+
+# === QUERY LANGUAGE ===
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)(?P<suffix>%|[kKMBT](?![\w.]))?
+      | `(?P<quoted>[^`]+)`
+      | (?P<name>[A-Za-z_][\w.%]*)
+      | (?P<op>>=|<=|!=|==|=|>|<)
+      | (?P<punct>[(),-])
+    )""", re.VERBOSE)
+
+_SCALE = {"k": 1e3, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+_KEYWORDS = {"and", "or", "not", "order", "sort", "by", "asc", "desc", "limit"}
+
+
+class Number(NamedTuple):
+    value: float
+    percent: bool    # written with %, scaled by the compared column's unit
+
+
+class Query(NamedTuple):
+    """A parsed query: filter tree (None for all rows), [(column, descending)], limit."""
+    where: object
+    order: list
+    limit: object
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"unexpected {text[pos:pos + 12]!r} at position {pos}")
+        pos = match.end()
+        if match["number"] is not None:
+            suffix = match["suffix"]
+            value = float(match["number"]) * _SCALE.get(suffix, 1)
+            tokens.append(("number", Number(value, suffix == "%")))
+        elif match["quoted"] is not None:
+            tokens.append(("column", match["quoted"]))
+        elif match["name"] is not None:
+            word = match["name"]
+            tokens.append(("keyword", word.lower()) if word.lower() in _KEYWORDS else ("column", word))
+        else:
+            tokens.append(("op", match["op"] or match["punct"]))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the token list; builds nested tuples."""
+
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if (kind and token[0] != kind) or (value and token[1] != value):
+            return None
+        return token
+
+    def take(self, kind=None, value=None):
+        token = self.peek(kind, value)
+        if token is None:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of query"
+            raise QueryError(f"expected {value or kind}, found {found!r}")
+        self.pos += 1
+        return token[1]
+
+    def query(self):
+        where = None
+        if self.peek() and not (self.peek("keyword", "order") or self.peek("keyword", "sort")
+                                or self.peek("keyword", "limit")):
+            where = self.disjunction()
+        order = []
+        if self.peek("keyword", "order") or self.peek("keyword", "sort"):
+            self.pos += 1
+            self.take("keyword", "by")
+            while True:
+                column = self.take("column")
+                descending = True
+                if self.peek("keyword", "asc") or self.peek("keyword", "desc"):
+                    descending = self.take() == "desc"
+                order.append((column, descending))
+                if not self.peek("op", ","):
+                    break
+                self.pos += 1
+        limit = None
+        if self.peek("keyword", "limit"):
+            self.pos += 1
+            limit = int(self.take("number").value)
+        if self.peek():
+            raise QueryError(f"unexpected {self.tokens[self.pos][1]!r}")
+        return Query(where, order, limit)
+
+    def disjunction(self):
+        node = self.conjunction()
+        while self.peek("keyword", "or"):
+            self.pos += 1
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.factor()
+        while self.peek("keyword", "and"):
+            self.pos += 1
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self):
+        if self.peek("keyword", "not"):
+            self.pos += 1
+            return ("not", self.factor())
+        if self.peek("op", "("):
+            self.pos += 1
+            node = self.disjunction()
+            self.take("op", ")")
+            return node
+        left = self.operand()
+        op = self.take("op")
+        if op not in (">", ">=", "<", "<=", "=", "==", "!="):
+            raise QueryError(f"expected a comparison, found {op!r}")
+        return ("cmp", "=" if op == "==" else op, left, self.operand())
+
+    def operand(self):
+        if self.peek("op", "-"):
+            self.pos += 1
+            number = self.take("number")
+            return Number(-number.value, number.percent)
+        if self.peek("number"):
+            return self.take()
+        return ("column", self.take("column"))
+
+
+@functools.lru_cache(maxsize=256)
+def parse(text):
+    """Parses a query string into a Query (cached, queries repeat in the page)."""
+    return _Parser(text).query()
+
+
+# === SCREENER ===
+class ColumnIndex(NamedTuple):
+    """
+    Row ids of one column sorted ascending and descending (ties in row
+    order, NaNs last in both) and the ascending sorted values.
+    """
+    order: np.ndarray
+    descending: np.ndarray
+    values: np.ndarray
+    valid: int           # number of non-NaN values
+
+    @classmethod
+    def build(cls, column):
+        order = np.argsort(column, kind="stable")
+        descending = np.argsort(-column, kind="stable")
+        return cls(order, descending, column[order], int(np.count_nonzero(~np.isnan(column))))
+
+    def rows(self, op, x):
+        """Row ids whose value satisfies `value <op> x`."""
+        values = self.values[:self.valid]
+        if op == ">":
+            return self.order[np.searchsorted(values, x, "right"):self.valid]
+        if op == ">=":
+            return self.order[np.searchsorted(values, x, "left"):self.valid]
+        if op == "<":
+            return self.order[:np.searchsorted(values, x, "left")]
+        if op == "<=":
+            return self.order[:np.searchsorted(values, x, "right")]
+        lo, hi = np.searchsorted(values, x, "left"), np.searchsorted(values, x, "right")
+        if op == "=":
+            return self.order[lo:hi]
+        return np.concatenate([self.order[:lo], self.order[hi:self.valid]])
+
+
+class ScreenResult(NamedTuple):
+    """Rows of a query: tickers in result order and the shown columns."""
+    tickers: list
+    columns: dict       # column name -> values in result order
+    matched: int        # rows passing the filter, before the limit
+    elapsed: float      # seconds
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.columns, index=pd.Index(self.tickers, name="ticker"))
+
+    def __str__(self):
+        return f"{self.matched} matched, {len(self.tickers)} shown in {self.elapsed * 1000:.2f} ms"
+
+
+_FLIP = {">": "<", ">=": "<=", "<": ">", "<=": ">=", "=": "=", "!=": "!="}
+_COMPARE = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+            "=": np.equal, "!=": np.not_equal}
+
+
+class Screener:
+    """
+    Columnar metric table of a scored universe with a sorted index per
+    column. Immutable: build a new one after the next batch run.
+    """
+
+    def __init__(self, tickers, columns):
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.columns = {name: np.ascontiguousarray(values, dtype=np.float64) for name, values in columns.items()}
+        for name, values in self.columns.items():
+            if len(values) != len(self.tickers):
+                raise ValueError(f"column {name!r} has {len(values)} rows for {len(self.tickers)} tickers")
+        self.indexes = {name: ColumnIndex.build(values) for name, values in self.columns.items()}
+
+        # Lookup keys: full normalized name, and the metric part alone when unambiguous
+        self._names = {}
+        by_metric = {}
+        for name in self.columns:
+            self._names[_key(name)] = name
+            if "." in name:
+                by_metric.setdefault(_key(name.split(".", 1)[1]), []).append(name)
+        self._ambiguous = {}
+        for key, names in by_metric.items():
+            if key in self._names:
+                continue
+            if len(names) == 1:
+                self._names[key] = names[0]
+            else:
+                self._ambiguous[key] = names
+
+    # --- construction ---
+    @classmethod
+    def from_batch(cls, batch):
+        """From a metrics.MetricBatch: overall scores plus every metric's value."""
+        columns = {scorer: batch.overall[scorer] for scorer in SCORERS}
+        for m in METRICS:
+            columns[f"{m.scorer}.{m.name}"] = batch.array["value"][:, m.id]
+        return cls(batch.tickers, columns)
+
+    @classmethod
+    def from_bundles(cls, bundles):
+        """Scores every {ticker: bundle} (see MetricBatch.from_bundles)."""
+        return cls.from_batch(MetricBatch.from_bundles(bundles))
+
+    @classmethod
+    def from_results(cls, results):
+        """From a batch.py result table; every numeric column becomes a column."""
+        numeric = results.drop(columns=["ticker"]).select_dtypes("number")
+        return cls(results["ticker"].tolist(), {name: numeric[name].to_numpy() for name in numeric.columns})
+
+    @classmethod
+    def load(cls, path):
+        """Reads a batch.py result file (.parquet or .csv), ideally written with --metrics."""
+        import pandas as pd
+
+        results = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+        return cls.from_results(results)
+
+    # --- queries ---
+    def resolve(self, name):
+        """The column a query name refers to."""
+        if name in self.columns:
+            return name
+        key = _key(name)
+        if key in self._names:
+            return self._names[key]
+        if key in self._ambiguous:
+            raise QueryError(f"{name!r} is ambiguous: {', '.join(self._ambiguous[key])}")
+        raise QueryError(f"unknown column {name!r}")
+
+    def _literal(self, number, column):
+        if number.percent and METRIC_KINDS.get(column) != PERCENT_POINTS:
+            return number.value / 100
+        return number.value
+
+    def _mask(self, node):
+        kind = node[0]
+        if kind == "and":
+            return self._mask(node[1]) & self._mask(node[2])
+        if kind == "or":
+            return self._mask(node[1]) | self._mask(node[2])
+        if kind == "not":
+            # Rows missing any column of the negated expression still never match
+            mask = ~self._mask(node[1])
+            for name in _filter_columns(node[1]):
+                mask &= ~np.isnan(self.columns[self.resolve(name)])
+            return mask
+
+        _, op, left, right = node
+        if isinstance(left, Number):
+            left, right, op = right, left, _FLIP[op]
+        if isinstance(left, Number):
+            raise QueryError("a comparison needs at least one column")
+        column = self.resolve(left[1])
+        if isinstance(right, Number):
+            mask = np.zeros(len(self.tickers), dtype=bool)
+            mask[self.indexes[column].rows(op, self._literal(right, column))] = True
+            return mask
+        values, other = self.columns[column], self.columns[self.resolve(right[1])]
+        # NaN != x is True, so rows missing either side are masked out explicitly
+        with np.errstate(invalid="ignore"):
+            return _COMPARE[op](values, other) & ~np.isnan(values) & ~np.isnan(other)
+
+    def _ordered(self, rows, order):
+        """`rows` (ids passing the filter) in query order; NaN sort keys go last."""
+        if len(order) == 1:
+            # Walk the precomputed index instead of sorting the matches
+            (column, descending), = order
+            ids = self.indexes[column].descending if descending else self.indexes[column].order
+            keep = np.zeros(len(self.tickers), dtype=bool)
+            keep[rows] = True
+            return ids[keep[ids]]
+        keys = []
+        for column, descending in reversed(order):
+            values = self.columns[column][rows]
+            values = -values if descending else values
+            keys.append(np.where(np.isnan(values), np.inf, values))
+        return rows[np.lexsort(keys)]
+
+    def query(self, text, limit=DEFAULT_LIMIT, columns=None):
+        """
+        Runs a query and returns a ScreenResult with the overall scores, every
+        column the query mentions and any extra `columns`.
+        """
+        start = time.perf_counter()
+        parsed = parse(text)
+        order = [(self.resolve(name), descending) for name, descending in parsed.order]
+        if parsed.where is None:
+            rows = np.arange(len(self.tickers))
+        else:
+            rows = np.flatnonzero(self._mask(parsed.where))
+        matched = len(rows)
+        if order:
+            rows = self._ordered(rows, order)
+        limit = parsed.limit if parsed.limit is not None else limit
+        if limit is not None:
+            rows = rows[:limit]
+
+        shown = [name for name in OVERALL_COLUMNS if name in self.columns]
+        shown += [self.resolve(name) for name in _columns_in(parsed) + list(columns or [])]
+        values = {name: self.columns[name][rows] for name in dict.fromkeys(shown)}
+        return ScreenResult(self.tickers[rows].tolist(), values, matched, time.perf_counter() - start)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for v in self.columns.values()) + sum(
+            i.order.nbytes + i.descending.nbytes + i.values.nbytes for i in self.indexes.values())
+
+
+def _key(name):
+    return ".".join(normalize(part) for part in name.split(".", 1))
+
+
+def _filter_columns(node):
+    """Column names used in a filter expression."""
+    names = []
+
+    def walk(node):
+        if node is None:
+            return
+        if node[0] in ("and", "or"):
+            walk(node[1])
+            walk(node[2])
+        elif node[0] == "not":
+            walk(node[1])
+        else:
+            names.extend(side[1] for side in node[2:] if not isinstance(side, Number))
+    walk(node)
+    return names
+
+
+def _columns_in(query):
+    return [name for name, _ in query.order] + _filter_columns(query.where)
+
+
+def screen(source, text, limit=DEFAULT_LIMIT):
+    """One-off query over a results file, result DataFrame, MetricBatch or Screener."""
+    if isinstance(source, str):
+        source = Screener.load(source)
+    elif isinstance(source, MetricBatch):
+        source = Screener.from_batch(source)
+    elif not isinstance(source, Screener):
+        source = Screener.from_results(source)
+    return source.query(text, limit=limit)
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a scored universe (batch.py --metrics output).")
+    parser.add_argument("source", nargs="?", help="batch.py result file (.parquet or .csv)")
+    parser.add_argument("query", nargs="+", help="filter / order by / limit expression")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="score N synthetic tickers instead")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    if args.synthetic:
+        from data_fetcher import fetch_statements
+        from fetch_backend import SyntheticBackend, synthetic_universe
+
+        backend = SyntheticBackend()
+        # source is optional, so with --synthetic it is the first query word
+        text = " ".join(([args.source] if args.source else []) + args.query)
+        screener = Screener.from_bundles({t: fetch_statements(t, backend=backend, cache=None)
+                                          for t in synthetic_universe(args.synthetic)})
+    elif args.source:
+        text = " ".join(args.query)
+        screener = Screener.load(args.source)
+    else:
+        parser.error("a result file or --synthetic N is required")
+
+    try:
+        result = screener.query(text, limit=args.limit)
+    except QueryError as e:
+        print(f"Query error: {e}", file=sys.stderr)
+        return 2
+    with pd.option_context("display.width", 200, "display.max_columns", 12):
+        print(result.to_frame())
+    print(result, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
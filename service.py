@@ -0,0 +1,507 @@
+"""
+HTTP scoring service.
+
+Exposes the three scorers over a JSON API so other systems can use them
+without Streamlit. Statements are fetched in threads through one shared
+StatementCache (concurrent requests for the same ticker share one fetch);
+scoring runs on a pool of worker processes that are started and warmed up
+when the service starts.
+
+Endpoints:
+    GET  /health
+    GET  /score/{ticker}?scorers=financial_health,buffett&quarters=8
+    POST /score          {"ticker": "AAPL"} or {"ticker": "X", "statements": {<statement>: <raw payload>}}
+    POST /score/batch    {"items": [<POST /score body>, ...]}
+    GET  /metrics        Prometheus text format (latency histograms, counters, cache stats)
+
+Raw statement payloads use async_fetcher.raw_to_payload()'s layout: yfinance
+shaped (line items as rows) in pandas "split" orient with ISO dates.
+
+Usage:
+    python service.py --port 8080
+    python service.py --synthetic --workers 2          # fake data, for load tests
+    python -m benchmarks.bench_service --requests 2000 # bundled load generator
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import math
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from data_fetcher import StatementBundle, fetch_statements, prepare_statement
+from fetch_backend import STATEMENTS, FixtureBackend, SyntheticBackend
+from statement_cache import StatementCache, get_default_cache
+
+SCORERS = ("financial_health", "buffett", "lynch")
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_BATCH_ITEMS = 1000
+_DEFAULT_CACHE = object()
+
+
+class RequestError(Exception):
+    """A request the service cannot answer; carries the HTTP status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# === METRICS ===
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Prometheus-style latency histogram with one series per label set."""
+
+    def __init__(self, name, help, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = _labels(self.labelnames, key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter with one series per label set."""
+
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+# === WORKER SIDE ===
+def _jsonable(value):
+    """Scores and breakdowns with NumPy scalars as floats and NaN/inf as None."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (float, np.floating, np.integer)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+def _bundle_from_payloads(statements, num_quarters):
+    from async_fetcher import raw_from_payload
+
+    unknown = set(statements) - set(STATEMENTS)
+    if unknown:
+        raise ValueError(f"unknown statements {sorted(unknown)}; expected {list(STATEMENTS)}")
+    return StatementBundle(*(
+        prepare_statement(s, raw_from_payload(statements[s]), num_quarters) if s in statements else None
+        for s in STATEMENTS
+    ))
+
+def score_statements(bundle, scorers=SCORERS):
+    """
+    Runs the requested scorers on a StatementBundle. Returns
+    {scorer: {"score": float, "breakdown": {...}} or {"error": str}}.
+    """
+    from buffett_score import buffett_metrics, buffett_overall
+    from lynch import score_lynch_company
+    from score import score_full_company
+
+    results = {}
+    for scorer in scorers:
+        try:
+            if scorer == "financial_health":
+                score, breakdown = score_full_company(*bundle)
+            elif scorer == "buffett":
+                missing = [name for name, df in zip(STATEMENTS, bundle) if df is None]
+                if missing:
+                    results[scorer] = {"error": f"buffett needs statements: {', '.join(missing)}"}
+                    continue
+                records = buffett_metrics(*bundle)
+                score = buffett_overall(records)
+                breakdown = {r.name: {"value": r.value, "score": r.score} for r in records}
+            else:
+                score, breakdown = score_lynch_company(*bundle)
+            results[scorer] = {"score": score, "breakdown": breakdown}
+        except Exception as e:
+            results[scorer] = {"error": f"{type(e).__name__}: {e}"}
+    return _jsonable(results)
+
+def score_items(items, scorers):
+    """
+    Worker task: scores [(bundle or raw payloads, num_quarters)] and returns
+    one {"scores": ...} or {"error": ...} dict per item, in order.
+    """
+    out = []
+    for source, num_quarters in items:
+        try:
+            bundle = _bundle_from_payloads(source, num_quarters) if isinstance(source, dict) else source
+            if all(df is None for df in bundle):
+                raise ValueError("no statement data")
+            dates = [df["Date"].iloc[-1] for df in bundle if df is not None and len(df)]
+            out.append({
+                "statement_date": max(dates).date().isoformat() if dates else None,
+                "scores": score_statements(bundle, scorers),
+            })
+        except Exception as e:
+            out.append({"error": f"{type(e).__name__}: {e}", "status": 422})
+    return out
+
+def _warm_up(_):
+    """Imports the scorers and scores one synthetic ticker so the first request is not cold."""
+    backend = SyntheticBackend(num_quarters=8)
+    score_statements(fetch_statements("WARM", backend=backend, cache=None))
+    return os.getpid()
+
+
+# === SERVICE ===
+class ScoringService:
+    """
+    Shared state of one service instance: data backend, statement cache,
+    fetch threads, warm scoring processes and request metrics.
+
+    Args:
+        backend: data source passed to fetch_statements (default: Yahoo Finance)
+        cache: StatementCache shared by all requests (default: the process-wide
+            one; None disables caching)
+        workers: scoring processes; 0 scores in the event loop's thread pool
+        fetch_workers: threads for fetching statements
+        chunk_size: batch items per worker task
+    """
+
+    def __init__(self, backend=None, cache=_DEFAULT_CACHE, workers=None, fetch_workers=16, chunk_size=16):
+        self.backend = backend
+        self.cache = get_default_cache() if cache is _DEFAULT_CACHE else cache
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch")
+        self._score_pool = None
+        self._inflight = {}
+        self.started = time.time()
+
+        self.request_seconds = Histogram(
+            "scoring_request_duration_seconds", "HTTP request latency.", ["route", "method", "status"])
+        self.stage_seconds = Histogram(
+            "scoring_stage_duration_seconds", "Time spent per stage of a request.", ["stage"])
+        self.batch_items = Histogram(
+            "scoring_batch_items", "Items per batch request.", [], buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000))
+        self.scored = Counter("scoring_items_total", "Scored items by outcome.", ["outcome"])
+        self.fetches = Counter("scoring_fetches_total", "Statement fetches by source.", ["source"])
+
+    # --- lifecycle ---
+    async def start(self):
+        if self.workers:
+            self._score_pool = ProcessPoolExecutor(max_workers=self.workers)
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._score_pool, _warm_up, i)
+                                   for i in range(self.workers)))
+
+    async def stop(self):
+        if self._score_pool is not None:
+            self._score_pool.shutdown(cancel_futures=True)
+        self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- fetching ---
+    def _fetch_sync(self, ticker, num_quarters):
+        return fetch_statements(ticker, num_quarters=num_quarters, backend=self.backend, cache=self.cache)
+
+    async def fetch(self, ticker, num_quarters):
+        """StatementBundle for a ticker; concurrent requests for it share one fetch."""
+        key = (ticker, num_quarters)
+        task = self._inflight.get(key)
+        if task is None:
+            self.fetches.inc(source="fetch")
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(self._fetch_pool, self._fetch_sync, ticker, num_quarters))
+            self._inflight[key] = task
+
+            def done(_):
+                self._inflight.pop(key, None)
+                self.stage_seconds.observe(time.perf_counter() - start, stage="fetch")
+            task.add_done_callback(done)
+        else:
+            self.fetches.inc(source="coalesced")
+        return await asyncio.shield(task)
+
+    # --- scoring ---
+    async def _run_scoring(self, items, scorers):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        pool = self._score_pool
+        try:
+            parts = await asyncio.gather(*(loop.run_in_executor(pool, score_items, chunk, scorers)
+                                           for chunk in chunks))
+        except BrokenProcessPool:
+            # A worker died; replace the pool so later requests still work
+            if pool is not None and pool is self._score_pool:
+                self._score_pool = ProcessPoolExecutor(max_workers=self.workers)
+            raise RequestError("scoring worker crashed", status=500)
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, stage="score")
+        return [result for part in parts for result in part]
+
+    async def score(self, requests):
+        """
+        Scores a list of parsed requests (see parse_request) and returns one
+        result dict per request, in order. Tickers are fetched concurrently;
+        scoring is spread over the workers in chunks.
+        """
+        async def resolve(request):
+            if request["statements"] is not None:
+                return request["statements"]
+            try:
+                return await self.fetch(request["ticker"], request["quarters"])
+            except Exception as e:
+                return RequestError(f"fetch failed: {type(e).__name__}: {e}", status=502)
+
+        sources = await asyncio.gather(*(resolve(r) for r in requests))
+        results = [None] * len(requests)
+        by_scorers = {}
+        for i, (request, source) in enumerate(zip(requests, sources)):
+            if isinstance(source, RequestError):
+                results[i] = {"error": str(source), "status": source.status}
+            else:
+                by_scorers.setdefault(request["scorers"], []).append(i)
+        for scorers, indices in by_scorers.items():
+            pending = [(sources[i], requests[i]["quarters"]) for i in indices]
+            for i, result in zip(indices, await self._run_scoring(pending, scorers)):
+                results[i] = result
+
+        for request, result in zip(requests, results):
+            result["ticker"] = request["ticker"]
+            self.scored.inc(outcome="error" if "error" in result else "ok")
+        return results
+
+    def render_metrics(self):
+        lines = []
+        for metric in (self.request_seconds, self.stage_seconds, self.batch_items, self.scored, self.fetches):
+            lines += metric.render()
+        if self.cache is not None:
+            stats = self.cache.stats()
+            for name in ("hits", "misses", "evictions", "entries"):
+                lines.append(f"# TYPE statement_cache_{name} gauge")
+                lines.append(f"statement_cache_{name} {stats[name]}")
+        lines.append("# TYPE scoring_workers gauge")
+        lines.append(f"scoring_workers {self.workers}")
+        return "\n".join(lines) + "\n"
+
+
+def parse_request(body, query=None):
+    """
+    Validates one scoring request (a POST body or GET query) and returns
+    {"ticker", "statements", "quarters", "scorers"}.
+    """
+    if not isinstance(body, dict):
+        raise RequestError("request must be a JSON object")
+    query = query or {}
+    ticker = body.get("ticker") or query.get("ticker")
+    statements = body.get("statements")
+    if statements is not None and not isinstance(statements, dict):
+        raise RequestError("'statements' must map statement names to raw payloads")
+    if not ticker and statements is None:
+        raise RequestError("a 'ticker' or 'statements' is required")
+
+    scorers = body.get("scorers") or query.get("scorers") or SCORERS
+    if isinstance(scorers, str):
+        scorers = [s for s in scorers.split(",") if s]
+    unknown = [s for s in scorers if s not in SCORERS]
+    if unknown:
+        raise RequestError(f"unknown scorers {unknown}; expected some of {list(SCORERS)}")
+    # An explicit 0 must be rejected, not replaced by the default
+    value = body.get("quarters")
+    if value is None:
+        value = query.get("quarters", 8)
+    try:
+        quarters = int(value)
+        if isinstance(value, bool) or quarters != float(value):
+            raise ValueError(value)
+    except (TypeError, ValueError):
+        raise RequestError("'quarters' must be an integer")
+    if not 1 <= quarters <= 80:
+        raise RequestError("'quarters' must be between 1 and 80")
+    return {
+        "ticker": ticker.strip().upper() if ticker else None,
+        "statements": statements,
+        "quarters": quarters,
+        "scorers": tuple(dict.fromkeys(scorers)),
+    }
+
+
+# === HTTP ===
+def make_app(service):
+    """aiohttp application serving `service`; starts and stops its workers with the app."""
+    from aiohttp import web
+
+    @web.middleware
+    async def timing(request, handler):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except RequestError as e:
+            status = e.status
+            return web.json_response({"error": str(e)}, status=e.status)
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            route = request.match_info.route.resource
+            service.request_seconds.observe(time.perf_counter() - start,
+                                            route=route.canonical if route else "unmatched",
+                                            method=request.method, status=status)
+
+    async def read_json(request):
+        try:
+            return await request.json()
+        except ValueError:
+            raise RequestError("body is not valid JSON")
+
+    def respond(result):
+        return web.json_response(result, status=result.get("status", 200) if "error" in result else 200)
+
+    async def health(request):
+        return web.json_response({"status": "ok", "workers": service.workers,
+                                  "uptime": round(time.time() - service.started, 1)})
+
+    async def score_ticker(request):
+        parsed = parse_request({"ticker": request.match_info["ticker"]}, request.query)
+        return respond((await service.score([parsed]))[0])
+
+    async def score_post(request):
+        parsed = parse_request(await read_json(request))
+        return respond((await service.score([parsed]))[0])
+
+    async def score_batch(request):
+        body = await read_json(request)
+        items = body.get("items") if isinstance(body, dict) else None
+        if not isinstance(items, list) or not items:
+            raise RequestError("'items' must be a non-empty list of score requests")
+        if len(items) > MAX_BATCH_ITEMS:
+            raise RequestError(f"at most {MAX_BATCH_ITEMS} items per batch", status=413)
+        parsed = [parse_request(item) for item in items]
+        service.batch_items.observe(len(parsed))
+        return web.json_response({"results": await service.score(parsed)})
+
+    async def metrics(request):
+        return web.Response(text=service.render_metrics(), content_type="text/plain", charset="utf-8")
+
+    async def on_startup(app):
+        await service.start()
+
+    async def on_cleanup(app):
+        await service.stop()
+
+    app = web.Application(middlewares=[timing], client_max_size=32 * 1024 * 1024)
+    app["service"] = service
+    app.router.add_get("/health", health)
+    app.router.add_get("/score/{ticker}", score_ticker)
+    app.router.add_post("/score", score_post)
+    app.router.add_post("/score/batch", score_batch)
+    app.router.add_get("/metrics", metrics)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+@contextlib.asynccontextmanager
+async def running_service(service, host="127.0.0.1", port=0):
+    """
+    Runs make_app(service) (port 0: a free port) and yields its base URL.
+
+        async with running_service(ScoringService(SyntheticBackend(), cache=None)) as url:
+            ...
+    """
+    from aiohttp import web
+
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    runner = web.AppRunner(make_app(service), access_log=None)
+    await runner.setup()
+    try:
+        await web.SockSite(runner, sock).start()
+        yield f"http://{host}:{sock.getsockname()[1]}"
+    finally:
+        await runner.cleanup()
+
+
+# === CLI ===
+def main(argv=None):
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="Serve the scorers over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="scoring processes, 0 to score in-process (default: one per CPU)")
+    parser.add_argument("--fetch-workers", type=int, default=16)
+    parser.add_argument("--fixtures", help="read statements from a FixtureBackend directory")
+    parser.add_argument("--synthetic", action="store_true", help="serve generated statements (fake data)")
+    parser.add_argument("--cache", help="statement cache file, 'memory' or 'off' (default: the shared on-disk cache)")
+    args = parser.parse_args(argv)
+
+    backend = None
+    if args.fixtures:
+        backend = FixtureBackend(args.fixtures)
+    elif args.synthetic:
+        backend = SyntheticBackend()
+
+    if args.cache is None:
+        cache = _DEFAULT_CACHE
+    elif args.cache == "off":
+        cache = None
+    elif args.cache == "memory":
+        cache = StatementCache(":memory:")
+    else:
+        cache = StatementCache(args.cache)
+
+    service = ScoringService(backend, cache=cache, workers=args.workers, fetch_workers=args.fetch_workers)
+    print(f"Scoring service on http://{args.host}:{args.port} ({service.workers} workers)", file=sys.stderr)
+    web.run_app(make_app(service), host=args.host, port=args.port, print=None, access_log=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
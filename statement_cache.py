@@ -0,0 +1,169 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "statements.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600          # seconds a cached statement is trusted
+DEFAULT_STALE_RECHECK = 12 * 3600    # seconds between refetches of a frame that looks a quarter behind
+DEFAULT_MAX_ENTRIES = 5000
+QUARTER_SECONDS = 92 * 24 * 3600
+# v2: frames carry canonical column names (schema.py); older tables are ignored
+TABLE = "statements_v2"
+
+
+class StatementCache:
+    """
+    On-disk SQLite cache for prepared statement frames, keyed by
+    (ticker, statement, num_quarters).
+
+    An entry expires after `ttl` seconds. Entries whose latest 'Date' is more
+    than a quarter old expire early (after `stale_recheck` seconds), since a
+    new report has probably been published. The least recently used entries
+    are evicted once more than `max_entries` are stored.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                 stale_recheck=DEFAULT_STALE_RECHECK, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.stale_recheck = stale_recheck
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {TABLE} (
+                ticker TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                num_quarters INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                latest_date REAL,
+                frame BLOB NOT NULL,
+                PRIMARY KEY (ticker, statement, num_quarters)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def lookup(self, ticker, statement, num_quarters):
+        """
+        Returns (hit, df). A cached None (no data from the source) is a hit.
+        """
+        key = (ticker.upper(), statement, num_quarters)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT fetched_at, latest_date, frame FROM {TABLE} "
+                "WHERE ticker = ? AND statement = ? AND num_quarters = ?",
+                key,
+            ).fetchone()
+
+            if row is None or self._is_stale(row[0], row[1], now):
+                self.misses += 1
+                return False, None
+
+            self._conn.execute(
+                f"UPDATE {TABLE} SET last_access = ? "
+                "WHERE ticker = ? AND statement = ? AND num_quarters = ?",
+                (now,) + key,
+            )
+            self._conn.commit()
+            self.hits += 1
+        return True, pickle.loads(row[2])
+
+    def store(self, ticker, statement, num_quarters, df):
+        now = time.time()
+        latest_date = None
+        if df is not None and "Date" in df.columns and not df.empty:
+            latest_date = pd.Timestamp(df["Date"].max()).timestamp()
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ticker.upper(), statement, num_quarters, now, now, latest_date,
+                 pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _is_stale(self, fetched_at, latest_date, now):
+        age = now - fetched_at
+        if age > self.ttl:
+            return True
+        # Newest quarter is over a quarter old: a fresher report is likely out
+        if latest_date is not None and now - latest_date > QUARTER_SECONDS:
+            return age > self.stale_recheck
+        return False
+
+    def _evict(self):
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN "
+                f"(SELECT rowid FROM {TABLE} ORDER BY last_access LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    def stats(self):
+        """
+        Returns hit/miss counters for this process plus the number of stored entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {TABLE}")
+            self._conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+
+# === DEFAULT CACHE ===
+_UNSET = object()
+_default_cache = _UNSET
+
+def get_default_cache():
+    """
+    Returns the process-wide cache, configured from the environment:
+    STATEMENT_CACHE=off disables it, STATEMENT_CACHE_PATH, STATEMENT_CACHE_TTL
+    and STATEMENT_CACHE_MAX_ENTRIES override the defaults.
+    """
+    global _default_cache
+    if _default_cache is _UNSET:
+        if os.getenv("STATEMENT_CACHE", "on").lower() in ("0", "off", "false"):
+            _default_cache = None
+            return None
+        _default_cache = StatementCache(
+            path=os.getenv("STATEMENT_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl=float(os.getenv("STATEMENT_CACHE_TTL", DEFAULT_TTL)),
+            max_entries=int(os.getenv("STATEMENT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+    return _default_cache
+
+def set_default_cache(cache):
+    """Replaces the process-wide cache; None disables caching."""
+    global _default_cache
+    _default_cache = cache
@@ -0,0 +1,14 @@
+import pytest
+
+import gpt_summary
+from fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    """A FakeOpenAIServer that gpt_summary and gpt_batch clients talk to."""
+    with FakeOpenAIServer() as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setattr(gpt_summary, "_client", None)    # recreate with the fake's URL
+        yield server
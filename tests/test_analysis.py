@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import add_all_yoy, append_quarter_yoy
+
+
+def quarters(n):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "Date": pd.date_range("2020-03-31", periods=n, freq="QE"),
+        "Total Revenue": rng.uniform(50, 150, n),
+        "Net Income": rng.normal(10, 20, n),
+        "Basic EPS": rng.uniform(-1, 3, n),
+    })
+    df.loc[2, "Net Income"] = np.nan
+    df.loc[3, "Basic EPS"] = 0.0
+    return df
+
+
+@pytest.mark.parametrize("known", [2, 4, 9])
+def test_appending_quarters_matches_a_full_recompute(known):
+    full = quarters(12)
+    out = add_all_yoy(full.iloc[:known])
+    for i in range(known, len(full)):
+        out = append_quarter_yoy(out, full.iloc[i])
+    expected = add_all_yoy(full)
+    assert list(out.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+
+
+def test_window_keeps_the_latest_quarters():
+    full = quarters(10)
+    out = append_quarter_yoy(add_all_yoy(full.iloc[:9]), full.iloc[9], num_quarters=8)
+    expected = add_all_yoy(full).tail(8).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False)
+
+
+def test_add_all_yoy_is_idempotent():
+    once = add_all_yoy(quarters(8))
+    pd.testing.assert_frame_equal(add_all_yoy(once), once)
+
+
+def test_older_quarters_are_rejected():
+    df = add_all_yoy(quarters(6))
+    with pytest.raises(ValueError):
+        append_quarter_yoy(df, df.iloc[2])
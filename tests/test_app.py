@@ -0,0 +1,47 @@
+import os
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import data_fetcher
+import gpt_cache
+import statement_cache
+from fetch_backend import SyntheticBackend
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+class SlowBackend(SyntheticBackend):
+    """Takes longer than app.GROUNDING_WAIT to answer, like a cold Yahoo fetch."""
+
+    def ticker(self, symbol):
+        time.sleep(1.0)
+        return super().ticker(symbol)
+
+
+@pytest.fixture
+def run_app(openai_server, monkeypatch):
+    monkeypatch.setattr(gpt_cache, "_default_cache", None)
+    monkeypatch.setattr(statement_cache, "_default_cache", None)
+
+    def run(ticker, backend):
+        monkeypatch.setattr(data_fetcher, "_default_backend", backend)
+        app = AppTest.from_file(APP, default_timeout=120)
+        app.run()
+        app.text_input[0].input(ticker).run()
+        assert not app.exception
+        return app
+    return run
+
+
+def test_ready_metrics_ground_the_prompt(run_app, openai_server):
+    app = run_app("GRND", SyntheticBackend())
+    assert openai_server.reply in [m.value for m in app.markdown]
+    assert "prompt tokens" in app.caption[0].value
+
+
+def test_slow_fetch_does_not_hold_back_the_request(run_app, openai_server):
+    app = run_app("SLOW", SlowBackend())
+    assert openai_server.reply in [m.value for m in app.markdown]
+    assert app.caption[0].value.split("; ")[1].startswith("ungrounded")
@@ -0,0 +1,47 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from async_fetcher import AsyncStatementFetcher, HTTPStatementSource, RateLimited, stub_server
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend
+
+FAST_RETRIES = dict(rate=1000, base_delay=0.001, max_delay=0.01)
+
+
+def fetch_many(tickers, **options):
+    """(results, fetcher stats) from a stub server over SyntheticBackend."""
+    server_options = {k: options.pop(k) for k in ("throttle_every", "latency") if k in options}
+
+    async def run():
+        async with stub_server(SyntheticBackend(), **server_options) as url:
+            async with AsyncStatementFetcher(HTTPStatementSource(url), **FAST_RETRIES, **options) as fetcher:
+                return await fetcher.fetch_many(tickers), fetcher.stats()
+    return asyncio.run(run())
+
+
+def test_throttled_requests_are_retried():
+    results, stats = fetch_many(["AAA", "BBB"], throttle_every=3)
+    # 6 statements; every third request answers 429 and is retried: 8 requests in all
+    assert stats["throttled"] == 2
+    assert stats["retries"] == 2
+    assert stats["requests"] == 8
+    for ticker in ("AAA", "BBB"):
+        expected = fetch_statements(ticker, backend=SyntheticBackend(), cache=None)
+        for got, want in zip(results[ticker], expected):
+            pd.testing.assert_frame_equal(got, want, check_freq=False)
+
+
+def test_retries_give_up_with_the_last_error():
+    results, stats = fetch_many(["AAA"], throttle_every=1, max_retries=2)
+    assert isinstance(results["AAA"], RateLimited)
+    assert stats["requests"] == 3 * 3          # 3 statements x (1 attempt + 2 retries)
+    assert stats["retries"] == 3 * 2
+
+
+def test_timeouts_are_retried():
+    results, stats = fetch_many(["AAA"], latency=0.2, timeout=0.05, max_retries=1)
+    assert isinstance(results["AAA"], asyncio.TimeoutError)
+    assert stats["requests"] == 6
+    assert stats["throttled"] == 0
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from backtest import replay_ticker
+from batch import score_bundle
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return fetch_statements("SYN0003", num_quarters=12, backend=SyntheticBackend(num_quarters=12), cache=None)
+
+
+def test_scores_only_see_reported_quarters(bundle):
+    quarter_dates = list(bundle[1]["Date"])
+    first = quarter_dates[0]
+    dates = [first + pd.Timedelta(days=d) for d in (10, 44, 45, 46, 200, 2000)]
+    rows = replay_ticker("SYN0003", bundle, dates, window=4, report_lag=45)
+
+    # Nothing is public until 45 days after the first quarter ends
+    assert [row["date"] for row in rows] == dates[2:]
+    for row in rows:
+        cutoff = row["date"] - pd.Timedelta(days=45)
+        reported = [d for d in quarter_dates if d <= cutoff]
+        assert row["statement_date"] == reported[-1]
+
+        window = tuple(df[df["Date"] <= cutoff].tail(4) for df in bundle)
+        expected = score_bundle("SYN0003", window)
+        for column in ("financial_health", "buffett", "lynch"):
+            assert row[column] == pytest.approx(expected[column], nan_ok=True)
+
+
+def test_report_lag_shifts_the_visible_quarter(bundle):
+    quarter_end = bundle[1]["Date"].iloc[5]
+    date = quarter_end + pd.Timedelta(days=30)
+    short = replay_ticker("SYN0003", bundle, [date], report_lag=20)[0]
+    long = replay_ticker("SYN0003", bundle, [date], report_lag=60)[0]
+    assert short["statement_date"] == quarter_end
+    assert long["statement_date"] == bundle[1]["Date"].iloc[4]
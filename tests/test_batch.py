@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from batch import RESULT_COLUMNS, score_bundle, score_universe, write_results
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+
+
+class FlakyBackend(SyntheticBackend):
+    def ticker(self, ticker_symbol):
+        if ticker_symbol == "BAD":
+            raise ConnectionError("no route to host")
+        return super().ticker(ticker_symbol)
+
+
+def test_rows_follow_the_input_order_and_record_failures():
+    tickers = synthetic_universe(4)
+    results, summary = score_universe([" bad ", *tickers, tickers[0].lower()], backend=FlakyBackend(),
+                                      score_workers=0)
+    assert list(results.columns) == RESULT_COLUMNS
+    assert list(results["ticker"]) == ["BAD", *tickers]
+    assert (summary.total, summary.succeeded, summary.failed) == (5, 4, 1)
+    assert results.loc[0, "error"].startswith("fetch: ConnectionError")
+    assert results["error"].iloc[1:].isna().all()
+
+    bundle = fetch_statements(tickers[1], backend=SyntheticBackend())
+    expected = score_bundle(tickers[1], bundle)
+    assert results.set_index("ticker").loc[tickers[1], "buffett"] == pytest.approx(expected["buffett"])
+
+
+def test_process_pool_matches_in_process_scoring(tmp_path):
+    tickers = synthetic_universe(6)
+    in_process, _ = score_universe(tickers, backend=SyntheticBackend(), score_workers=0)
+    pooled, _ = score_universe(tickers, backend=SyntheticBackend(), score_workers=2)
+    pd.testing.assert_frame_equal(in_process, pooled)
+
+    write_results(pooled, str(tmp_path / "scores.csv"))
+    written = pd.read_csv(tmp_path / "scores.csv")
+    assert written["error"].isna().all()
+    pd.testing.assert_frame_equal(written.drop(columns="error"), pooled.drop(columns="error"))
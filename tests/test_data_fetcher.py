@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetcher import (fetch_statements, get_balance_sheet_data, get_cash_flow_data,
+                          get_income_statement_data)
+from fetch_backend import FixtureBackend, write_fixture
+
+DATES = pd.date_range("2022-03-31", periods=10, freq="QE")
+
+
+def raw(items):
+    """A yfinance-shaped frame: line items as rows, newest quarter first."""
+    rng = np.random.default_rng(len(items))
+    return pd.DataFrame(rng.uniform(1e8, 1e9, (len(items), len(DATES))), index=items, columns=DATES[::-1])
+
+
+class CountingBackend(FixtureBackend):
+    def __init__(self, root):
+        super().__init__(root)
+        self.tickers = []
+
+    def ticker(self, ticker_symbol):
+        self.tickers.append(ticker_symbol)
+        return super().ticker(ticker_symbol)
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    write_fixture(str(tmp_path), "AAPL", {
+        "balance_sheet": raw(["Total Assets", "Current Assets", "Current Liabilities",
+                              "Total Liabilities Net Minority Interest", "Total Equity Gross Minority Interest",
+                              "Cash And Cash Equivalents"]),
+        "income_statement": raw(["Total Revenue", "Gross Profit", "Net Income"]),
+        "cash_flow": raw(["Operating Cash Flow", "Capital Expenditure", "Free Cash Flow"]),
+    })
+    write_fixture(str(tmp_path), "NOCF", {"income_statement": raw(["Total Revenue", "Net Income"])})
+    return str(tmp_path)
+
+
+def test_bundle_comes_from_one_ticker_object(fixtures):
+    backend = CountingBackend(fixtures)
+    bundle = fetch_statements("AAPL", num_quarters=8, backend=backend)
+    assert backend.tickers == ["AAPL"]
+
+    singles = (get_balance_sheet_data, get_income_statement_data, get_cash_flow_data)
+    for df, fetch_one in zip(bundle, singles):
+        pd.testing.assert_frame_equal(df, fetch_one("AAPL", num_quarters=8, backend=backend))
+        assert len(df) == 8
+        assert df["Date"].is_monotonic_increasing
+    assert bundle.balance_sheet is bundle[0]
+
+
+def test_missing_statements_are_none(fixtures):
+    bundle = fetch_statements("NOCF", backend=FixtureBackend(fixtures))
+    assert bundle.balance_sheet is None and bundle.cash_flow is None
+    assert list(bundle.income_statement["Date"]) == list(DATES[-8:])
@@ -0,0 +1,75 @@
+import json
+
+from openai import OpenAI
+
+from gpt_batch import ResultStore, collect_batch, run_analyses, submit_batch, write_batch_requests
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+FAST_RETRIES = dict(cache=None, base_delay=0.001, max_delay=0.01)
+
+
+def reject(ticker):
+    """fail_when callback answering 400 for requests about `ticker`."""
+    def failure(body):
+        return (400, f"{ticker} rejected") if ticker in body["messages"][-1]["content"] else None
+    return failure
+
+
+def test_throttled_requests_are_retried(openai_server, tmp_path):
+    openai_server.throttle_every = 3
+    summary = run_analyses(TICKERS, str(tmp_path / "analyses.jsonl"), **FAST_RETRIES)
+    # 4 answers; every third request answers 429: 5 requests in all
+    assert (summary.analysed, summary.failed) == (4, 0)
+    assert summary.throttled == openai_server.throttled == 1
+    assert summary.retries == 1
+    assert openai_server.requests == 5
+
+
+def test_rerun_skips_answered_tickers(openai_server, tmp_path):
+    out = str(tmp_path / "analyses.jsonl")
+    openai_server.fail_when = reject("CCC")
+    first = run_analyses(TICKERS, out, **FAST_RETRIES)
+    assert (first.analysed, first.failed) == (3, 1)
+
+    openai_server.fail_when = None
+    requests = openai_server.requests
+    second = run_analyses(TICKERS, out, **FAST_RETRIES)
+    assert (second.skipped, second.analysed, second.failed) == (3, 1, 0)
+    assert openai_server.requests == requests + 1
+    assert all(r.status == "ok" for r in ResultStore(out).load().values())
+
+    third = run_analyses(TICKERS, out, **FAST_RETRIES)
+    assert (third.skipped, third.analysed) == (4, 0)
+    assert openai_server.requests == requests + 1
+
+
+def test_batch_workflow_records_rejected_requests(openai_server, tmp_path):
+    out, requests = str(tmp_path / "analyses.jsonl"), str(tmp_path / "batch_input.jsonl")
+    openai_server.fail_when = reject("BBB")
+    client = OpenAI(base_url=openai_server.url, api_key="test")
+
+    assert write_batch_requests(TICKERS, requests, out) == 4
+    batch = submit_batch(requests, client=client)
+    summary = collect_batch(batch.id, out, client=client, cache=None)
+    assert (summary.analysed, summary.failed) == (3, 1)
+
+    with open(out) as f:
+        rows = {row["ticker"]: row for row in map(json.loads, f)}
+    assert rows["BBB"]["status"] == "error"
+    assert rows["BBB"]["error"] == "HTTP 400: BBB rejected"
+    assert rows["AAA"]["status"] == "ok" and rows["AAA"]["source"] == "batch"
+
+    # Only the rejected request is left for the next batch
+    assert write_batch_requests(TICKERS, requests, out) == 1
+
+
+def test_collect_waits_for_the_batch(openai_server, tmp_path):
+    openai_server.batch_delay = 0.2
+    client = OpenAI(base_url=openai_server.url, api_key="test")
+    requests = str(tmp_path / "batch_input.jsonl")
+    write_batch_requests(TICKERS, requests)
+    batch = submit_batch(requests, client=client)
+    out = str(tmp_path / "analyses.jsonl")
+    assert collect_batch(batch.id, out, client=client, cache=None) is None
+    summary = collect_batch(batch.id, out, client=client, cache=None, wait=True, poll=0.05)
+    assert summary.analysed == 4
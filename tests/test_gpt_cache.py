@@ -0,0 +1,122 @@
+import threading
+
+import gpt_cache
+from gpt_cache import ResponseCache
+from gpt_summary import get_financial_summary, stream_financial_summary
+
+
+def test_identical_requests_call_the_api_once(openai_server, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    first = get_financial_summary("AAPL", cache=cache)
+    second = get_financial_summary("AAPL", cache=cache)
+    assert first == second == openai_server.reply
+    assert openai_server.requests == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_identical_requests_are_coalesced(openai_server, tmp_path):
+    openai_server.latency = 0.3
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(get_financial_summary("MSFT", cache=cache)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert answers == [openai_server.reply] * 4
+    assert openai_server.requests == 1
+    assert cache.stats()["coalesced"] == 3
+
+
+def test_errors_are_not_cached(openai_server, tmp_path):
+    openai_server.fail_with = (400, "bad request")
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    assert get_financial_summary("AAPL", cache=cache).startswith("Error calling ChatGPT API")
+    assert len(cache) == 0
+    openai_server.fail_with = None
+    assert get_financial_summary("AAPL", cache=cache) == openai_server.reply
+    assert len(cache) == 1
+
+
+def _stream_concurrently(cache, count=2):
+    barrier = threading.Barrier(count)
+    streams = [stream_financial_summary("NVDA", cache=cache) for _ in range(count)]
+
+    def consume(stream):
+        barrier.wait()
+        list(stream)
+
+    threads = [threading.Thread(target=consume, args=(stream,)) for stream in streams]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return streams
+
+
+def test_concurrent_identical_streams_make_one_request(openai_server, tmp_path):
+    openai_server.latency = 0.3
+    openai_server.token_delay = 0.01
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    streams = _stream_concurrently(cache)
+    assert [s.text for s in streams] == [openai_server.reply] * 2
+    assert sorted(s.cached for s in streams) == [False, True]
+    assert openai_server.requests == 1
+    assert cache.stats()["coalesced"] == 1
+    assert get_financial_summary("NVDA", cache=cache) == openai_server.reply
+    assert openai_server.requests == 1
+
+
+def test_failed_stream_fails_the_waiting_one_too(openai_server, tmp_path):
+    openai_server.latency = 0.3
+    openai_server.fail_with = (400, "bad request")
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    streams = _stream_concurrently(cache)
+    assert all(s.text.startswith("Error calling ChatGPT API") for s in streams)
+    assert openai_server.requests == 1
+    assert len(cache) == 0
+
+
+def test_closed_stream_does_not_block_later_requests(openai_server, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    chunks = iter(stream_financial_summary("AMD", cache=cache))
+    next(chunks)
+    chunks.close()
+    assert len(cache) == 0
+    stream = stream_financial_summary("AMD", cache=cache)
+    assert "".join(stream) == openai_server.reply
+    assert openai_server.requests == 2
+
+
+def test_least_recently_used_answers_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(gpt_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.put(key, key.upper())
+    now[0] += 1
+    assert cache.get("a") == "A"
+    now[0] += 1
+    cache.put("c", "C")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_answers_are_purged(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(gpt_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(path, ttl=100)
+    cache.put("old", "OLD")
+    now[0] += 60
+    cache.put("new", "NEW")
+    now[0] += 60
+    cache.put("newest", "NEWEST")
+    assert len(cache) == 2
+    now[0] += 60
+    assert len(ResponseCache(path, ttl=100)) == 1    # purged on open
+    assert cache.stats()["evictions"] == 0
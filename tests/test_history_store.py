@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from history_store import HistoryStore
+
+
+def statement(dates, revenue, **extra):
+    return pd.DataFrame({"Date": pd.to_datetime(dates), "Total Revenue": revenue, **extra})
+
+
+def test_upsert_replaces_overlapping_quarters(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.upsert("aapl", "income_statement", statement(["2024-03-31", "2024-06-30"], [1.0, 2.0]))
+    count = store.upsert("AAPL", "income_statement",
+                         statement(["2024-06-30", "2024-09-30"], [20.0, 30.0], **{"Net Income": [2.0, 3.0]}))
+    assert count == 3
+
+    df = store.read("AAPL", "income_statement")
+    assert list(df["Date"]) == list(pd.to_datetime(["2024-03-31", "2024-06-30", "2024-09-30"]))
+    assert list(df["Total Revenue"]) == [1.0, 20.0, 30.0]
+    assert np.isnan(df["Net Income"].iloc[0])      # the first write had no Net Income
+    assert store.tickers("income_statement") == ["AAPL"]
+    assert store.quarters("AAPL", "income_statement") == 3
+
+
+def test_date_slices_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    dates = pd.date_range("2020-03-31", periods=12, freq="QE")
+    original = statement(dates, np.arange(12.0), **{"Net Income": np.arange(12.0) / 10})
+    store.upsert("MSFT", "income_statement", original.iloc[::-1])       # stored sorted either way
+
+    pd.testing.assert_frame_equal(store.read("MSFT", "income_statement"), original, check_dtype=False)
+    sliced = store.read("MSFT", "income_statement", start="2021-01-01", end="2021-12-31")
+    pd.testing.assert_frame_equal(sliced, original.iloc[4:8].reset_index(drop=True), check_dtype=False)
+    latest = store.read("MSFT", "income_statement", end="2021-12-31", num_quarters=2, columns=["Net Income"])
+    assert list(latest.columns) == ["Date", "Net Income"]
+    assert list(latest["Date"]) == list(dates[6:8])
+    assert store.read("MSFT", "income_statement", start="2030-01-01") is None
+    assert store.read("MISSING", "income_statement") is None
+
+
+def test_read_many_stacks_tickers(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.upsert("A", "balance_sheet", statement(["2024-03-31"], [1.0]))
+    store.upsert("B", "balance_sheet", statement(["2024-03-31", "2024-06-30"], [2.0, 3.0]))
+    long = store.read_many(["A", "B", "C"], "balance_sheet")
+    assert list(long.index.names) == ["ticker", "Date"]
+    assert list(long.index.get_level_values("ticker")) == ["A", "B", "B"]
+    assert list(long["Total Revenue"]) == [1.0, 2.0, 3.0]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch import score_bundle
+from data_fetcher import (DERIVED_COLUMNS, LEAN_COLUMNS, StatementBundle, fetch_statements, lean_frame,
+                          prepare_statement)
+from fetch_backend import STATEMENT_ATTRS, STATEMENTS, SyntheticBackend
+from score import score_full_company
+
+SCORE_COLUMNS = ["financial_health", "balance_sheet_score", "income_statement_score", "cash_flow_score",
+                 "buffett", "lynch"]
+DATES = pd.to_datetime(["2024-03-31", "2024-06-30", "2024-09-30"])
+
+
+@pytest.mark.parametrize("statement", STATEMENTS)
+def test_lean_frame_matches_pruned_full_frame(statement):
+    raw = getattr(SyntheticBackend(extra_columns=20).ticker("AAPL"), STATEMENT_ATTRS[statement])
+    lean = prepare_statement(statement, raw, 8, lean=True)
+    pd.testing.assert_frame_equal(lean, lean_frame(statement, prepare_statement(statement, raw, 8)))
+    assert set(lean.columns) - {"Date"} <= set(LEAN_COLUMNS[statement]) | set(DERIVED_COLUMNS[statement])
+    assert all(lean[col].dtype == np.float32 for col in lean.columns if col != "Date")
+
+
+def test_lean_bundle_scores_like_the_full_one():
+    backend = SyntheticBackend(extra_columns=20)
+    full = fetch_statements("MSFT", backend=backend, cache=None)
+    lean = fetch_statements("MSFT", backend=backend, cache=None, lean=True)
+    expected, actual = score_bundle("MSFT", full), score_bundle("MSFT", lean)
+    assert actual["error"] is None
+    for column in SCORE_COLUMNS:
+        assert actual[column] == pytest.approx(expected[column], abs=1e-6), column
+
+
+@pytest.mark.parametrize("statement", STATEMENTS)
+def test_statement_without_lean_line_items(statement):
+    # Valid but sparse: none of the line items the scorers read
+    raw = pd.DataFrame([[1.0, 2.0, 3.0]], index=["Some Other Item"], columns=DATES)
+    lean = prepare_statement(statement, raw, 8, lean=True)
+    assert list(lean.columns) == ["Date"]
+    assert len(lean) == 3
+    assert list(lean_frame(statement, prepare_statement(statement, raw, 8)).columns) == ["Date"]
+
+
+def test_sparse_lean_bundle_scores():
+    raw = pd.DataFrame([[1.0, 2.0, 3.0]], index=["Some Other Item"], columns=DATES)
+    bundle = StatementBundle(*(prepare_statement(s, raw, 8, lean=True) for s in STATEMENTS))
+    overall, breakdown = score_full_company(*bundle)
+    # Every metric is missing and scores the default 3
+    assert overall == 3.0
+    for section in ("Balance Sheet Breakdown", "Income Statement Breakdown", "Cash Flow Breakdown"):
+        assert all(m == {"value": None, "score": 3} for m in breakdown[section].values()), section
+
+    row = score_bundle("SPARSE", bundle)
+    assert row["error"] is None
+    assert all(np.isfinite(row[column]) for column in SCORE_COLUMNS)
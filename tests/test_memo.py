@@ -0,0 +1,62 @@
+import pandas as pd
+
+from memo import Memo, content_hash, memoize
+
+
+def frame(revenue):
+    return pd.DataFrame({"Date": pd.to_datetime(["2024-03-31", "2024-06-30"]), "Total Revenue": revenue})
+
+
+def test_frames_are_keyed_by_content():
+    assert content_hash(frame([1.0, 2.0])) == content_hash(frame([1.0, 2.0]))
+    assert content_hash(frame([1.0, 2.0])) != content_hash(frame([1.0, 3.0]))
+    assert content_hash(frame([1.0, 2.0])) != content_hash(frame([1, 2]))      # dtype is part of the key
+    assert content_hash({"a": 1, "b": 2}) == content_hash({"b": 2, "a": 1})
+    assert content_hash((1, 2)) != content_hash([1, 2])
+
+
+def test_equal_frames_share_an_entry():
+    calls = []
+    memo = Memo("test", maxsize=4)
+
+    def total(df):
+        calls.append(1)
+        return df["Total Revenue"].sum()
+
+    assert memo.call(total, (frame([1.0, 2.0]),), {}) == 3.0
+    assert memo.call(total, (frame([1.0, 2.0]),), {}) == 3.0
+    assert memo.call(total, (frame([1.0, 5.0]),), {}) == 6.0
+    assert len(calls) == 2
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    calls = []
+    memo = Memo("test", maxsize=2)
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    for x in (1, 2, 1, 3):      # 1 is used again, so 2 is the oldest when 3 arrives
+        memo.call(square, (x,), {})
+    assert len(memo) == 2
+    memo.call(square, (1,), {})
+    memo.call(square, (2,), {})
+    assert calls == [1, 2, 3, 2]
+
+
+def test_memos_are_shared_by_name():
+    @memoize("test_memo.shared", maxsize=8)
+    def first(x):
+        return x
+
+    @memoize("test_memo.shared", maxsize=8)
+    def second(x):
+        return x
+
+    assert first.memo is second.memo
+    first.memo.clear()
+    first(1)
+    second(1)
+    assert first.memo.stats()["hits"] == 1
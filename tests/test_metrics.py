@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+from buffett_score import buffett_metrics, buffett_overall
+from lynch import score_lynch_company
+from metrics import METRIC_IDS, METRICS, MetricBatch, as_float, record, records_from_breakdown
+from score import score_full_company
+
+
+@pytest.fixture(scope="module")
+def bundles():
+    backend = SyntheticBackend(num_quarters=8)
+    return {t: fetch_statements(t, num_quarters=8, backend=backend, cache=None) for t in synthetic_universe(3)}
+
+
+def _same(expected, actual):
+    if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+        return math.isnan(actual)
+    return actual == pytest.approx(float(expected))
+
+
+def test_batch_packs_every_metric_of_every_ticker(bundles):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        batch = MetricBatch.from_bundles(dict(bundles, BROKEN=(None, None, None)))
+    assert len(batch) == 4
+    assert batch.array.shape == (4, len(METRICS))
+    assert batch.array.flags["C_CONTIGUOUS"]
+    assert "BROKEN" in batch.errors and np.isnan(batch.array[3]["score"]).all()
+
+    for ticker, bundle in bundles.items():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fh_score, fh_breakdown = score_full_company(*bundle)
+            buffett_records = buffett_metrics(*bundle)
+            lynch_score, lynch_breakdown = score_lynch_company(*bundle)
+        overall = {"financial_health": fh_score, "buffett": buffett_overall(buffett_records), "lynch": lynch_score}
+        records = (records_from_breakdown("financial_health", fh_breakdown) + buffett_records
+                   + records_from_breakdown("lynch", lynch_breakdown))
+        row = batch.overall[batch.tickers.index(ticker)]
+        for scorer, score in overall.items():
+            assert row[scorer] == pytest.approx(score)
+        packed = batch.records(ticker)
+        for r in records:
+            assert _same(r.value, packed[r.metric_id].value), r.name
+            assert _same(r.score, packed[r.metric_id].score), r.name
+
+
+def test_set_and_to_frame():
+    batch = MetricBatch(["A", "B"])
+    batch.set("B", [record("buffett", "ROE", 0.2, 7.5), record("lynch", "PEG Ratio", None, 3)])
+    scores = batch.to_frame("score")
+    values = batch.to_frame("value")
+    assert scores.loc["B", ("buffett", "ROE")] == 7.5
+    assert values.loc["B", ("buffett", "ROE")] == 0.2
+    assert np.isnan(values.loc["B", ("lynch", "PEG Ratio")])
+    assert scores.loc["B", ("lynch", "PEG Ratio")] == 3
+    assert np.isnan(scores.loc["A"]).all()
+    assert batch.array[1]["value"][METRIC_IDS[("buffett", "ROE")]] == 0.2
+
+
+def test_as_float():
+    assert as_float(3) == 3.0
+    assert as_float(np.int64(2)) == 2.0
+    assert as_float("1.5") == 1.5
+    for missing in (None, "n/a", [1]):
+        assert np.isnan(as_float(missing))
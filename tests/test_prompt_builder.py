@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend
+from prompt_builder import _metric_lines, _statement_lines, build_prompt, count_tokens, metric_records
+
+
+@pytest.fixture(scope="module")
+def scored():
+    bundle = fetch_statements("SYN0002", num_quarters=8, backend=SyntheticBackend(num_quarters=8), cache=None)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overall, records = metric_records(bundle)
+    priorities = {label: priority for priority, label, _ in _metric_lines(records)}
+    priorities.update({label: priority for priority, label, _ in _statement_lines(bundle, 4)[1]})
+    return bundle, overall, records, priorities
+
+
+def test_large_budget_keeps_every_line(scored):
+    bundle, overall, records, _ = scored
+    prompt = build_prompt("SYN0002", bundle, overall, records, budget=100_000)
+    assert prompt.dropped == ()
+    assert prompt.tokens == count_tokens(prompt.text)
+    assert "Revenue Growth" in prompt.text and "Total Revenue|" in prompt.text
+
+
+@pytest.mark.parametrize("budget", [450, 300, 200])
+def test_prompt_fits_the_budget(scored, budget):
+    bundle, overall, records, priorities = scored
+    full = build_prompt("SYN0002", bundle, overall, records, budget=100_000)
+    prompt = build_prompt("SYN0002", bundle, overall, records, budget=budget)
+    assert full.tokens > budget
+    assert prompt.tokens <= budget
+    assert prompt.tokens == count_tokens(prompt.text)
+    assert prompt.text.startswith("Analyse SYN0002") and "Scores: health=" in prompt.text
+
+    # Lowest priority (highest number) goes first, and nothing kept ranks below a dropped line
+    dropped = [priorities[label] for label in prompt.dropped]
+    assert dropped == sorted(dropped, reverse=True)
+    kept = [p for label, p in priorities.items() if label not in prompt.dropped]
+    assert max(kept, default=0) <= min(dropped)
+
+
+def test_tighter_budgets_drop_a_superset(scored):
+    bundle, overall, records, _ = scored
+    loose = build_prompt("SYN0002", bundle, overall, records, budget=400)
+    tight = build_prompt("SYN0002", bundle, overall, records, budget=250)
+    assert set(loose.dropped) < set(tight.dropped)
+    assert tight.dropped[:len(loose.dropped)] == loose.dropped
@@ -0,0 +1,51 @@
+from fetch_backend import SyntheticBackend
+from refresh import HashStore, refresh_scores
+from rules import load_strategy
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+def quality(threshold):
+    return load_strategy({"name": "quality", "metrics": {
+        "ROIC": {"type": "step", "bands": [[">", threshold, 10]], "source": "buffett.ROIC"},
+    }})
+
+
+def refresh(state, scores, strategy, tickers=TICKERS, **options):
+    return refresh_scores(tickers, scores=scores, backend=SyntheticBackend(), state=state,
+                          strategy=strategy, **options)
+
+
+def test_unchanged_tickers_are_skipped(tmp_path):
+    state = HashStore(str(tmp_path / "state.sqlite"))
+    scores, first = refresh(state, None, quality(0.15))
+    _, second = refresh(state, scores, quality(0.15))
+    assert (first.rescored, second.rescored, second.skipped) == (3, 0, 3)
+
+
+def test_new_tickers_and_full_refresh(tmp_path):
+    state = HashStore(str(tmp_path / "state.sqlite"))
+    scores, _ = refresh(state, None, None)
+    scores, summary = refresh(state, scores, None, tickers=TICKERS + ["DDD"])
+    assert (summary.rescored, summary.skipped) == (1, 3)
+    assert sorted(scores["ticker"]) == TICKERS + ["DDD"]
+    _, summary = refresh(state, scores, None, tickers=TICKERS + ["DDD"], full=True)
+    assert summary.rescored == 4
+
+
+def test_changed_strategy_rules_rescore_everything(tmp_path):
+    state = HashStore(str(tmp_path / "state.sqlite"))
+    scores, _ = refresh(state, None, quality(0.15))
+    scores, summary = refresh(state, scores, quality(-1.0))    # same name, new band
+    assert summary.rescored == 3
+    assert (scores["quality"] == 10).all()
+    _, summary = refresh(state, scores, quality(-1.0))
+    assert summary.skipped == 3
+
+
+def test_scoring_version_bump_rescores_everything(tmp_path, monkeypatch):
+    state = HashStore(str(tmp_path / "state.sqlite"))
+    scores, _ = refresh(state, None, None)
+    monkeypatch.setattr("refresh.SCORING_VERSION", 999)
+    _, summary = refresh(state, scores, None)
+    assert summary.rescored == 3
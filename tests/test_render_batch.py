@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+
+from fetch_backend import SyntheticBackend, synthetic_universe
+from render_batch import render_universe, trend_figure
+
+
+def test_charts_and_grids_are_written(tmp_path):
+    tickers = synthetic_universe(3)
+    results, summary = render_universe(tickers, str(tmp_path), columns=["Total Revenue", "Moat Width"],
+                                       backend=SyntheticBackend(), render_workers=0, grid=True)
+    charts = results[results["ticker"].notna()]
+    assert list(charts["ticker"]) == [t for t in tickers for _ in range(2)]
+    rendered = charts[charts["column"] == "Total Revenue"]
+    assert rendered["error"].isna().all()
+    for path in rendered["path"]:
+        with open(path, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert (charts.loc[charts["column"] == "Moat Width", "error"] == "column 'Moat Width' not found").all()
+    assert (summary.charts, summary.failed, summary.grids) == (3, 0, 1)
+    grids = results.loc[results["ticker"].isna(), "path"]
+    assert [os.path.basename(path) for path in grids] == ["grid_Total_Revenue_1.png"]
+    assert os.path.getsize(grids.iloc[0]) > 0
+
+
+def test_svg_output_on_a_process_pool(tmp_path):
+    results, summary = render_universe(synthetic_universe(4), str(tmp_path), columns=["Net Income"],
+                                       backend=SyntheticBackend(), fmt="svg", render_workers=2, chunk_size=2)
+    assert summary.charts == 4 and summary.failed == 0
+    assert all(path.endswith(".svg") and os.path.getsize(path) > 0 for path in results["path"])
+
+
+def test_figures_are_reused():
+    assert trend_figure() is trend_figure()
+    assert trend_figure() is not trend_figure(figsize=(4, 3))
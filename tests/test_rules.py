@@ -0,0 +1,120 @@
+import json
+
+import numpy as np
+import pytest
+
+from rules import BUFFETT, FINANCIAL_HEALTH, LYNCH, RuleError, load_strategy
+
+NAN = float("nan")
+
+# (strategy, metric, value, score of the scorer before the rule engine)
+BAND_EDGES = [
+    (FINANCIAL_HEALTH, "Liquidity", 2.0, 10), (FINANCIAL_HEALTH, "Liquidity", 1.99, 7),
+    (FINANCIAL_HEALTH, "Liquidity", 1.5, 7), (FINANCIAL_HEALTH, "Liquidity", 1.49, 3),
+    (FINANCIAL_HEALTH, "Leverage", 0.49, 10), (FINANCIAL_HEALTH, "Leverage", 0.5, 7),
+    (FINANCIAL_HEALTH, "Leverage", 1.0, 5), (FINANCIAL_HEALTH, "Leverage", 2.0, 3),
+    (FINANCIAL_HEALTH, "Cash Safety", 0.1, 7), (FINANCIAL_HEALTH, "Cash Safety", 0.11, 10),
+    (FINANCIAL_HEALTH, "Cash Safety", 0.05, 3),
+    (FINANCIAL_HEALTH, "Revenue Growth", 10, 7), (FINANCIAL_HEALTH, "Revenue Growth", 10.01, 10),
+    (FINANCIAL_HEALTH, "Revenue Growth", 5, 3),
+    (FINANCIAL_HEALTH, "Gross Margin", 0.4, 7), (FINANCIAL_HEALTH, "Gross Margin", 0.2, 3),
+    (FINANCIAL_HEALTH, "Net Margin", 0.21, 10), (FINANCIAL_HEALTH, "Net Margin", 0.1, 3),
+    (FINANCIAL_HEALTH, "FCF Positivity", 0, 3), (FINANCIAL_HEALTH, "FCF Positivity", 1, 10),
+    (BUFFETT, "ROE", 0.0, 0), (BUFFETT, "ROE", 0.075, 5), (BUFFETT, "ROE", 0.15, 5),
+    (BUFFETT, "ROE", 0.2, 7.5), (BUFFETT, "ROE", 0.25, 10), (BUFFETT, "ROE", 0.5, 10), (BUFFETT, "ROE", -0.1, 0),
+    (BUFFETT, "Debt-to-Equity", -0.1, 10), (BUFFETT, "Debt-to-Equity", 0, 10),
+    (BUFFETT, "Debt-to-Equity", 1, 7.5), (BUFFETT, "Debt-to-Equity", 2, 5),
+    (BUFFETT, "Debt-to-Equity", 3, 5), (BUFFETT, "Debt-to-Equity", 5, 0),
+    (BUFFETT, "Owner Earnings", 0, 0), (BUFFETT, "Owner Earnings", 1, 10),
+    (BUFFETT, "FCFF", -1, 0), (BUFFETT, "FCFF", 1, 10),
+    (LYNCH, "EPS Growth %", 20, 10), (LYNCH, "EPS Growth %", 19.9, 7), (LYNCH, "EPS Growth %", 10, 7),
+    (LYNCH, "EPS Growth %", 5, 5), (LYNCH, "EPS Growth %", 0.1, 4), (LYNCH, "EPS Growth %", 0, 1),
+    (LYNCH, "PEG Ratio", 0.99, 10), (LYNCH, "PEG Ratio", 1, 7), (LYNCH, "PEG Ratio", 2, 3),
+    (LYNCH, "Debt-to-Equity", 0.5, 7), (LYNCH, "Debt-to-Equity", 1.99, 5), (LYNCH, "Debt-to-Equity", 2, 1),
+    (LYNCH, "Net Cash Position", 1, 10), (LYNCH, "Net Cash Position", 0, 5),
+    (LYNCH, "Net Cash Position", -1e9, 1),
+]
+
+
+@pytest.mark.parametrize("strategy, metric, value, expected", BAND_EDGES)
+def test_band_edges_match_the_original_scorers(strategy, metric, value, expected):
+    rule = strategy[metric]
+    assert rule(value) == pytest.approx(expected)
+    assert rule(np.array([value]))[0] == pytest.approx(expected)
+
+
+# None is always "missing" (3). NaN: the if-ladders let it fail every comparison, so step
+# rules fall through to their last band, except where the scorer tested for NaN first.
+MISSING = [
+    (FINANCIAL_HEALTH, "Liquidity", 3, 3),
+    (FINANCIAL_HEALTH, "Revenue Growth", 3, 3),
+    (BUFFETT, "ROE", 3, 3),
+    (BUFFETT, "Debt-to-Equity", 3, 3),
+    (BUFFETT, "Owner Earnings", 3, 0),      # the original _score_positive: NaN > 0 is False
+    (BUFFETT, "FCFF", 3, 0),
+    (LYNCH, "EPS Growth %", 3, 1),
+    (LYNCH, "Debt-to-Equity", 3, 1),
+    (LYNCH, "PEG Ratio", 3, 3),
+]
+
+
+@pytest.mark.parametrize("strategy, metric, none_score, nan_score", MISSING)
+def test_missing_values(strategy, metric, none_score, nan_score):
+    rule = strategy[metric]
+    assert rule(None) == none_score
+    assert rule(NAN) == nan_score
+    assert rule(np.array([NAN, 1.0]))[0] == nan_score
+
+
+SPEC = {
+    "name": "quality",
+    "metrics": {
+        "ROE": {"source": "buffett.ROE", "type": "range", "low": 0.12, "high": 0.3, "weight": 2},
+        "Leverage": {"source": "financial_health.Leverage", "type": "step",
+                     "bands": [["<", 0.5, 10], ["<", 1.5, 6]], "otherwise": 2},
+    },
+}
+YAML = """
+name: quality
+metrics:
+  ROE: {source: buffett.ROE, type: range, low: 0.12, high: 0.3, weight: 2}
+  Leverage:
+    source: financial_health.Leverage
+    type: step
+    bands: [["<", 0.5, 10], ["<", 1.5, 6]]
+    otherwise: 2
+"""
+
+
+def test_load_strategy_from_dict_yaml_and_json(tmp_path):
+    json_path = tmp_path / "quality.json"
+    json_path.write_text(json.dumps(SPEC))
+    yaml_path = tmp_path / "quality.yaml"
+    yaml_path.write_text(YAML)
+
+    values = {"ROE": 0.2, "Leverage": 1.0}
+    expected = (2 * (5 + 5 * (0.08 / 0.18)) + 6) / 3
+    for source in (SPEC, YAML, str(yaml_path), str(json_path)):
+        strategy = load_strategy(source)
+        assert strategy.name == "quality"
+        assert list(strategy) == ["ROE", "Leverage"]
+        assert strategy["ROE"].source == ("buffett", "ROE")
+        overall, scores = strategy.score(values)
+        assert scores == {"ROE": pytest.approx(5 + 5 * (0.08 / 0.18)), "Leverage": 6}
+        assert overall == pytest.approx(expected)
+
+
+def test_shipped_strategy_loads():
+    strategy = load_strategy("strategies/quality.yaml")
+    assert strategy.name == "quality" and len(strategy.rules) == 4
+
+
+@pytest.mark.parametrize("spec", [
+    {"name": "x", "metrics": {}},
+    {"name": "x", "metrics": {"ROE": {"type": "cubic"}}},
+    {"name": "x", "metrics": {"ROE": {"type": "range", "low": 1, "high": 1}}},
+    {"name": "x", "metrics": {"ROE": {"type": "step", "bands": [["~", 1, 10]]}}},
+])
+def test_invalid_strategies(spec):
+    with pytest.raises(RuleError):
+        load_strategy(spec)
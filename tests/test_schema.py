@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from data_fetcher import fetch_statements
+from fetch_backend import FixtureBackend, write_fixture
+from schema import canonicalize, resolve_columns, unmapped_columns
+
+DATES = pd.date_range("2024-03-31", periods=4, freq="QE")
+
+
+def test_spellings_resolve_to_canonical_names():
+    resolution = resolve_columns("balance_sheet", ["TotalLiab", "total_assets", "Cash And Cash Equivalents",
+                                                   "Moat Width"])
+    assert resolution.renames == {"TotalLiab": "Total Liabilities Net Minority Interest",
+                                  "total_assets": "Total Assets"}
+    assert resolution.unmapped == ["Moat Width"]
+    assert resolution.shadowed == []
+
+
+def test_canonical_spelling_wins_over_aliases():
+    resolution = resolve_columns("income_statement", ["Revenues", "Total Revenue", "Revenue"])
+    assert resolution.renames == {}
+    assert resolution.shadowed == ["Revenues", "Revenue"]
+
+
+def test_canonicalize_casts_values_and_counts_unmapped_columns():
+    df = pd.DataFrame({"Total Cash From Operating Activities": ["1.5", "n/a"],
+                       "Test Only Item": [1, 2]})
+    out = canonicalize("cash_flow", df)
+    assert list(out.columns) == ["Operating Cash Flow", "Test Only Item"]
+    assert all(dtype == np.float64 for dtype in out.dtypes)
+    assert out["Operating Cash Flow"].iloc[0] == 1.5 and np.isnan(out["Operating Cash Flow"].iloc[1])
+    assert unmapped_columns("cash_flow")[("cash_flow", "Test Only Item")] >= 1
+
+
+def test_legacy_fixtures_prepare_like_current_ones(tmp_path):
+    def raw(items):
+        values = np.arange(1.0, len(items) * len(DATES) + 1).reshape(len(items), len(DATES)) * 1e8
+        return pd.DataFrame(values, index=items, columns=DATES)
+
+    write_fixture(str(tmp_path), "NEW", {
+        "balance_sheet": raw(["Total Assets", "Total Liabilities Net Minority Interest", "Stockholders Equity",
+                              "Cash And Cash Equivalents"]),
+        "income_statement": raw(["Total Revenue", "Net Income"]),
+    })
+    write_fixture(str(tmp_path), "OLD", {
+        "balance_sheet": raw(["Total Assets", "Total Liab", "Total Stockholder Equity", "Cash"]),
+        "income_statement": raw(["Revenues", "Net Income Applicable To Common Shares"]),
+    })
+    backend = FixtureBackend(str(tmp_path))
+    new = fetch_statements("NEW", backend=backend)
+    old = fetch_statements("OLD", backend=backend)
+    for new_df, old_df in zip(new, old):
+        if new_df is None:
+            assert old_df is None
+        else:
+            pd.testing.assert_frame_equal(old_df, new_df)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from screener import QueryError, Screener
+
+NAN = float("nan")
+
+
+def make_screener():
+    return Screener(["A", "B", "C", "D"], {
+        "buffett.ROIC": np.array([0.20, 0.10, NAN, 0.30]),
+        "buffett.Debt_to_Equity": np.array([0.2, NAN, 0.4, 0.9]),
+        "buffett": np.array([7.0, 5.0, 6.0, 8.0]),
+    })
+
+
+def tickers(screener, text):
+    return sorted(screener.query(text).tickers)
+
+
+def test_order_and_limit():
+    result = make_screener().query("buffett >= 6 order by ROIC desc limit 2")
+    assert result.tickers == ["D", "A"]
+    assert result.matched == 3
+    assert list(result.columns["buffett.ROIC"]) == [0.30, 0.20]
+
+
+def test_unknown_columns_are_rejected():
+    with pytest.raises(QueryError):
+        make_screener().query("Moat > 3")
+
+
+def test_missing_values_never_match():
+    screener = make_screener()
+    assert tickers(screener, "ROIC > 15%") == ["A", "D"]
+    assert tickers(screener, "ROIC > 15% or Debt_to_Equity < 0.5") == ["A", "C", "D"]
+    assert tickers(screener, "not ROIC > 15%") == ["B"]
+    assert tickers(screener, "not (ROIC > 15% and Debt_to_Equity < 0.5)") == ["D"]
+    assert tickers(screener, "not not ROIC > 15%") == ["A", "D"]
+
+
+def test_not_without_missing_values():
+    assert tickers(make_screener(), "not buffett >= 7") == ["B", "C"]
+
+
+def test_column_comparisons_skip_missing_values():
+    screener = make_screener()
+    # ROIC [0.2, 0.1, nan, 0.3] vs Debt_to_Equity [0.2, nan, 0.4, 0.9]
+    assert tickers(screener, "ROIC != Debt_to_Equity") == ["D"]
+    assert tickers(screener, "ROIC < Debt_to_Equity") == ["D"]
+    assert tickers(screener, "ROIC >= Debt_to_Equity") == ["A"]
+    assert tickers(screener, "not ROIC != Debt_to_Equity") == ["A"]
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import service
+from service import RequestError, ScoringService, parse_request
+from statement_cache import StatementCache
+
+
+@pytest.mark.parametrize("body, query", [
+    ([], None),
+    ({}, None),
+    ({"ticker": "AAPL", "statements": "raw"}, None),
+    ({"ticker": "AAPL", "scorers": "buffett,graham"}, None),
+])
+def test_invalid_requests_are_rejected(body, query):
+    with pytest.raises(RequestError) as error:
+        parse_request(body, query)
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("body, query", [
+    ({"ticker": "AAPL", "quarters": 0}, None),
+    ({"ticker": "AAPL", "quarters": -4}, None),
+    ({"ticker": "AAPL"}, {"quarters": "0"}),
+    ({"ticker": "AAPL", "quarters": 2.5}, None),
+    ({"ticker": "AAPL", "quarters": "many"}, None),
+    ({"ticker": "AAPL", "quarters": 81}, None),
+])
+def test_invalid_quarters_are_rejected(body, query):
+    with pytest.raises(RequestError) as error:
+        parse_request(body, query)
+    assert error.value.status == 400
+
+
+def test_scorers_are_deduplicated():
+    request = parse_request({"ticker": " msft "}, {"scorers": "lynch,buffett,lynch"})
+    assert request["ticker"] == "MSFT"
+    assert request["scorers"] == ("lynch", "buffett")
+
+
+def test_quarters_default_and_sources():
+    assert parse_request({"ticker": "aapl"})["quarters"] == 8
+    assert parse_request({"ticker": "aapl"}, {"quarters": "4"})["quarters"] == 4
+    assert parse_request({"ticker": "aapl", "quarters": 12}, {"quarters": "4"})["quarters"] == 12
+
+
+def test_cache_defaults_to_the_shared_one(monkeypatch):
+    shared = StatementCache(":memory:")
+    monkeypatch.setattr(service, "get_default_cache", lambda: shared)
+    services = [ScoringService(), ScoringService(cache=None)]
+    try:
+        assert services[0].cache is shared
+        assert services[1].cache is None
+    finally:
+        for s in services:
+            asyncio.run(s.stop())
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+import statement_cache
+from data_fetcher import fetch_statements
+from fetch_backend import FixtureBackend, write_fixture
+from statement_cache import QUARTER_SECONDS, StatementCache
+
+NOW = pd.Timestamp("2025-01-15").timestamp()
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(statement_cache.time, "time", clock)
+    return clock
+
+
+def frame(latest):
+    return pd.DataFrame({"Date": pd.to_datetime([latest]), "Total Revenue": [1.0]})
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = StatementCache(str(tmp_path / "s.sqlite"), ttl=100)
+    cache.store("aapl", "income_statement", 8, frame("2024-12-31"))
+    cache.store("AAPL", "cash_flow", 8, None)
+    hit, df = cache.lookup("AAPL", "income_statement", 8)
+    assert hit and df["Total Revenue"].iloc[0] == 1.0
+    assert cache.lookup("AAPL", "cash_flow", 8) == (True, None)     # "no data" is cached too
+    assert cache.lookup("AAPL", "income_statement", 4) == (False, None)
+
+    clock.now += 101
+    assert cache.lookup("AAPL", "income_statement", 8) == (False, None)
+    assert cache.stats()["hits"] == 2
+
+
+def test_frames_a_quarter_behind_are_rechecked_early(tmp_path, clock):
+    cache = StatementCache(str(tmp_path / "s.sqlite"), ttl=10_000, stale_recheck=50)
+    behind = pd.Timestamp(NOW - QUARTER_SECONDS - 86400, unit="s")
+    cache.store("OLD", "income_statement", 8, frame(behind))
+    cache.store("NEW", "income_statement", 8, frame("2024-12-31"))
+    clock.now += 51
+    assert cache.lookup("OLD", "income_statement", 8)[0] is False
+    assert cache.lookup("NEW", "income_statement", 8)[0] is True
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = StatementCache(str(tmp_path / "s.sqlite"), max_entries=2)
+    for i, ticker in enumerate(["A", "B"]):
+        clock.now = NOW + i
+        cache.store(ticker, "income_statement", 8, frame("2024-12-31"))
+    clock.now = NOW + 2
+    cache.lookup("A", "income_statement", 8)
+    clock.now = NOW + 3
+    cache.store("C", "income_statement", 8, frame("2024-12-31"))
+    assert len(cache) == 2
+    assert cache.lookup("B", "income_statement", 8)[0] is False
+    assert cache.lookup("A", "income_statement", 8)[0] is True
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_statements_are_not_fetched(tmp_path):
+    root = str(tmp_path / "fixtures")
+    dates = pd.date_range("2024-03-31", periods=4, freq="QE")
+    write_fixture(root, "AAPL", {
+        "income_statement": pd.DataFrame([[1e9, 2e9, 3e9, 4e9]], index=["Total Revenue"], columns=dates),
+    })
+    cache = StatementCache(str(tmp_path / "s.sqlite"))
+    first = fetch_statements("AAPL", backend=FixtureBackend(root), cache=cache)
+    # The fixtures are gone, so only the cache can answer
+    second = fetch_statements("AAPL", backend=FixtureBackend(str(tmp_path / "empty")), cache=cache)
+    pd.testing.assert_frame_equal(first.income_statement, second.income_statement)
+    assert second.balance_sheet is None
+    assert cache.stats()["hits"] == 3
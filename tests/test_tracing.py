@@ -0,0 +1,75 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+@tracing.traced()
+def work(label):
+    return label
+
+
+def test_nested_spans_and_chrome_export(tmp_path):
+    with tracing.trace("page") as t:
+        with tracing.span("Fetch", ticker="AAPL"):
+            work("a")
+            tracing.annotate(rows=8)
+        work("b")
+    records = t.records()
+    assert [(r["name"], r["depth"]) for r in records] == [
+        ("Fetch", 0), ("tests.test_tracing.work", 1), ("tests.test_tracing.work", 0)]
+    assert records[0]["attrs"] == {"ticker": "AAPL", "rows": 8}
+
+    t.save(str(tmp_path / "trace.json"))
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [e["name"] for e in events if e["ph"] == "X"] == [r["name"] for r in records]
+
+
+def test_overlapping_traces_stay_separate():
+    # Two page loads: B starts after A but A finishes first
+    a_started, b_started, a_done = threading.Event(), threading.Event(), threading.Event()
+    traces = {}
+
+    def session_a():
+        with tracing.trace("A") as t:
+            traces["A"] = t
+            a_started.set()
+            b_started.wait(5)
+            work("a")
+        a_done.set()
+
+    def session_b():
+        a_started.wait(5)
+        with tracing.trace("B") as t:
+            traces["B"] = t
+            b_started.set()
+            a_done.wait(5)
+            work("b")
+
+    threads = [threading.Thread(target=session_a), threading.Thread(target=session_b)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r["name"] for r in traces["A"].records()] == ["tests.test_tracing.work"]
+    assert [r["name"] for r in traces["B"].records()] == ["tests.test_tracing.work"]
+    assert tracing.active_trace() is None
+
+
+def test_trace_is_inactive_after_block():
+    with tracing.trace("page"):
+        work("x")
+    assert tracing.active_trace() is None
+    assert tracing.span("outside") is tracing._NOOP
+
+
+def test_bind_hands_the_trace_to_worker_threads():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with tracing.trace("batch") as t:
+            list(pool.map(tracing.bind(work), ["a", "b", "c"]))
+        # Unbound work in the same pool threads is not recorded anywhere
+        list(pool.map(work, ["d"]))
+    assert len(t.records()) == 3
+    assert tracing.bind(work) is work
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from data_fetcher import fetch_statements
+from fetch_backend import SyntheticBackend, synthetic_universe
+from score import score_full_company
+from vector_score import score_full_universe, stack_statements
+
+SECTIONS = ["Balance Sheet Breakdown", "Income Statement Breakdown", "Cash Flow Breakdown"]
+
+
+def build_universe(size, num_quarters=6):
+    """Synthetic statements where most tickers hit an edge case of the scalar scorer."""
+    backend = SyntheticBackend(num_quarters=num_quarters)
+    bundles = {}
+    for i, ticker in enumerate(synthetic_universe(size)):
+        bs, is_, cf = fetch_statements(ticker, num_quarters=num_quarters, backend=backend, cache=None)
+        bs["Current_Ratio"] = bs["Current Assets"] / bs["Current Liabilities"]
+        bs["Cash_to_Assets"] = bs["Cash And Cash Equivalents"] / bs["Total Assets"]
+
+        case = i % 8
+        if case == 1:
+            bs = bs.drop(columns=["Current_Ratio", "Debt_to_Equity"])
+        elif case == 2:
+            is_ = is_.tail(1)
+        elif case == 3:
+            is_ = is_.drop(columns=["Gross Profit"])
+            is_.loc[is_.index[-1], "Total Revenue"] = 0.0
+        elif case == 4:
+            bs.loc[bs.index[-1], "Cash_to_Assets"] = np.nan
+            cf = None
+        elif case == 5:
+            is_.loc[is_.index[-2], "Net Income"] = np.nan
+            cf = cf.drop(columns=["Free Cash Flow"])
+        elif case == 6:
+            bs, cf = bs.tail(1), cf.tail(1)
+        bundles[ticker] = (bs, is_, cf)
+    return bundles
+
+
+def _as_float(value):
+    return np.nan if value is None else float(value)
+
+
+def test_universe_matches_scalar_scorer():
+    bundles = build_universe(40)
+    stacked = [stack_statements({t: b[i] for t, b in bundles.items()}) for i in range(3)]
+    result = score_full_universe(*stacked, tickers=list(bundles))
+    assert list(result.index) == list(bundles)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for ticker, bundle in bundles.items():
+            overall, breakdown = score_full_company(*bundle)
+            row = result.loc[ticker]
+            expected = {"Financial Health": overall}
+            for section in ("Balance Sheet Score", "Income Statement Score", "Cash Flow Score"):
+                expected[section] = breakdown[section]
+            for section in SECTIONS:
+                for name, metric in breakdown[section].items():
+                    expected[name] = metric["value"]
+                    expected[f"{name} Score"] = metric["score"]
+            for column, value in expected.items():
+                assert row[column] == pytest.approx(_as_float(value), rel=1e-9, nan_ok=True), (ticker, column)
+
+
+def test_tickers_without_statements_score_the_defaults():
+    bundles = build_universe(2)
+    stacked = [stack_statements({t: b[i] for t, b in bundles.items()}) for i in range(3)]
+    result = score_full_universe(*stacked, tickers=list(bundles) + ["MISSING"])
+    assert np.isnan(result.loc["MISSING", "Liquidity"])
+    assert result.loc["MISSING", "Financial Health"] == pytest.approx(3.0)
@@ -0,0 +1,279 @@
+"""
+Lightweight tracing of where a page load or batch run spends its time.
+
+Spans are opened with the `span()` context manager or the `@traced()`
+decorator and carry attributes such as the ticker, row counts or cache
+status:
+
+    with tracing.trace("AAPL page") as t:
+        bundle = fetch_statements("AAPL")      # decorated: records its own span
+        with tracing.span("render", ticker="AAPL"):
+            ...
+    t.save("page.trace.json")                  # Chrome trace (chrome://tracing, Perfetto)
+    t.save("page.json", format="json")         # plain span list
+
+Spans are only recorded while a trace is active. Otherwise a decorated
+function costs one context variable lookup and `span()` returns a shared
+no-op object, so the instrumentation can stay on the hot paths.
+
+The active trace is kept in a context variable, so concurrent traces (one
+per Streamlit session thread) never see each other's spans. Worker threads
+start without a trace; wrap the function handed to a thread pool with
+`bind()` to record its spans, as top-level spans of that thread, into the
+caller's trace:
+
+    pool.map(tracing.bind(load), statements)
+
+Spans in worker processes are not collected.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_active = contextvars.ContextVar("tracing_active", default=None)
+_local = threading.local()
+
+
+# === SPANS ===
+class Span:
+    """One timed operation. Use as a context manager; set() adds attributes."""
+    __slots__ = ("trace", "name", "attrs", "start", "end", "parent", "thread", "id")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = self.end = None
+        self.parent = None
+        self.thread = None
+        self.id = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].id if stack else None
+        self.thread = threading.current_thread().name
+        self.id = self.trace.next_id()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.trace.add(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned by span() while no trace is active."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def _stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def span(name, **attrs):
+    """Context manager timing the enclosed block as a span of the active trace."""
+    trace = _active.get()
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, attrs)
+
+
+def annotate(**attrs):
+    """Adds attributes to the innermost open span of this thread, if tracing."""
+    if _active.get() is None:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].attrs.update(attrs)
+
+
+def traced(name=None, args=(), result=None):
+    """
+    Decorator recording a span for every call while a trace is active.
+    `name` defaults to "module.function". `args` names parameters to record
+    as attributes, or maps parameter names to attribute names; `result`
+    maps the return value to more attributes (e.g. frame_rows).
+    """
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+        params = list(inspect.signature(fn).parameters)
+        names = args.items() if isinstance(args, dict) else [(arg, arg) for arg in args]
+        positions = [(arg, attr, params.index(arg)) for arg, attr in names]
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if _active.get() is None:
+                return fn(*a, **kw)
+            attrs = {}
+            for arg, attr, index in positions:
+                if arg in kw:
+                    attrs[attr] = kw[arg]
+                elif index < len(a):
+                    attrs[attr] = a[index]
+            with span(label, **attrs) as s:
+                value = fn(*a, **kw)
+                if result is not None:
+                    s.set(**result(value))
+                return value
+        return wrapper
+    return decorate
+
+
+def frame_rows(value):
+    """`result` helper for @traced: row count of a DataFrame or tuple of DataFrames."""
+    frames = value if isinstance(value, tuple) else (value,)
+    return {"rows": sum(len(df) for df in frames if df is not None and hasattr(df, "columns"))}
+
+
+# === TRACES ===
+class Trace:
+    """The spans recorded between entering and leaving trace()."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def records(self):
+        """
+        Finished spans in start order as dicts with start/duration in seconds
+        (relative to the trace start), nesting depth, thread and attributes.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        depth = {}
+        records = []
+        for s in spans:
+            depth[s.id] = depth.get(s.parent, -1) + 1 if s.parent is not None else 0
+            records.append({
+                "name": s.name,
+                "start": s.start - self.origin,
+                "duration": s.duration,
+                "depth": depth[s.id],
+                "thread": s.thread,
+                "attrs": {key: _jsonable(value) for key, value in s.attrs.items()},
+            })
+        return records
+
+    def to_json(self):
+        return {"name": self.name, "spans": self.records()}
+
+    def to_chrome(self):
+        """Chrome trace event format (complete "X" events, microseconds)."""
+        pid = os.getpid()
+        tids = {}
+        events = []
+        for record in self.records():
+            tid = tids.setdefault(record["thread"], len(tids) + 1)
+            events.append({
+                "name": record["name"], "ph": "X", "pid": pid, "tid": tid,
+                "ts": round(record["start"] * 1e6, 3), "dur": round(record["duration"] * 1e6, 3),
+                "args": record["attrs"],
+            })
+        for thread, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace": self.name}}
+
+    def save(self, path, format="chrome"):
+        """Writes the trace as "chrome" (trace event) or "json" (span list)."""
+        if format not in ("chrome", "json"):
+            raise ValueError(f"unknown trace format {format!r}; expected 'chrome' or 'json'")
+        data = self.to_chrome() if format == "chrome" else self.to_json()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    def total(self):
+        return time.perf_counter() - self.origin
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        return float(value)   # numpy scalars
+    except (TypeError, ValueError):
+        return str(value)
+
+
+@contextmanager
+def trace(name="trace"):
+    """
+    Records spans into a new Trace until the block exits: those of this
+    thread (or asyncio task) and of functions handed to others with bind().
+    """
+    new = Trace(name)
+    token = _active.set(new)
+    try:
+        yield new
+    finally:
+        _active.reset(token)
+
+
+def bind(fn):
+    """
+    `fn` wrapped to record its spans into the calling thread's active trace
+    when it runs in another thread. Returns `fn` itself when not tracing.
+    """
+    trace = _active.get()
+    if trace is None:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*a, **kw):
+        token = _active.set(trace)
+        try:
+            return fn(*a, **kw)
+        finally:
+            _active.reset(token)
+    return run
+
+
+def active_trace():
+    return _active.get()
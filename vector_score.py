@@ -0,0 +1,208 @@
+"""
+Vectorized Financial Health scoring for many tickers at once.
+
+score_full_universe() computes the same metrics and sub-scores as
+score.score_full_company(), but over stacked frames indexed by
+(ticker, Date), with one NumPy pass per metric instead of one Python call
+per ticker. Metrics that are missing for a ticker are NaN and score the
+default 3, exactly like the scalar scorer.
+"""
+import numpy as np
+import pandas as pd
+
+from rules import FINANCIAL_HEALTH
+
+DEFAULT_SCORE = 3
+
+BALANCE_SHEET_METRICS = ["Liquidity", "Leverage", "Asset Quality", "Cash Safety",
+                         "Retained Earnings Growth", "Equity Strength"]
+INCOME_STATEMENT_METRICS = ["Revenue Growth", "Gross Margin", "Net Margin",
+                            "Net Income Growth", "Earnings Quality"]
+CASH_FLOW_METRICS = ["FCF Positivity", "FCF Growth", "FCF to Revenue",
+                     "OpCF Positivity", "CapEx Discipline"]
+
+
+def stack_statements(frames):
+    """
+    Stacks per-ticker statement frames (as returned by data_fetcher) into one
+    long frame indexed by (ticker, Date). Tickers without data are skipped.
+
+    Args:
+        frames: dict of ticker -> DataFrame with a 'Date' column, or None
+    """
+    items = [(t, df) for t, df in frames.items() if df is not None and not df.empty]
+    if not items:
+        return None
+    # One concat plus a MultiIndex built from arrays is much cheaper than
+    # set_index on every frame
+    long = pd.concat([df for _, df in items], ignore_index=True, sort=False)
+    tickers = np.repeat([t for t, _ in items], [len(df) for _, df in items])
+    long.index = pd.MultiIndex.from_arrays([tickers, long.pop("Date")], names=["ticker", "Date"])
+    return long
+
+
+class _Panel:
+    """
+    Latest and previous row positions per ticker in a stacked statement frame,
+    so each metric is a single fancy-indexing lookup.
+    """
+
+    def __init__(self, df, tickers):
+        n = len(tickers)
+        self.df = None
+        self.last = np.full(n, -1)
+        self.prev = np.full(n, -1)
+        if df is None or df.empty:
+            return
+
+        codes = pd.Index(tickers).get_indexer(df.index.get_level_values(0))
+        if np.any(codes[1:] < codes[:-1]):
+            # Rows of a ticker must be contiguous; a stable sort keeps their order
+            order = np.argsort(codes, kind="stable")
+            df, codes = df.iloc[order], codes[order]
+        keep = codes >= 0
+        df, codes = df[keep], codes[keep]
+        if not len(codes):
+            return
+
+        ends = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True])
+        starts = np.r_[0, ends[:-1] + 1]
+        self.df = df
+        self.last[codes[ends]] = ends
+        has_prev = ends > starts
+        self.prev[codes[ends[has_prev]]] = ends[has_prev] - 1
+
+    def has(self, *columns):
+        return self.df is not None and all(c in self.df.columns for c in columns)
+
+    def _take(self, column, rows):
+        values = self.df[column].to_numpy(dtype=float, na_value=np.nan)
+        out = np.full(len(rows), np.nan)
+        found = rows >= 0
+        out[found] = values[rows[found]]
+        return out
+
+    def latest(self, column):
+        """Value of the ticker's last row (iloc[-1]), NaN when missing."""
+        if not self.has(column):
+            return np.full(len(self.last), np.nan)
+        return self._take(column, self.last)
+
+    def previous(self, column):
+        """Value of the ticker's second to last row (iloc[-2]), NaN when missing."""
+        if not self.has(column):
+            return np.full(len(self.last), np.nan)
+        return self._take(column, self.prev)
+
+
+# === SCORING BANDS (rules.FINANCIAL_HEALTH, evaluated on whole arrays) ===
+def score_liquidity(val):
+    return FINANCIAL_HEALTH["Liquidity"](val)
+
+def score_leverage(val):
+    return FINANCIAL_HEALTH["Leverage"](val)
+
+def score_cash_safety(val):
+    return FINANCIAL_HEALTH["Cash Safety"](val)
+
+def score_revenue_growth(val):
+    return FINANCIAL_HEALTH["Revenue Growth"](val)
+
+def score_gross_margin(val):
+    return FINANCIAL_HEALTH["Gross Margin"](val)
+
+def score_net_margin(val):
+    return FINANCIAL_HEALTH["Net Margin"](val)
+
+def score_net_income_growth(val):
+    return FINANCIAL_HEALTH["Net Income Growth"](val)
+
+def score_positive_fcf(val):
+    return FINANCIAL_HEALTH["FCF Positivity"](val)
+
+
+def pct_change(panel, column):
+    """Last-over-previous change in percent, as score.pct_change does per ticker."""
+    last, prev = panel.latest(column), panel.previous(column)
+    return (last - prev) / np.abs(prev) * 100
+
+
+def _ratio(panel, numerator, denominator):
+    if not panel.has(numerator, denominator):
+        return np.full(len(panel.last), np.nan)
+    return panel.latest(numerator) / panel.latest(denominator)
+
+
+# === UNIVERSE SCORE ===
+def score_full_universe(bs_long, is_long, cf_long, tickers=None):
+    """
+    Scores the financial health of every ticker in the stacked frames.
+
+    Args:
+        bs_long, is_long, cf_long: statement frames indexed by (ticker, Date),
+            e.g. from stack_statements(); None when no ticker has that statement
+        tickers: tickers to score, in output order (default: every ticker found)
+
+    Returns:
+        DataFrame indexed by ticker with a value and a score column per metric
+        ('<Metric>' and '<Metric> Score'), the three section scores and the
+        overall 'Financial Health' score.
+    """
+    if tickers is None:
+        found = [df.index.get_level_values(0) for df in (bs_long, is_long, cf_long) if df is not None]
+        tickers = pd.Index(np.concatenate(found) if found else []).unique()
+    tickers = pd.Index(tickers, name="ticker")
+    n = len(tickers)
+
+    bs, is_, cf = (_Panel(df, tickers) for df in (bs_long, is_long, cf_long))
+    missing = np.full(n, np.nan)
+    default = np.full(n, float(DEFAULT_SCORE))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        liquidity = bs.latest("Current_Ratio")
+        leverage = bs.latest("Debt_to_Equity")
+        cash_safety = bs.latest("Cash_to_Assets")
+        rev_growth = pct_change(is_, "Total Revenue")
+        gross_margin = _ratio(is_, "Gross Profit", "Total Revenue")
+        net_margin = _ratio(is_, "Net Income", "Total Revenue")
+        net_income_growth = pct_change(is_, "Net Income")
+        fcf = cf.latest("Free Cash Flow")
+
+    metrics = {
+        "Liquidity": (liquidity, score_liquidity(liquidity)),
+        "Leverage": (leverage, score_leverage(leverage)),
+        "Asset Quality": (missing, default),
+        "Cash Safety": (cash_safety, score_cash_safety(cash_safety)),
+        "Retained Earnings Growth": (missing, default),
+        "Equity Strength": (missing, default),
+        "Revenue Growth": (rev_growth, score_revenue_growth(rev_growth)),
+        "Gross Margin": (gross_margin, score_gross_margin(gross_margin)),
+        "Net Margin": (net_margin, score_net_margin(net_margin)),
+        "Net Income Growth": (net_income_growth, score_net_income_growth(net_income_growth)),
+        "Earnings Quality": (missing, default),
+        "FCF Positivity": (fcf, score_positive_fcf(fcf)),
+        "FCF Growth": (missing, default),
+        "FCF to Revenue": (missing, default),
+        "OpCF Positivity": (missing, default),
+        "CapEx Discipline": (missing, default),
+    }
+
+    def section_score(names):
+        # Summed in breakdown order, like score.average_scores
+        total = np.zeros(n)
+        for name in names:
+            total = total + metrics[name][1]
+        return total / len(names)
+
+    columns = {}
+    for name, (value, score) in metrics.items():
+        columns[name] = value
+        columns[f"{name} Score"] = score
+    columns["Balance Sheet Score"] = section_score(BALANCE_SHEET_METRICS)
+    columns["Income Statement Score"] = section_score(INCOME_STATEMENT_METRICS)
+    columns["Cash Flow Score"] = section_score(CASH_FLOW_METRICS)
+    columns["Financial Health"] = (columns["Balance Sheet Score"]
+                                   + columns["Income Statement Score"]
+                                   + columns["Cash Flow Score"]) / 3
+
+    return pd.DataFrame(columns, index=tickers)
@@ -1,6 +1,9 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+# matplotlib is imported inside the plotting functions, so importing this
+# module (e.g. from app.py) does not load it until a chart is drawn
+from tracing import traced
 
+
+@traced(args=("column",))
 def plot_trend(df, column, title, save_path=None):
     """
     Plot the trend of a specific column over time (quarters).
@@ -11,6 +14,9 @@ def plot_trend(df, column, title, save_path=None):
     - title: str, the plot title.
     - save_path: str or None, if provided saves plot to this path instead of showing.
     """
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
     if column not in df.columns:
         print(f"Skipping plot: Column '{column}' not found.")
         return
@@ -19,7 +25,7 @@ def plot_trend(df, column, title, save_path=None):
         print(f"Skipping plot: No valid data in column '{column}'.")
         return
 
-    plt.figure(figsize=(10, 5))
+    fig = plt.figure(figsize=(10, 5))
     plt.plot(df["Date"], df[column], marker="o", linestyle='-')
     plt.title(title)
     plt.xlabel("Quarter")
@@ -32,8 +38,46 @@ def plot_trend(df, column, title, save_path=None):
 
     plt.tight_layout()
 
-    if save_path:
-        plt.savefig(save_path)
-        print(f"Plot saved to {save_path}")
-    else:
-        plt.show()
+    # Figures stay registered with pyplot until closed; close each one so
+    # repeated calls do not accumulate them (see render_batch.py for bulk runs)
+    try:
+        if save_path:
+            plt.savefig(save_path)
+            print(f"Plot saved to {save_path}")
+        else:
+            plt.show()
+    finally:
+        plt.close(fig)
+
+
+@traced()
+def plot_scores_figure(title, scores_dict):
+    """
+    Bar chart of scores on a 0-10 scale, labelled with each value.
+    Returns the matplotlib Figure; the caller decides how to show or save it.
+    The figure is not registered with pyplot, so it is freed with its last
+    reference and never needs plt.close().
+    """
+    from matplotlib.figure import Figure
+
+    labels = list(scores_dict.keys())
+    scores = [scores_dict[k] for k in labels]
+    fig = Figure()
+    ax = fig.add_subplot()
+    bars = ax.bar(labels, scores, color=['#1f77b4','#ff7f0e','#2ca02c'])
+    ax.set_ylim(0, 10)
+    ax.set_ylabel('Score (0-10)')
+    ax.set_title(title)
+
+    # Add score labels on top of bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            height + 0.1,
+            f'{height:.2f}',
+            ha='center',
+            va='bottom'
+        )
+
+    return fig